@@ -0,0 +1,49 @@
+"""extend bucket index with created_at
+
+Revision ID: 0b6e4d1f7c52
+Revises: e8a3f61c2d90
+Create Date: 2026-10-17 14:18:52.664107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4d1f7c52'
+down_revision: Union[str, Sequence[str], None] = 'e8a3f61c2d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pages filtered by bucket walk (brokerage_id, bucket, created_at)
+    # directly. It still serves per-bucket counts, so the old
+    # (brokerage_id, bucket) index goes away.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_lead_scores_brokerage_bucket_created', 'lead_scores',
+            ['brokerage_id', 'bucket', sa.text('created_at DESC')],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_lead_scores_brokerage_bucket', table_name='lead_scores',
+            postgresql_concurrently=True, if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_lead_scores_brokerage_bucket', 'lead_scores',
+            ['brokerage_id', 'bucket'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_lead_scores_brokerage_bucket_created', table_name='lead_scores',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,39 @@
+"""add unique index on brokerages.api_key
+
+Revision ID: 5a7c0e93b4f1
+Revises: 9f2b6d4e1a08
+Create Date: 2026-10-17 12:20:05.381957
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7c0e93b4f1'
+down_revision: Union[str, Sequence[str], None] = '9f2b6d4e1a08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pixel ingest looks brokerages up by api_key on every form submit.
+    # CONCURRENTLY can't run inside a transaction, hence the autocommit
+    # block. Fails if duplicate non-NULL keys exist — dedupe those first.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_brokerages_api_key', 'brokerages', ['api_key'],
+            unique=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_brokerages_api_key', table_name='brokerages',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,49 @@
+"""add lead_daily_rollups
+
+Revision ID: 7c2f9a4e6b18
+Revises: 0b6e4d1f7c52
+Create Date: 2026-10-17 15:06:31.907542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9a4e6b18'
+down_revision: Union[str, Sequence[str], None] = '0b6e4d1f7c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lead_daily_rollups',
+    sa.Column('brokerage_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bucket', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False, server_default=''),
+    sa.Column('campaign', sa.String(), nullable=False, server_default=''),
+    sa.Column('lead_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('brokerage_id', 'day', 'bucket', 'source', 'campaign')
+    )
+
+    # Backfill from every lead we already have
+    op.execute("""
+        INSERT INTO lead_daily_rollups (brokerage_id, day, bucket, source, campaign, lead_count)
+        SELECT brokerage_id,
+               created_at::date,
+               bucket,
+               COALESCE(input_payload->>'source', ''),
+               COALESCE(input_payload->>'campaign', ''),
+               COUNT(*)
+        FROM lead_scores
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('lead_daily_rollups')
@@ -0,0 +1,42 @@
+"""add brokerage_monthly_usage
+
+Revision ID: 9f2b6d4e1a08
+Revises: c3e81f0a5d27
+Create Date: 2026-10-17 11:03:27.114620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f2b6d4e1a08'
+down_revision: Union[str, Sequence[str], None] = 'c3e81f0a5d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('brokerage_monthly_usage',
+    sa.Column('brokerage_id', sa.String(), nullable=False),
+    sa.Column('period', sa.Date(), nullable=False),
+    sa.Column('lead_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('brokerage_id', 'period')
+    )
+
+    # Backfill every month we already have leads for
+    op.execute("""
+        INSERT INTO brokerage_monthly_usage (brokerage_id, period, lead_count, updated_at)
+        SELECT brokerage_id, date_trunc('month', created_at)::date, COUNT(*), NOW()
+        FROM lead_scores
+        GROUP BY brokerage_id, date_trunc('month', created_at)::date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('brokerage_monthly_usage')
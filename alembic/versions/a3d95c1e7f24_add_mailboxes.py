@@ -0,0 +1,42 @@
+"""add mailboxes
+
+Revision ID: a3d95c1e7f24
+Revises: 7c2f9a4e6b18
+Create Date: 2026-10-17 18:21:07.413902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d95c1e7f24'
+down_revision: Union[str, Sequence[str], None] = '7c2f9a4e6b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('mailboxes',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('host', sa.String(), nullable=False, server_default='imap.gmail.com'),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('password_env', sa.String(), nullable=False),
+    sa.Column('brokerage_id', sa.String(), nullable=True),
+    sa.Column('uid_validity', sa.BigInteger(), nullable=True),
+    sa.Column('last_uid', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+    sa.ForeignKeyConstraint(['brokerage_id'], ['brokerages.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('mailboxes')
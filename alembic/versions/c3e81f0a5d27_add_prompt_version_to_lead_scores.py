@@ -0,0 +1,28 @@
+"""add prompt_version to lead_scores
+
+Revision ID: c3e81f0a5d27
+Revises: 4aa4f264ec2f
+Create Date: 2026-10-17 09:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e81f0a5d27'
+down_revision: Union[str, Sequence[str], None] = '4aa4f264ec2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('lead_scores', sa.Column('prompt_version', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('lead_scores', 'prompt_version')
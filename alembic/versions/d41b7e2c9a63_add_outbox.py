@@ -0,0 +1,44 @@
+"""add outbox
+
+Revision ID: d41b7e2c9a63
+Revises: 5a7c0e93b4f1
+Create Date: 2026-10-17 13:02:44.510388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e2c9a63'
+down_revision: Union[str, Sequence[str], None] = '5a7c0e93b4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('dedupe_key', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(), nullable=False, server_default='pending'),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'dedupe_key', name='uq_outbox_kind_dedupe_key')
+    )
+    op.create_index('ix_outbox_due', 'outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_due', table_name='outbox')
+    op.drop_table('outbox')
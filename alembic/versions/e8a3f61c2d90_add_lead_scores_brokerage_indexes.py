@@ -0,0 +1,48 @@
+"""add lead_scores brokerage indexes
+
+Revision ID: e8a3f61c2d90
+Revises: d41b7e2c9a63
+Create Date: 2026-10-17 13:41:09.228735
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a3f61c2d90'
+down_revision: Union[str, Sequence[str], None] = 'd41b7e2c9a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY so ingest keeps writing to lead_scores meanwhile.
+    # See infra/bench_lead_indexes.py for the plans these change.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_lead_scores_brokerage_created', 'lead_scores',
+            ['brokerage_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_lead_scores_brokerage_bucket', 'lead_scores',
+            ['brokerage_id', 'bucket'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_lead_scores_brokerage_bucket', table_name='lead_scores',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        op.drop_index(
+            'ix_lead_scores_brokerage_created', table_name='lead_scores',
+            postgresql_concurrently=True, if_exists=True,
+        )
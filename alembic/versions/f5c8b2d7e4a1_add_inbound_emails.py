@@ -0,0 +1,34 @@
+"""add inbound emails
+
+Revision ID: f5c8b2d7e4a1
+Revises: a3d95c1e7f24
+Create Date: 2026-10-17 21:04:52.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c8b2d7e4a1'
+down_revision: Union[str, Sequence[str], None] = 'a3d95c1e7f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inbound_emails',
+    sa.Column('email_id', sa.String(), nullable=False),
+    sa.Column('brokerage_id', sa.String(), nullable=False),
+    sa.Column('lead_id', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    sa.PrimaryKeyConstraint('email_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('inbound_emails')
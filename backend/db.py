@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from backend.models import Base
 
@@ -44,9 +44,26 @@ def get_db():
 
 # -------------------------------------------------
 # Tenant context (your custom logic)
+# Applied lazily: set_tenant() only records the brokerage on the
+# session, and it is sent to Postgres when the session first begins a
+# transaction — requests that never query pay no round trip. The
+# setting is transaction-local, so it can't leak through the pool.
 # -------------------------------------------------
-def set_tenant(db, brokerage_id: str):
-    db.execute(
-        text("SET app.current_brokerage_id = :bid"),
+def _apply_tenant(connection, brokerage_id: str):
+    connection.execute(
+        text("SELECT set_config('app.current_brokerage_id', :bid, true)"),
         {"bid": brokerage_id},
     )
+
+
+def set_tenant(db, brokerage_id: str):
+    db.info["tenant"] = brokerage_id
+    if db.in_transaction():
+        _apply_tenant(db.connection(), brokerage_id)
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _tenant_on_begin(session, transaction, connection):
+    brokerage_id = session.info.get("tenant")
+    if brokerage_id:
+        _apply_tenant(connection, brokerage_id)
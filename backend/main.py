@@ -1,7 +1,12 @@
 import os
+import hmac
+import json
 import uuid
+import asyncio
 import logging
+import ipaddress
 from datetime import datetime, timezone
+from typing import Literal
 
 from dotenv import load_dotenv
 
@@ -10,32 +15,41 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from pydantic import BaseModel
-from sqlalchemy import text, func
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-import httpx
-
 from backend.routes.auth    import router as auth_router, get_current_user
-from backend.routes.leads   import router as leads_router
+from backend.routes.leads   import router as leads_router, HistoryFilters, lead_history_page, get_leads_stats
 from backend.routes.billing import router as billing_router
 from backend.routes.pixel_route import router as pixel_router
 
-from backend.db import get_db
-from backend.models import LeadScore
-from backend.services.ai_engine import analyze_lead_message
-from backend.services.alerts    import send_hot_alert
+from backend.db import get_db, SessionLocal
+from backend.services.ai_engine import (
+    RULES_ONLY_VERSION, analyze_lead_message_async, analyze_lead_rules_only,
+)
+from backend.services.lead_store import build_lead, persist_leads
+from backend.services import mailer, model_tier, outbound
+from backend.services.outbox import drain_forever
+from backend.services.inbound_email import enqueue_inbound_email
+from backend.services.lead_import import (
+    ImportTooLarge, import_leads, iter_csv_rows, iter_file, iter_ndjson_rows, spool_body,
+)
+from backend.services.usage import get_monthly_usage, plan_limit, release_usage, reserve_usage
+from backend.services.rate_limit import (
+    brokerage_or_ip, default_limit_middleware, enforce, parse_rule, rate_limit,
+)
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+INBOUND_RATE_LIMIT = os.getenv("INBOUND_RATE_LIMIT", "30/minute")   # per brokerage
+INBOUND_RULE = parse_rule(INBOUND_RATE_LIMIT)
+INBOUND_SCORING_MODE = os.getenv("INBOUND_SCORING_MODE", "ai")       # "ai" | "fast"
+STATIC_DIR = os.getenv("STATIC_DIR", "/home/ubuntu/leadrankerai/static")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -101,56 +115,18 @@ def custom_openapi():
     return schema
 
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
 app = FastAPI(
     title="LeadRankerAI SaaS",
     description="AI-powered lead scoring for real estate brokerages",
     version="1.0.0",
 )
-# ── GLOBAL RATE LIMITER (OUTERMOST LAYER) ──
-from collections import defaultdict
-import time
-from fastapi.responses import JSONResponse
-
-request_counts = defaultdict(list)
-RATE_LIMITS = {
-    "/leads/score": (20, 60),
-    "/api/v1/ranky/chat": (15, 60),
-    "/inbound/": (30, 60)
-}
-
-@app.middleware("http")
-async def ip_rate_limit_middleware(request: Request, call_next):
-    ip = request.client.host if request.client else "unknown"
-    path = request.url.path
-    now = time.time()
-    
-    # Clean up old keys to prevent memory leak
-    if len(request_counts) > 10000:
-        cutoff = now - 120
-        keys_to_delete = [k for k, v in request_counts.items() if not v or max(v) < cutoff]
-        for k in keys_to_delete:
-            del request_counts[k]
-    
-    for route, (limit, window) in RATE_LIMITS.items():
-        if path.startswith(route):
-            key = f"{ip}:{path}"
-            request_counts[key] = [t for t in request_counts[key] if now - t < window]
-            if len(request_counts[key]) >= limit:
-                logger.warning(f"Rate limit hit: {ip} on {path}")
-                return JSONResponse(status_code=429, content={"detail": f"Too many requests. Max {limit} per minute."})
-            request_counts[key].append(now)
-            break
-    return await call_next(request)
-
+# ── GLOBAL RATE LIMITER ──
+# Per-IP ceiling on every route; stricter per-route limits are route
+# dependencies (see backend/services/rate_limit.py). Redis-backed when
+# REDIS_URL is set, so limits hold across workers and nodes.
+app.middleware("http")(default_limit_middleware)
 
-# Rate limiting middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
-
-app.mount("/static", StaticFiles(directory="/home/ubuntu/leadrankerai/static"), name="static")
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 app.openapi = custom_openapi
 
 # ── CORS middleware — MUST be added before routers ─────────────────────────
@@ -171,6 +147,85 @@ app.include_router(billing_router)
 app.include_router(pixel_router)
 
 
+# ─────────────────────────────────────────────
+# OUTBOX DRAINER (HOT alerts etc.)
+# Runs inside each API worker unless OUTBOX_INPROCESS=0, in which case
+# run backend/run_outbox.py as its own process instead. Both can run at
+# once — jobs are claimed with SKIP LOCKED.
+# ─────────────────────────────────────────────
+OUTBOX_INPROCESS = os.getenv("OUTBOX_INPROCESS", "1") == "1"
+_outbox_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_outbox_drainer():
+    global _outbox_task
+    if OUTBOX_INPROCESS:
+        _outbox_task = asyncio.create_task(drain_forever(SessionLocal))
+
+
+@app.on_event("shutdown")
+async def stop_outbox_drainer():
+    if _outbox_task:
+        _outbox_task.cancel()
+
+
+# ─────────────────────────────────────────────
+# OUTBOUND HTTP — pooled per-host clients (Resend, OpenAI, Google),
+# opened once per worker and shared by every route and service, plus
+# the email sender task (flushed before the clients close)
+# ─────────────────────────────────────────────
+@app.on_event("startup")
+async def open_outbound_clients():
+    outbound.start()
+    mailer.start()
+
+
+@app.on_event("shutdown")
+async def close_outbound_clients():
+    await mailer.stop()
+    await outbound.close()
+
+
+# ─────────────────────────────────────────────
+# LOCAL MODEL TIER — load the XGBoost booster once per worker
+# ─────────────────────────────────────────────
+@app.on_event("startup")
+def load_lead_model():
+    model_tier.load_model()
+
+
+# ─────────────────────────────────────────────
+# GET /metrics — Prometheus scrape (per worker): scoring queue depth,
+# wait times and shed counts from services/scheduler.py
+# With METRICS_TOKEN set, scrapers send "Authorization: Bearer <token>".
+# Without it, only direct (un-proxied) requests from loopback / private
+# addresses are served. Everyone else gets a 404.
+# ─────────────────────────────────────────────
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+_PROXY_HEADERS = ("x-forwarded-for", "x-real-ip", "forwarded")
+
+
+def _metrics_allowed(request: Request) -> bool:
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        return hmac.compare_digest(auth.encode(), f"Bearer {METRICS_TOKEN}".encode())
+    if any(h in request.headers for h in _PROXY_HEADERS):
+        return False    # a local proxy would make public traffic look local
+    try:
+        ip = ipaddress.ip_address(request.client.host if request.client else "")
+    except ValueError:
+        return False
+    return ip.is_loopback or ip.is_private
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    if not _metrics_allowed(request):
+        raise HTTPException(404, "Not Found")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # ─────────────────────────────────────────────
 # MIDDLEWARE — body size limit
 # OPTIONS must always pass through untouched
@@ -181,6 +236,8 @@ async def limit_body_size(request: Request, call_next):
         return await call_next(request)
     if "/billing/webhook" in request.url.path:
         return await call_next(request)
+    if request.url.path == "/leads/import":
+        return await call_next(request)
     content_length = request.headers.get("content-length")
     if content_length and int(content_length) > 1_000_000:
         raise HTTPException(413, "Payload too large")
@@ -226,6 +283,22 @@ class LeadInput(BaseModel):
     source:   str = "manual"
     campaign: str | None = None
 
+class BatchLeadInput(BaseModel):
+    leads: list[LeadInput]
+
+class StructuredLeadInput(BaseModel):
+    budget:               float = 0
+    urgency:              int   = 90     # days until they want to move
+    views:                int   = 0
+    saves:                int   = 0
+    bedrooms:             int   = 0
+    preapproved:          bool  = False
+    open_house:           bool  = False
+    agent_response_hours: float = 72
+
+class StructuredBatchInput(BaseModel):
+    leads: list[StructuredLeadInput]
+
 class InviteInput(BaseModel):
     email: str
 
@@ -234,13 +307,7 @@ class InviteInput(BaseModel):
 # BILLING HELPER
 # ─────────────────────────────────────────────
 def get_billing_status(db: Session, brokerage_id: str) -> dict:
-    PLAN_LIMITS = {"trial": 50, "starter": 1000, "team": 5000}
-
-    usage = db.execute(text("""
-        SELECT COUNT(*) FROM lead_scores
-        WHERE brokerage_id = :id
-          AND created_at >= date_trunc('month', NOW())
-    """), {"id": brokerage_id}).scalar() or 0
+    usage = get_monthly_usage(db, brokerage_id)
 
     row   = db.execute(
         text("SELECT plan FROM brokerages WHERE id = :id"),
@@ -248,7 +315,7 @@ def get_billing_status(db: Session, brokerage_id: str) -> dict:
     ).fetchone()
 
     plan  = (row[0] or "trial").lower() if row else "trial"
-    limit = PLAN_LIMITS.get(plan, 50)
+    limit = plan_limit(plan)
 
     return {
         "plan":      plan,
@@ -260,69 +327,42 @@ def get_billing_status(db: Session, brokerage_id: str) -> dict:
     }
 
 
+def get_billing_and_industry(db: Session, brokerage_id: str) -> tuple[dict, str]:
+    """Billing status plus the brokerage's industry — the pre-scoring reads."""
+    billing = get_billing_status(db, brokerage_id)
+    row = db.execute(
+        text("SELECT industry FROM brokerages WHERE id = :i"),
+        {"i": brokerage_id}
+    ).fetchone()
+    return billing, row.industry if row else "real_estate"
+
+
 # ─────────────────────────────────────────────
 # CORE LEAD SAVE
 # ─────────────────────────────────────────────
 def save_lead(db, brokerage_id, user_email, payload, ai):
-    is_lead = ai.get("is_lead", False)
-    score   = int(ai.get("urgency_score", 0))
-
-    if not is_lead:
-        bucket, score = "IGNORE", 0
-    elif score >= 80:
-        bucket = "HOT"
-    elif score >= 50:
-        bucket = "WARM"
-    else:
-        bucket = "COLD"
-
-    lead = LeadScore(
-        id=str(uuid.uuid4()),
-        brokerage_id=brokerage_id,
-        user_email=user_email,
-        input_payload={**payload, "is_lead": is_lead},
-        urgency_score=score if is_lead else None,
-        sentiment=ai.get("sentiment"),
-        ai_recommendation=ai.get("recommendation"),
-        score=score,
-        bucket=bucket,
-        created_at=datetime.now(timezone.utc)
-    )
-    db.add(lead)
-    db.commit()
-
-    if bucket == "HOT":
-        owner = db.execute(text(
-            "SELECT email FROM users WHERE brokerage_id = :bid LIMIT 1"
-        ), {"bid": brokerage_id}).fetchone()
-        if owner:
-            send_hot_alert(to_email=owner.email, lead_data={**payload, "score": score})
-
+    lead          = build_lead(brokerage_id, user_email, payload, ai)
+    bucket, score = lead.bucket, lead.score
+    persist_leads(db, [lead])
     return lead, bucket, score
 
 
 # ─────────────────────────────────────────────
 # POST /leads/score
 # ─────────────────────────────────────────────
-@app.post("/leads/score")
-@limiter.limit("20/minute")
-def score_lead(
+@app.post("/leads/score", dependencies=[Depends(rate_limit("20/minute"))])
+async def score_lead(
     request: Request,
     lead: LeadInput,
     user=Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    billing = get_billing_status(db, user["brokerage_id"])
+    # DB work runs in worker threads; only the AI call awaits on the loop
+    billing, industry = await asyncio.to_thread(get_billing_and_industry, db, user["brokerage_id"])
     if billing["blocked"]:
         raise HTTPException(402, "Monthly quota exceeded. Please upgrade your plan.")
 
-    row = db.execute(
-        text("SELECT industry FROM brokerages WHERE id = :i"),
-        {"i": user["brokerage_id"]}
-    ).fetchone()
-    industry = row.industry if row else "real_estate"
-
-    ai = analyze_lead_message(lead.message, industry)
+    ai = await analyze_lead_message_async(lead.message, industry, user["brokerage_id"], billing["plan"])
 
     if not ai.get("is_lead", False):
         return {
@@ -330,7 +370,7 @@ def score_lead(
             "bucket":         "IGNORE",
             "sentiment":      ai.get("sentiment", "neutral"),
             "recommendation": ai.get("recommendation", ""),
-            "billing":        get_billing_status(db, user["brokerage_id"])
+            "billing":        billing,
         }
 
     payload = {
@@ -339,8 +379,8 @@ def score_lead(
         "campaign": lead.campaign, "entities": ai.get("entities", {})
     }
 
-    lead_obj, bucket, score = save_lead(
-        db, user["brokerage_id"], user["sub"], payload, ai
+    lead_obj, bucket, score = await asyncio.to_thread(
+        save_lead, db, user["brokerage_id"], user["sub"], payload, ai
     )
 
     return {
@@ -348,101 +388,241 @@ def score_lead(
         "bucket":         bucket,
         "sentiment":      ai["sentiment"],
         "recommendation": ai["recommendation"],
-        "billing":        get_billing_status(db, user["brokerage_id"])
+        "billing":        await asyncio.to_thread(get_billing_status, db, user["brokerage_id"])
     }
 
 
 # ─────────────────────────────────────────────
-# POST /inbound/email
+# POST /leads/score/batch
+# Bulk imports: one quota reservation for the whole batch, bounded-
+# concurrency AI scoring, one transaction for all inserts. DB work runs
+# in worker threads so it never blocks the event loop.
 # ─────────────────────────────────────────────
-async def fetch_full_email(email_id: str):
-    async with httpx.AsyncClient() as client:
-        res = await client.get(
-            f"https://api.resend.com/emails/receiving/{email_id}",
-            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-            timeout=10
+BATCH_MAX_LEADS   = int(os.getenv("BATCH_MAX_LEADS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+
+@app.post("/leads/score/batch", dependencies=[Depends(rate_limit("5/minute"))])
+async def score_leads_batch(
+    request: Request,
+    batch: BatchLeadInput,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    bid = user["brokerage_id"]
+    n   = len(batch.leads)
+    if n == 0:
+        raise HTTPException(400, "Batch is empty.")
+    if n > BATCH_MAX_LEADS:
+        raise HTTPException(413, f"Batch too large. Max {BATCH_MAX_LEADS} leads per request.")
+
+    billing, industry = await asyncio.to_thread(get_billing_and_industry, db, bid)
+
+    # One reservation for the whole batch — all or nothing, and atomic, so
+    # concurrent batches can't both fit in the same remaining quota
+    if not await asyncio.to_thread(reserve_usage, db, bid, n, billing["limit"]):
+        raise HTTPException(
+            402,
+            f"Batch of {n} leads exceeds your remaining quota ({billing['remaining']}). "
+            "Please upgrade your plan or send a smaller batch."
         )
-        if res.status_code != 200:
-            logger.error(f"Failed to fetch email: {res.text}")
-            return None
-        return res.json()
 
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _score(message: str) -> dict:
+        async with sem:
+            return await analyze_lead_message_async(message, industry, bid, billing["plan"])
 
-@app.post("/inbound/email")
-@limiter.limit("30/minute")
-async def inbound_email(request: Request, db: Session = Depends(get_db)):
     try:
-        payload    = await request.json()
-        data       = payload.get("data", {})
-        email_id   = data.get("email_id")
-        if not email_id:
-            return {"ok": True}
-
-        email_full = await fetch_full_email(email_id)
-        if not email_full:
-            return {"ok": True}
-
-        to_list    = email_full.get("to", [])
-        from_email = email_full.get("from", "")
-        subject    = email_full.get("subject", "")
-        text_msg   = email_full.get("text") or email_full.get("html") or ""
-
-        if not text_msg:
-            return {"ok": True}
-
-        to_email = to_list[0] if isinstance(to_list, list) else to_list
-        if "+" not in to_email:
-            return {"ok": True}
-
-        brokerage_id = to_email.split("+")[1].split("@")[0]
-
-        row = db.execute(
-            text("SELECT industry FROM brokerages WHERE id = :i"),
-            {"i": brokerage_id}
-        ).fetchone()
-        if not row:
-            return {"ok": True}
-
-        ai = analyze_lead_message(f"{subject}\n\n{text_msg}", row.industry)
-        save_lead(db, brokerage_id, from_email, {
-            "name": None, "email": from_email, "phone": None,
-            "message": f"{subject}\n\n{text_msg}",
-            "source": "email", "campaign": None
-        }, ai)
-
-        return {"status": "received"}
+        results = await asyncio.gather(*(_score(lead.message) for lead in batch.leads))
     except Exception:
-        logger.exception("Email ingest failed")
-        return {"ok": True}
+        await asyncio.to_thread(release_usage, db, bid, n)
+        raise
+
+    rows, items = [], []
+    for i, (lead, ai) in enumerate(zip(batch.leads, results)):
+        item = {
+            "index":          i,
+            "lead_id":        None,
+            "score":          0,
+            "bucket":         "IGNORE",
+            "sentiment":      ai.get("sentiment", "neutral"),
+            "recommendation": ai.get("recommendation", ""),
+        }
+        if ai.get("is_lead", False):
+            lead_obj = build_lead(bid, user["sub"], {
+                "name": lead.name, "email": lead.email, "phone": lead.phone,
+                "message": lead.message, "source": lead.source,
+                "campaign": lead.campaign, "entities": ai.get("entities", {})
+            }, ai)
+            rows.append(lead_obj)
+            item.update(lead_id=lead_obj.id, score=lead_obj.score, bucket=lead_obj.bucket)
+        items.append(item)
+
+    # Settles the reservation: ignored messages are given back
+    await asyncio.to_thread(persist_leads, db, rows, {bid: n})
+
+    return {
+        "scored":  len(rows),
+        "ignored": n - len(rows),
+        "results": items,
+        "billing": await asyncio.to_thread(get_billing_status, db, bid),
+    }
 
 
 # ─────────────────────────────────────────────
-# POST /inbound/{brokerage_id}
+# POST /leads/score/model
+# Structured leads (budget, urgency, views, ...) scored by the local
+# XGBoost model — no OpenAI call, the whole batch in one predict.
+# Results are returned, not saved.
 # ─────────────────────────────────────────────
-@app.post("/inbound/{brokerage_id}")
-@limiter.limit("30/minute")
-async def inbound_webhook(
+MODEL_BATCH_MAX_LEADS = int(os.getenv("MODEL_BATCH_MAX_LEADS", "5000"))
+
+@app.post("/leads/score/model", dependencies=[Depends(rate_limit("30/minute"))])
+def score_leads_model(data: StructuredBatchInput, user=Depends(get_current_user)):
+    if not model_tier.is_loaded():
+        raise HTTPException(503, "Model scoring is not available")
+    if len(data.leads) > MODEL_BATCH_MAX_LEADS:
+        raise HTTPException(413, f"Batch too large. Max {MODEL_BATCH_MAX_LEADS} leads per request.")
+
+    results = model_tier.score_leads([lead.model_dump() for lead in data.leads])
+    return {"model_version": model_tier.model_version(), "results": results}
+
+
+# ─────────────────────────────────────────────
+# POST /leads/import
+# NDJSON / CSV upload of any size (up to IMPORT_MAX_BYTES). The body is
+# spooled to a temp file first, then parsed as NDJSON events stream
+# back: one per row, a progress event per bulk insert, and a final
+# summary.
+# ─────────────────────────────────────────────
+@app.post("/leads/import", dependencies=[Depends(rate_limit("2/minute"))])
+async def import_leads_stream(
     request: Request,
-    brokerage_id: str,
-    lead: LeadInput,
+    format: str | None = None,
+    user=Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    row = db.execute(
-        text("SELECT industry FROM brokerages WHERE id = :i"),
+    bid = user["brokerage_id"]
+
+    fmt = (format or "").lower()
+    if not fmt:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(400, "format must be 'csv' or 'ndjson'")
+
+    billing, industry = await asyncio.to_thread(get_billing_and_industry, db, bid)
+    if billing["blocked"]:
+        raise HTTPException(402, "Monthly quota exceeded. Please upgrade your plan.")
+
+    # Read the whole body before the response starts — see lead_import.py
+    try:
+        body = await spool_body(request.stream())
+    except ImportTooLarge as e:
+        raise HTTPException(413, str(e))
+
+    parse = iter_csv_rows if fmt == "csv" else iter_ndjson_rows
+
+    async def events():
+        # Own session: the import outlives the request-scoped one
+        import_db = SessionLocal()
+        try:
+            async for event in import_leads(
+                parse(iter_file(body)),
+                db=import_db,
+                brokerage_id=bid,
+                user_email=user["sub"],
+                industry=industry,
+                plan=billing["plan"],
+                quota_limit=billing["limit"],
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception:
+            logger.exception("Lead import failed")
+            yield json.dumps({"type": "done", "stopped": "internal_error"}) + "\n"
+        finally:
+            import_db.close()
+            body.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# ─────────────────────────────────────────────
+# POST /inbound/email — Resend inbound webhook
+# Records the email_id in the outbox and acks; the outbox worker fetches,
+# scores and saves it (services/inbound_email.py). A failure to record
+# is a 500 so Resend retries; duplicates of a recorded id are no-ops.
+# ─────────────────────────────────────────────
+@app.post("/inbound/email", dependencies=[Depends(rate_limit("30/minute"))])
+async def inbound_email(request: Request, db: Session = Depends(get_db)):
+    try:
+        payload  = await request.json()
+        email_id = (payload.get("data") or {}).get("email_id")
+    except (ValueError, AttributeError):
+        return {"ok": True}
+    if not email_id:
+        return {"ok": True}
+
+    await asyncio.to_thread(record_inbound_email, db, email_id)
+    return {"status": "accepted"}
+
+
+def record_inbound_email(db: Session, email_id: str) -> None:
+    enqueue_inbound_email(db, email_id)
+    db.commit()
+
+
+# ─────────────────────────────────────────────
+# POST /inbound/{brokerage_id}
+# DB work runs in worker threads so the ack never waits behind a commit
+# mode=ai   — wait for the AI score (default, INBOUND_SCORING_MODE)
+# mode=fast — rules-only score, saved and acked immediately; the outbox
+#             worker fetches the AI score later, re-buckets the lead
+#             and sends the HOT alert if it ends up HOT
+# ─────────────────────────────────────────────
+def get_inbound_brokerage(db: Session, brokerage_id: str):
+    return db.execute(
+        text("SELECT industry, plan FROM brokerages WHERE id = :i"),
         {"i": brokerage_id}
     ).fetchone()
+
+
+async def inbound_brokerage(request: Request, brokerage_id: str, db: Session = Depends(get_db)):
+    """
+    The brokerage row for the path id, rate-limited per brokerage. Ids
+    that don't exist count against the client IP, so guessing ids buys
+    no extra requests.
+    """
+    row = await asyncio.to_thread(get_inbound_brokerage, db, brokerage_id)
+    await enforce("/inbound/{brokerage_id}", brokerage_or_ip(request, brokerage_id if row else None), INBOUND_RULE)
     if not row:
         raise HTTPException(404, "Brokerage not found")
+    return row
 
-    ai      = analyze_lead_message(lead.message, row.industry)
+
+@app.post("/inbound/{brokerage_id}")
+async def inbound_webhook(
+    request: Request,
+    brokerage_id: str,
+    lead: LeadInput,
+    mode: Literal["ai", "fast"] = INBOUND_SCORING_MODE,
+    row=Depends(inbound_brokerage),
+    db: Session = Depends(get_db)
+):
+    if mode == "fast":
+        ai = analyze_lead_rules_only(lead.message, row.industry)
+    else:
+        ai = await analyze_lead_message_async(lead.message, row.industry, brokerage_id, row.plan)
     payload = {
         "name": lead.name, "email": lead.email, "phone": lead.phone,
         "message": lead.message, "source": lead.source,
         "campaign": lead.campaign, "entities": ai.get("entities", {})
     }
-    _, bucket, score = save_lead(
-        db, brokerage_id, lead.email or "unknown", payload, ai
+    lead_obj, bucket, score = await asyncio.to_thread(
+        save_lead, db, brokerage_id, lead.email or "unknown", payload, ai
     )
+    if ai.get("prompt_version") == RULES_ONLY_VERSION:
+        return {"status": "accepted", "lead_id": lead_obj.id, "bucket": bucket,
+                "score": score, "final": False}
     return {"status": "received", "bucket": bucket, "score": score}
 
 
@@ -451,16 +631,12 @@ async def inbound_webhook(
 # ─────────────────────────────────────────────
 @app.get("/leads/history")
 def leads_history(
-    limit: int = 50, offset: int = 0,
+    filters: HistoryFilters = Depends(),
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    rows = (
-        db.query(LeadScore)
-        .filter(LeadScore.brokerage_id == user["brokerage_id"])
-        .order_by(LeadScore.created_at.desc())
-        .limit(limit).offset(offset).all()
-    )
+    page = lead_history_page(db, user["brokerage_id"], filters)
+    rows = page.rows
     return {"data": [{
         "id":             r.id,
         "name":           r.input_payload.get("name"),
@@ -474,26 +650,17 @@ def leads_history(
         "sentiment":      r.sentiment,
         "created_at":     r.created_at.isoformat(),
         "recommendation": r.ai_recommendation
-    } for r in rows]}
+    } for r in rows],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
 
 
 # ─────────────────────────────────────────────
 # GET /leads/stats
 # ─────────────────────────────────────────────
-@app.get("/leads/stats")
-def leads_stats(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    bid = user["brokerage_id"]
-    def c(q): return q.scalar() or 0
-    return {
-        "total": c(db.query(func.count(LeadScore.id)).filter(
-            LeadScore.brokerage_id == bid)),
-        "hot":   c(db.query(func.count(LeadScore.id)).filter(
-            LeadScore.brokerage_id == bid, LeadScore.bucket == "HOT")),
-        "warm":  c(db.query(func.count(LeadScore.id)).filter(
-            LeadScore.brokerage_id == bid, LeadScore.bucket == "WARM")),
-        "cold":  c(db.query(func.count(LeadScore.id)).filter(
-            LeadScore.brokerage_id == bid, LeadScore.bucket == "COLD")),
-    }
+# Same as /api/v1/leads/stats — one grouped read of lead_daily_rollups.
+app.get("/leads/stats")(get_leads_stats)
 
 
 # ─────────────────────────────────────────────
@@ -520,22 +687,12 @@ def get_connections(user=Depends(get_current_user), db: Session = Depends(get_db
 @app.post("/api/v1/invite-partner")
 async def invite_partner(data: InviteInput, user=Depends(get_current_user)):
     bid = user.get("brokerage_id")
-    try:
-        import resend
-        resend.Emails.send({
-            "from":    "LeadRanker <onboarding@leadrankerai.com>",
-            "to":      [data.email],
-            "subject": "Invitation to Connect: LeadRanker Tech Partnership",
-            "html":    f"""
-                <h3>Hello Developer,</h3>
-                <p>Webhook URL: https://api.leadrankerai.com/inbound/{bid}</p>
-                <p>Docs: <a href="https://api.leadrankerai.com/docs">API Docs</a></p>
-            """
-        })
-        return {"status": "success"}
-    except Exception as e:
-        logger.error(f"Resend error: {e}")
-        raise HTTPException(500, "Failed to send invite email")
+    mailer.send(
+        "partner_invite", data.email,
+        webhook_url=f"https://api.leadrankerai.com/inbound/{bid}",
+        docs_url="https://api.leadrankerai.com/docs",
+    )
+    return {"status": "success"}
 
 
 # ─────────────────────────────────────────────
@@ -580,8 +737,7 @@ class ErrorReport(BaseModel):
     message: str
     user_email: str = None
 
-@app.post("/api/v1/report-error")
-@limiter.limit("10/minute")
+@app.post("/api/v1/report-error", dependencies=[Depends(rate_limit("10/minute"))])
 async def report_error(request: Request):
     try:
         body = await request.json()
@@ -589,33 +745,8 @@ async def report_error(request: Request):
     except Exception as e:
         logger.error(f"report-error parse failed: {e}")
         return {"ok": True}
-    import datetime
-    timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
-                json={
-                    "from": "LeadRankerAI Alerts <notifications@leadrankerai.com>",
-                    "to": ["nandprsd62@gmail.com"],
-                    "subject": f"🚨 {report.error_type} — {report.page}",
-                    "html": f"""<div style='font-family:sans-serif;padding:24px;max-width:600px'>
-                        <h2 style='color:#dc2626'>🚨 User Error Report</h2>
-                        <p><b>User:</b> {report.user_email or 'Not logged in'}</p>
-                        <p><b>Error Type:</b> <span style='color:#dc2626'>{report.error_type}</span></p>
-                        <p><b>Page:</b> {report.page}</p>
-                        <p><b>Action:</b> {report.action}</p>
-                        <p><b>Message:</b> {report.message}</p>
-                        <p><b>Time:</b> {timestamp}</p>
-                        <hr/>
-                        <p style='color:#64748b;font-size:13px'>Reply to user: <a href='mailto:{report.user_email}'>{report.user_email or 'unknown'}</a></p>
-                    </div>"""
-                },
-                timeout=10
-            )
-    except Exception as e:
-        logger.error(f"Error report email failed: {e}")
+    timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    mailer.send("error_report", mailer.FOUNDER_EMAIL, report=report, timestamp=timestamp)
     return {"ok": True}
 
 # ─────────────────────────────────────────────
@@ -626,10 +757,8 @@ class RankyMessage(BaseModel):
     language: str = "english"
     history: list = []
 
-@app.post("/api/v1/ranky/chat")
-@limiter.limit("15/minute")
+@app.post("/api/v1/ranky/chat", dependencies=[Depends(rate_limit("15/minute"))])
 async def ranky_chat(request: Request, payload: RankyMessage, user=Depends(get_current_user)):
-    import httpx
     RANKY_BASE = """You are Ranky, the friendly AI assistant built into LeadRankerAI.
 LeadRankerAI is a lead scoring tool that scores inbound leads as HOT, WARM, or COLD in under 3 seconds.
 You help users with: lead scoring, connecting integrations (WordPress, Meta Ads, Google Ads), billing, dashboard features, API keys, and troubleshooting.
@@ -652,16 +781,15 @@ If asked about pricing: Starter is 19 USD/month for 1000 leads. Team is 49 USD/m
         messages.append(h)
     messages.append({"role": "user", "content": payload.message})
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
-                json={"model": "gpt-4o-mini", "messages": messages, "max_tokens": 300, "temperature": 0.7},
-                timeout=30
-            )
-            data = res.json()
-            reply = data["choices"][0]["message"]["content"]
-            return {"reply": reply}
+        client = outbound.async_client("openai")
+        res = await client.post(
+            "/v1/chat/completions",
+            headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
+            json={"model": "gpt-4o-mini", "messages": messages, "max_tokens": 300, "temperature": 0.7},
+        )
+        data = res.json()
+        reply = data["choices"][0]["message"]["content"]
+        return {"reply": reply}
     except Exception as e:
         logger.error(f"Ranky error: {e}")
         raise HTTPException(status_code=500, detail="Ranky is unavailable right now")
@@ -1,6 +1,6 @@
 
 
-from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Boolean
+from sqlalchemy import Column, String, ForeignKey, Integer, BigInteger, DateTime, Boolean, Date, Text, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.dialects.postgresql import JSON
 from datetime import datetime
@@ -24,7 +24,7 @@ class Brokerage(Base):
 
     # Industry + Plugin
     industry               = Column(String, default="real_estate")
-    api_key                = Column(String, nullable=True)
+    api_key                = Column(String, nullable=True, unique=True, index=True)
     updated_at             = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     users = relationship("User", back_populates="brokerage")
@@ -60,7 +60,83 @@ class LeadScore(Base):
     urgency_score     = Column(Integer)
     sentiment         = Column(String)
     ai_recommendation = Column(String)
+    prompt_version    = Column(String, nullable=True)
 
     score             = Column(Integer, nullable=False)
     bucket            = Column(String, nullable=False)
-    created_at        = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    created_at        = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # History pages (newest first, optionally one bucket) and per-bucket
+    # stats, always per brokerage
+    __table_args__ = (
+        Index("ix_lead_scores_brokerage_created", brokerage_id, created_at.desc()),
+        Index("ix_lead_scores_brokerage_bucket_created", brokerage_id, bucket, created_at.desc()),
+    )
+
+
+class BrokerageUsage(Base):
+    """Leads saved per brokerage per calendar month (UTC) — the quota counter."""
+    __tablename__ = "brokerage_monthly_usage"
+
+    brokerage_id      = Column(String, primary_key=True)
+    period            = Column(Date, primary_key=True)   # first day of the month
+    lead_count        = Column(Integer, nullable=False, default=0)
+    updated_at        = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OutboxJob(Base):
+    """Side effects queued in the same transaction as the rows they concern."""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        UniqueConstraint("kind", "dedupe_key", name="uq_outbox_kind_dedupe_key"),
+        Index("ix_outbox_due", "status", "next_attempt_at"),
+    )
+
+    id                = Column(String, primary_key=True)
+    kind              = Column(String, nullable=False)        # e.g. "hot_alert"
+    dedupe_key        = Column(String, nullable=False)        # e.g. lead id
+    payload           = Column(JSON, nullable=False)
+    status            = Column(String, nullable=False, default="pending")   # pending | done | dead
+    attempts          = Column(Integer, nullable=False, default=0)
+    next_attempt_at   = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error        = Column(Text, nullable=True)
+    created_at        = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at      = Column(DateTime, nullable=True)
+
+
+class LeadDailyRollup(Base):
+    """Leads saved per brokerage per UTC day, by bucket, source and campaign."""
+    __tablename__ = "lead_daily_rollups"
+
+    brokerage_id      = Column(String, primary_key=True)
+    day               = Column(Date, primary_key=True)
+    bucket            = Column(String, primary_key=True)
+    source            = Column(String, primary_key=True, default="")   # "" when missing
+    campaign          = Column(String, primary_key=True, default="")
+    lead_count        = Column(Integer, nullable=False, default=0)
+
+
+class Mailbox(Base):
+    """IMAP mailboxes ingested by backend/run_email.py, with their UID high-water marks."""
+    __tablename__ = "mailboxes"
+
+    id                = Column(String, primary_key=True)
+    host              = Column(String, nullable=False, default="imap.gmail.com")
+    username          = Column(String, nullable=False, unique=True)
+    password_env      = Column(String, nullable=False)          # env var holding the app password
+    brokerage_id      = Column(String, ForeignKey("brokerages.id"), nullable=True)   # NULL = shared, routed by plus-address
+    uid_validity      = Column(BigInteger, nullable=True)
+    last_uid          = Column(BigInteger, nullable=False, default=0)
+    enabled           = Column(Boolean, nullable=False, default=True)
+    created_at        = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at        = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class InboundEmail(Base):
+    """Resend inbound emails already turned into leads, so a re-run never saves one twice."""
+    __tablename__ = "inbound_emails"
+
+    email_id          = Column(String, primary_key=True)        # Resend email id
+    brokerage_id      = Column(String, nullable=False)
+    lead_id           = Column(String, nullable=False)
+    created_at        = Column(DateTime, default=datetime.utcnow, nullable=False)
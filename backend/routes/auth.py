@@ -1,6 +1,7 @@
 import os
 import uuid
 import time
+import hashlib
 import secrets
 import logging
 from datetime import datetime, timedelta
@@ -12,12 +13,15 @@ from sqlalchemy import text
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from pydantic import BaseModel
-import httpx
 from urllib.parse import urlencode
 
 from backend.db import get_db, set_tenant
 from backend.models import User
 from backend.services.email_verify import send_verify_email, send_password_reset_email
+from backend.services.usage import forget_brokerage
+from backend.services import mailer, outbound
+from backend.services.cache import TTLCache
+from backend.routes.pixel_route import invalidate_brokerage_keys
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
@@ -25,7 +29,6 @@ router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 SECRET_KEY     = os.getenv("JWT_SECRET", os.getenv("JWT_SECRET_KEY", "change-me"))
 ALGORITHM      = "HS256"
 FRONTEND_URL   = os.getenv("FRONTEND_URL", "http://localhost:5173")
-RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 
 GOOGLE_CLIENT_ID     = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -33,6 +36,13 @@ GOOGLE_REDIRECT_URI  = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/a
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified principals keyed by sha256(token), so repeat requests skip
+# the JWT decode and the users lookup. Keep the TTL short: it bounds how
+# long another worker can keep serving a principal after a change. An
+# entry never outlives its token's `exp`, and hits re-check it.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+_principal_cache    = TTLCache(maxsize=10000, ttl=PRINCIPAL_CACHE_TTL)
+
 
 # ─────────────────────────────────────────────
 # SCHEMAS
@@ -100,7 +110,17 @@ def get_current_user(
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    token = authorization.split(" ")[1]
+    token     = authorization.split(" ")[1]
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+
+    principal = _principal_cache.get(cache_key)
+    if principal is not None:
+        if principal["exp"] is not None and principal["exp"] <= time.time():
+            _principal_cache.pop(cache_key)
+            raise HTTPException(status_code=401, detail="Session expired or invalid")
+        set_tenant(db, principal["brokerage_id"])   # lazy — no query yet
+        return dict(principal)
+
     try:
         payload      = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email        = payload.get("sub")
@@ -110,84 +130,51 @@ def get_current_user(
             raise HTTPException(status_code=401, detail="Invalid token")
 
         if brokerage_id:
-            try: set_tenant(db, brokerage_id)
-            except Exception: pass
+            set_tenant(db, brokerage_id)
 
         user = db.query(User).filter(User.email == email).first()
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
-        return {
+        principal = {
             "authenticated": True,
             "user_id":       str(user.id),
             "brokerage_id":  str(user.brokerage_id),
             "email":         user.email,
             "sub":           user.email,
+            "exp":           payload.get("exp"),
         }
     except JWTError:
         raise HTTPException(status_code=401, detail="Session expired or invalid")
 
+    ttl = PRINCIPAL_CACHE_TTL
+    if principal["exp"] is not None:
+        ttl = min(ttl, principal["exp"] - time.time())
+    if ttl > 0:
+        _principal_cache.set(cache_key, principal, ttl=ttl)
+    if principal["brokerage_id"] != brokerage_id:
+        set_tenant(db, principal["brokerage_id"])
+    return dict(principal)
+
+
+def invalidate_principals(email: str | None = None, brokerage_id: str | None = None) -> None:
+    """
+    Drop cached principals for a user (password change) or a whole
+    brokerage (account deletion, users moved to another brokerage).
+    Other workers expire theirs within PRINCIPAL_CACHE_TTL.
+    """
+    email = email.lower() if email else None
+    _principal_cache.invalidate_where(
+        lambda _, p: (email is not None and p["email"].lower() == email)
+                  or (brokerage_id is not None and p["brokerage_id"] == brokerage_id)
+    )
+
 
 # ─────────────────────────────────────────────
 # WELCOME EMAIL
 # ─────────────────────────────────────────────
-async def send_welcome_email(email: str, name: str):
-    if not RESEND_API_KEY:
-        logger.warning("RESEND_API_KEY not set — skipping welcome email")
-        return
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-                json={
-                    "from": "LeadRankerAI <onboarding@leadrankerai.com>",
-                    "to": [email],
-                    "subject": "Welcome to LeadRankerAI 🎉",
-                    "html": f"""
-                    <div style="font-family:'Segoe UI',sans-serif;max-width:600px;margin:auto;
-                                padding:40px 24px;color:#334155">
-                      <h1 style="color:#2563eb;margin:0 0 8px">Welcome to LeadRankerAI!</h1>
-                      <p style="font-size:16px;color:#64748b">Hi {name},</p>
-                      <p style="font-size:15px;line-height:1.7">
-                        You're now set up with a <strong>Free Trial</strong> — 50 AI lead scores
-                        to get you started.
-                      </p>
-                      <div style="background:#f8fafc;border-radius:12px;padding:20px;margin:24px 0">
-                        <p style="margin:0 0 8px;font-weight:700;color:#1e293b">🚀 Quick Start:</p>
-                        <ul style="color:#475569;line-height:2;margin:0;padding-left:20px">
-                          <li>Go to <strong>Connections</strong> to get your API key</li>
-                          <li>Paste a lead message to get an instant AI score</li>
-                          <li>Set up email forwarding to auto-score inbound leads</li>
-                        </ul>
-                      </div>
-                      <div style="background:#eff6ff;border-left:4px solid #2563eb;
-                                  padding:16px;border-radius:8px;margin-bottom:24px">
-                        <p style="margin:0;color:#1e40af;font-size:14px">
-                          🎁 <strong>Free Trial:</strong> 50 leads/month.
-                          Upgrade to Starter ($19/mo) for 1,000 leads.
-                        </p>
-                      </div>
-                      <a href="{FRONTEND_URL}/dashboard"
-                         style="display:inline-block;background:#2563eb;color:#fff;
-                                padding:14px 32px;border-radius:10px;text-decoration:none;
-                                font-weight:bold;font-size:15px">
-                        Go to Dashboard →
-                      </a>
-                      <p style="color:#94a3b8;font-size:12px;margin-top:40px;
-                                border-top:1px solid #f1f5f9;padding-top:20px">
-                        LeadRankerAI ·
-                        <a href="{FRONTEND_URL}/privacy" style="color:#94a3b8">Privacy</a> ·
-                        <a href="{FRONTEND_URL}/terms" style="color:#94a3b8">Terms</a>
-                      </p>
-                    </div>
-                    """
-                },
-                timeout=10
-            )
-        logger.info(f"Welcome email sent to {email}")
-    except Exception as e:
-        logger.warning(f"Welcome email failed (non-fatal): {e}")
+def send_welcome_email(email: str, name: str):
+    mailer.send("welcome", email, name=name, frontend_url=FRONTEND_URL)
 
 
 # ─────────────────────────────────────────────
@@ -232,7 +219,7 @@ async def register(data: RegisterInput, db: Session = Depends(get_db)):
         logger.warning(f"Verification email failed: {ex}")
 
     db.commit()
-    await send_welcome_email(email, data.brokerage_name)
+    send_welcome_email(email, data.brokerage_name)
 
     return {
         "status": "verification_sent",
@@ -296,6 +283,7 @@ def get_me(user=Depends(get_current_user), db: Session = Depends(get_db)):
             {"ak": api_key, "bid": user["brokerage_id"]}
         )
         db.commit()
+        invalidate_brokerage_keys(user["brokerage_id"])
         logger.info(f"Auto-generated api_key for brokerage {user['brokerage_id']}")
 
     return {
@@ -365,6 +353,8 @@ def update_me(
         )
 
     db.commit()
+    if "industry" in updates:
+        invalidate_brokerage_keys(user["brokerage_id"])
     return {"status": "updated"}
 
 
@@ -407,6 +397,7 @@ def change_password(
         {"p": hash_password(data.new_password), "e": user["email"]}
     )
     db.commit()
+    invalidate_principals(email=user["email"])
     return {"message": "Password updated successfully"}
 
 
@@ -507,6 +498,7 @@ def reset_password(data: ResetPasswordInput, db: Session = Depends(get_db)):
     )
     db.execute(text("DELETE FROM password_resets WHERE token = :t"), {"t": data.token})
     db.commit()
+    invalidate_principals(email=row.email)
     return {"message": "Password updated successfully"}
 
 
@@ -518,12 +510,20 @@ def delete_account(user=Depends(get_current_user), db: Session = Depends(get_db)
     bid   = user["brokerage_id"]
     email = user["email"]
     db.execute(text("DELETE FROM lead_scores         WHERE brokerage_id = :b"), {"b": bid})
+    db.execute(text("DELETE FROM brokerage_monthly_usage WHERE brokerage_id = :b"), {"b": bid})
+    db.execute(text("DELETE FROM outbox              WHERE payload->>'brokerage_id' = :b"), {"b": bid})
+    db.execute(text("DELETE FROM lead_daily_rollups  WHERE brokerage_id = :b"), {"b": bid})
+    db.execute(text("DELETE FROM mailboxes           WHERE brokerage_id = :b"), {"b": bid})
+    db.execute(text("DELETE FROM inbound_emails      WHERE brokerage_id = :b"), {"b": bid})
     db.execute(text("DELETE FROM referrals           WHERE referrer_brokerage_id = :b OR referee_brokerage_id = :b"), {"b": bid})
     db.execute(text("DELETE FROM email_verifications WHERE LOWER(email) = LOWER(:e)"), {"e": email})
     db.execute(text("DELETE FROM password_resets     WHERE LOWER(email) = LOWER(:e)"), {"e": email})
     db.execute(text("DELETE FROM users               WHERE brokerage_id = :b"), {"b": bid})
     db.execute(text("DELETE FROM brokerages          WHERE id = :b"), {"b": bid})
     db.commit()
+    forget_brokerage(bid)
+    invalidate_brokerage_keys(bid)
+    invalidate_principals(brokerage_id=bid)
     return {"status": "deleted"}
 
 
@@ -551,18 +551,18 @@ def google_login():
 # ─────────────────────────────────────────────
 @router.get("/google/callback")
 async def google_callback(code: str, db: Session = Depends(get_db)):
-    async with httpx.AsyncClient() as client:
-        token_res = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "code":          code,
-                "client_id":     GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "redirect_uri":  GOOGLE_REDIRECT_URI,
-                "grant_type":    "authorization_code"
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    client = outbound.async_client("google")
+    token_res = await client.post(
+        "/token",
+        data={
+            "code":          code,
+            "client_id":     GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "redirect_uri":  GOOGLE_REDIRECT_URI,
+            "grant_type":    "authorization_code"
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
 
     token_data   = token_res.json()
     access_token = token_data.get("access_token")
@@ -570,11 +570,10 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
         logger.error(f"Google token exchange failed: {token_data}")
         raise HTTPException(status_code=400, detail="Google authentication failed")
 
-    async with httpx.AsyncClient() as client:
-        user_res = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+    user_res = await client.get(
+        "https://www.googleapis.com/oauth2/v2/userinfo",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
 
     user_data = user_res.json()
     email     = user_data.get("email")
@@ -598,6 +597,7 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
                 {"ak": generate_api_key(), "bid": brokerage_id}
             )
             db.commit()
+            invalidate_brokerage_keys(brokerage_id)
     else:
         brokerage_id = str(uuid.uuid4())
         user_id      = str(uuid.uuid4())
@@ -623,7 +623,7 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
                "t": str(uuid.uuid4()), "x": datetime.utcnow() + timedelta(days=3650)})
 
         db.commit()
-        await send_welcome_email(email, display_name)
+        send_welcome_email(email, display_name)
 
     jwt_token = create_jwt(brokerage_id, email)
     return RedirectResponse(url=f"{FRONTEND_URL}/oauth-success?token={jwt_token}")
\ No newline at end of file
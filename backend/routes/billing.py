@@ -6,13 +6,16 @@ import os
 import hmac
 import hashlib
 import logging
-import httpx
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
 from pydantic import BaseModel, validator
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from backend.db import get_db
+from backend.services import mailer
 from backend.routes.auth import get_current_user
+from backend.services.usage import PLAN_LIMITS, get_monthly_usage
+from backend.routes.pixel_route import invalidate_brokerage_keys
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/billing", tags=["billing"])
@@ -23,7 +26,6 @@ router = APIRouter(prefix="/api/v1/billing", tags=["billing"])
 LEMONSQUEEZY_API_KEY      = os.getenv("LEMONSQUEEZY_API_KEY", "")
 LEMONSQUEEZY_WEBHOOK_SECRET = os.getenv("LEMONSQUEEZY_WEBHOOK_SECRET", "")
 FRONTEND_URL              = os.getenv("FRONTEND_URL", "https://app.leadrankerai.com")
-RESEND_API_KEY            = os.getenv("RESEND_API_KEY", "")
 
 REFERRAL_CREDIT_USD   = 5
 REFERRAL_QUALIFY_DAYS = 30
@@ -45,8 +47,6 @@ PLANS = {
     },
 }
 
-PLAN_LIMITS = {"trial": 50, "starter": 1000, "team": 5000, "free": 50}
-
 # ─────────────────────────────────────────────
 # Pydantic Models
 # ─────────────────────────────────────────────
@@ -91,6 +91,7 @@ def db_update_plan(db, brokerage_id: str, plan: str, ls_customer_id: str = None,
                 WHERE id = :bid
             """), {"plan": plan, "bid": brokerage_id})
         db.commit()
+        invalidate_brokerage_keys(brokerage_id)
         return result.rowcount
     except Exception as e:
         logger.error(f"db_update_plan error: {e}")
@@ -118,57 +119,12 @@ def mark_webhook_processed(db, event_id: str, event_type: str):
 # ─────────────────────────────────────────────
 # Email Helpers
 # ─────────────────────────────────────────────
-async def send_referee_joined_notification(referrer_email: str, referee_email: str):
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
-                json={
-                    "from": "LeadRankerAI <notifications@leadrankerai.com>",
-                    "to": [referrer_email],
-                    "subject": "Your referral just upgraded! 🎉",
-                    "html": f"""<div style='font-family:sans-serif;padding:24px'>
-                        <h2>Great news!</h2>
-                        <p>{referee_email} just upgraded to a paid plan.</p>
-                        <p>Your $5 referral credit will be applied to your next invoice.</p>
-                        <p>Keep sharing LeadRankerAI to earn more credits!</p>
-                    </div>"""
-                },
-                timeout=10
-            )
-    except Exception as e:
-        logger.error(f"send_referee_joined_notification: {e}")
+def send_referee_joined_notification(referrer_email: str, referee_email: str):
+    mailer.send("referral_joined", referrer_email, referee_email=referee_email)
 
-async def send_upgrade_confirmation(email: str, plan: str):
-    plan_info = PLANS.get(plan, {})
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
-                json={
-                    "from": "LeadRankerAI <notifications@leadrankerai.com>",
-                    "to": [email],
-                    "subject": f"You're on the {plan.title()} plan! 🚀",
-                    "html": f"""<div style='font-family:sans-serif;padding:24px;max-width:600px'>
-                        <h2 style='color:#0ea5e9'>Welcome to {plan.title()}!</h2>
-                        <p>Your plan is now active. Here's what you get:</p>
-                        <ul>
-                            <li>{plan_info.get('limit', 0):,} leads/month</li>
-                            <li>AI lead scoring (HOT/WARM/COLD)</li>
-                            <li>WordPress plugin</li>
-                            <li>Magic email inbound</li>
-                            <li>Full dashboard access</li>
-                        </ul>
-                        <p><a href='https://app.leadrankerai.com' style='background:#0ea5e9;color:white;padding:12px 24px;border-radius:8px;text-decoration:none'>Go to Dashboard →</a></p>
-                        <p style='color:#64748b;font-size:12px'>Questions? Reply to this email or contact founder@leadrankerai.com</p>
-                    </div>"""
-                },
-                timeout=10
-            )
-    except Exception as e:
-        logger.error(f"send_upgrade_confirmation: {e}")
+def send_upgrade_confirmation(email: str, plan: str):
+    limit = PLANS.get(plan, {}).get("limit", 0)
+    mailer.send("upgrade_confirmation", email, plan=plan, limit=limit)
 
 # ─────────────────────────────────────────────
 # POST /checkout — Returns Lemon Squeezy URL
@@ -274,29 +230,14 @@ async def lemonsqueezy_webhook(
 
             # Send confirmation to buyer
             if customer_email:
-                await send_upgrade_confirmation(customer_email, plan)
+                send_upgrade_confirmation(customer_email, plan)
             
             # Notify founder of new purchase
-            import httpx as _httpx, datetime as _dt
-            try:
-                async with _httpx.AsyncClient() as _client:
-                    await _client.post(
-                        "https://api.resend.com/emails",
-                        headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
-                        json={
-                            "from": "LeadRankerAI Alerts <notifications@leadrankerai.com>",
-                            "to": ["nandprsd62@gmail.com"],
-                            "html": f"""<div style='font-family:sans-serif;padding:24px'>
-                                <p><b>Email:</b> {customer_email}</p>
-                                <p><b>Plan:</b> {plan.title()}</p>
-                                <p><b>Brokerage ID:</b> {brokerage_id}</p>
-                                <p><b>Time:</b> {_dt.datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}</p>
-                            </div>"""
-                        },
-                        timeout=10
-                    )
-            except Exception as _e:
-                logger.error(f"Founder notification failed: {_e}")
+            mailer.send(
+                "purchase_notice", mailer.FOUNDER_EMAIL,
+                customer_email=customer_email, plan=plan, brokerage_id=brokerage_id,
+                timestamp=datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
+            )
 
             # Check referral
             if customer_email:
@@ -316,7 +257,7 @@ async def lemonsqueezy_webhook(
                     """), {"rbid": brokerage_id, "id": referral[0]})
                     db.commit()
                     if referral[1]:
-                        await send_referee_joined_notification(referral[1], customer_email)
+                        send_referee_joined_notification(referral[1], customer_email)
 
     elif event_name == "subscription_cancelled":
         if brokerage_id:
@@ -339,6 +280,7 @@ async def lemonsqueezy_webhook(
                 WHERE id = :bid
             """), {"bid": brokerage_id})
             db.commit()
+            invalidate_brokerage_keys(brokerage_id)
             logger.info(f"Subscription expired | brokerage={brokerage_id}")
 
     elif event_name == "subscription_payment_failed":
@@ -382,11 +324,7 @@ async def billing_status(
     if not plan or plan not in PLAN_LIMITS:
         plan = "trial"
 
-    used = db.execute(text("""
-        SELECT COUNT(*) FROM lead_scores
-        WHERE brokerage_id = :bid
-        AND created_at >= date_trunc('month', NOW())
-    """), {"bid": str(bid)}).scalar() or 0
+    used = get_monthly_usage(db, str(bid))
 
     limit           = PLAN_LIMITS.get(plan, 50)
     percent_used    = round((used / limit) * 100) if limit else 0
@@ -492,29 +430,7 @@ async def submit_referral(
     db.commit()
 
     # Send invite email
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Content-Type": "application/json"},
-                json={
-                    "from": "LeadRankerAI <notifications@leadrankerai.com>",
-                    "to": [referee_email],
-                    "subject": f"{referrer_email} invited you to LeadRankerAI",
-                    "html": f"""<div style='font-family:sans-serif;padding:24px;max-width:600px'>
-                        <h2>You've been invited to LeadRankerAI</h2>
-                        <p>{referrer_email} thinks you'd benefit from AI lead scoring.</p>
-                        <p>Get 50 free leads/month — no credit card needed.</p>
-                        <a href='https://app.leadrankerai.com/register' 
-                           style='background:#0ea5e9;color:white;padding:12px 24px;border-radius:8px;text-decoration:none;display:inline-block;margin-top:16px'>
-                           Start Free →
-                        </a>
-                    </div>"""
-                },
-                timeout=10
-            )
-    except Exception as e:
-        logger.error(f"Referral email failed: {e}")
+    mailer.send("referral_invite", referee_email, referrer_email=referrer_email)
 
     return {"status": "sent", "referee_email": referee_email}
 
@@ -2,34 +2,83 @@
 # ─────────────────────────────────────────────────────────────────────
 # FIXED: Returns full lead data (name, email, phone, message, source,
 #        campaign, bucket, sentiment, recommendation) not just id/score
+# History is keyset-paginated: pass back next_cursor / prev_cursor.
+# The old ?offset= is rejected with a 400 rather than silently ignored.
 # ─────────────────────────────────────────────────────────────────────
 
-from fastapi import APIRouter, Depends
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.models import LeadScore
 from backend.routes.auth import get_current_user
+from backend.services.pagination import InvalidCursor, Page, keyset_paginate
+from backend.services.rollups import lead_stats
 
 router = APIRouter(prefix="/api/v1/leads", tags=["leads"])
 
 
+class HistoryFilters:
+    """Query params shared by both lead history endpoints."""
+
+    def __init__(
+        self,
+        cursor:    str | None      = None,
+        limit:     int             = Query(50, ge=1, le=200),
+        bucket:    str | None      = None,
+        source:    str | None      = None,
+        campaign:  str | None      = None,
+        date_from: datetime | None = None,
+        date_to:   datetime | None = None,
+        offset:    int | None      = Query(None, include_in_schema=False),
+    ):
+        if offset is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="offset is no longer supported; pass next_cursor / prev_cursor "
+                       "from the previous response as ?cursor=",
+            )
+        self.cursor    = cursor
+        self.limit     = limit
+        self.bucket    = bucket.upper() if bucket else None
+        self.source    = source
+        self.campaign  = campaign
+        self.date_from = date_from
+        self.date_to   = date_to
+
+
+def lead_history_page(db: Session, brokerage_id: str, f: HistoryFilters) -> Page:
+    q = db.query(LeadScore).filter(LeadScore.brokerage_id == brokerage_id)
+
+    # brokerage_id + bucket + created_at ranges are index bounds;
+    # source/campaign live in the JSON payload and filter the scanned rows.
+    if f.bucket:
+        q = q.filter(LeadScore.bucket == f.bucket)
+    if f.date_from:
+        q = q.filter(LeadScore.created_at >= f.date_from)
+    if f.date_to:
+        q = q.filter(LeadScore.created_at < f.date_to)
+    if f.source:
+        q = q.filter(LeadScore.input_payload["source"].as_string() == f.source)
+    if f.campaign:
+        q = q.filter(LeadScore.input_payload["campaign"].as_string() == f.campaign)
+
+    try:
+        return keyset_paginate(q, LeadScore.created_at, LeadScore.id, f.cursor, f.limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/history")
 def get_leads_history(
-    limit: int = 50,
-    offset: int = 0,
+    filters: HistoryFilters = Depends(),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
-    brokerage_id = user["brokerage_id"]
-
-    leads = (
-        db.query(LeadScore)
-        .filter(LeadScore.brokerage_id == brokerage_id)
-        .order_by(LeadScore.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+    page  = lead_history_page(db, user["brokerage_id"], filters)
+    leads = page.rows
 
     return {
         "data": [
@@ -51,5 +100,19 @@ def get_leads_history(
                 "created_at":     lead.created_at.isoformat(),
             }
             for lead in leads
-        ]
-    }
\ No newline at end of file
+        ],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
+@router.get("/stats")
+def get_leads_stats(
+    date_from:   date | None = None,
+    date_to:     date | None = None,
+    granularity: Literal["day", "week", "month"] = "day",
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Counts by bucket, source and campaign plus a time series, from the daily rollups."""
+    return lead_stats(db, user["brokerage_id"], date_from, date_to, granularity)
@@ -9,6 +9,7 @@ import hmac
 import hashlib
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import NamedTuple
 
 from fastapi import APIRouter, HTTPException, Header, Depends, Request
 from fastapi.responses import JSONResponse
@@ -18,7 +19,11 @@ from jose import jwt
 from pydantic import BaseModel
 
 from backend.db import get_db
-from backend.services.ai_engine import analyze_lead_message
+from backend.services.ai_engine import analyze_lead_message_async
+from backend.services.lead_store import persist_leads
+from backend.services.usage import get_monthly_usage, plan_limit
+from backend.services.cache import TTLCache
+from backend.services.rate_limit import brokerage_or_ip, enforce, parse_rule
 from backend.models import LeadScore
 
 logger = logging.getLogger(__name__)
@@ -29,6 +34,17 @@ JWT_SECRET   = os.getenv("JWT_SECRET", os.getenv("JWT_SECRET_KEY", "change-me"))
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 ALGORITHM    = "HS256"
 
+PIXEL_RATE_LIMIT = os.getenv("PIXEL_RATE_LIMIT", "120/minute")   # per brokerage
+PIXEL_RULE       = parse_rule(PIXEL_RATE_LIMIT)
+
+# API key -> brokerage, so a WordPress submit needs no DB read before scoring.
+# Per process: invalidate_brokerage_keys() clears it locally when a plan,
+# industry or key changes; other workers pick the change up within the TTL.
+API_KEY_CACHE_TTL      = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+API_KEY_NEGATIVE_TTL   = 10.0
+_UNKNOWN_KEY           = object()
+_api_key_cache         = TTLCache(maxsize=10000, ttl=API_KEY_CACHE_TTL)
+
 
 # ─────────────────────────────────────────────
 # SCHEMA
@@ -65,23 +81,62 @@ def create_portal_jwt(lead_id: str, brokerage_id: str, score: int,
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
 
 
-def get_brokerage_from_api_key(api_key: str, db: Session):
-    """Looks up the brokerage by API key stored in brokerages table."""
+class BrokerageKey(NamedTuple):
+    id:       str
+    industry: str
+    plan:     str
+
+
+def get_brokerage_from_api_key(api_key: str, db: Session) -> BrokerageKey | None:
+    """Looks up the brokerage by API key (unique index), cached per process."""
+    cached = _api_key_cache.get(api_key)
+    if cached is _UNKNOWN_KEY:
+        return None
+    if cached is not None:
+        return cached
+
     row = db.execute(text("""
-        SELECT b.id, b.industry, b.plan,
-               (SELECT COUNT(*) FROM lead_scores
-                WHERE brokerage_id = b.id
-                  AND created_at >= date_trunc('month', NOW())) AS usage_this_month,
-               CASE b.plan
-                 WHEN 'starter' THEN 1000
-                 WHEN 'team'    THEN 5000
-                 ELSE 50
-               END AS plan_limit
+        SELECT b.id, b.industry, b.plan
         FROM brokerages b
         WHERE b.api_key = :k
         LIMIT 1
     """), {"k": api_key}).fetchone()
-    return row
+
+    if not row:
+        # Short negative entry so a bad key can't hammer the DB
+        _api_key_cache.set(api_key, _UNKNOWN_KEY, ttl=API_KEY_NEGATIVE_TTL)
+        return None
+
+    brokerage = BrokerageKey(id=str(row.id), industry=row.industry, plan=row.plan)
+    _api_key_cache.set(api_key, brokerage)
+    return brokerage
+
+
+def invalidate_brokerage_keys(brokerage_id: str) -> None:
+    """Call after changing a brokerage's api_key, plan or industry."""
+    _api_key_cache.invalidate_where(
+        lambda _, v: isinstance(v, BrokerageKey) and v.id == str(brokerage_id)
+    )
+
+
+async def pixel_brokerage(
+    request: Request,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+    db: Session = Depends(get_db)
+) -> BrokerageKey:
+    """
+    Resolves X-API-Key and applies PIXEL_RATE_LIMIT per brokerage.
+    Missing or unknown keys count against the client IP instead, so
+    inventing keys buys no extra requests.
+    """
+    brokerage = get_brokerage_from_api_key(x_api_key, db) if x_api_key else None
+    await enforce("/api/v1/ingest/pixel", brokerage_or_ip(request, brokerage and brokerage.id), PIXEL_RULE)
+
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API key required. Add X-API-Key header.")
+    if not brokerage:
+        raise HTTPException(status_code=401, detail="Invalid API key.")
+    return brokerage
 
 
 # ─────────────────────────────────────────────
@@ -92,23 +147,15 @@ def get_brokerage_from_api_key(api_key: str, db: Session):
 async def pixel_ingest(
     payload: PixelPayload,
     request: Request,
-    x_api_key: str = Header(None, alias="X-API-Key"),
+    brokerage: BrokerageKey = Depends(pixel_brokerage),   # 1. API key + rate limit
     db: Session = Depends(get_db)
 ):
-    # ── 1. Validate API key ────────────────────
-    if not x_api_key:
-        raise HTTPException(status_code=401, detail="API key required. Add X-API-Key header.")
-
-    brokerage = get_brokerage_from_api_key(x_api_key, db)
-
-    if not brokerage:
-        raise HTTPException(status_code=401, detail="Invalid API key.")
-
     # ── 2. Check quota ─────────────────────────
-    if brokerage.usage_this_month >= brokerage.plan_limit:
+    limit = plan_limit(brokerage.plan)
+    if get_monthly_usage(db, str(brokerage.id)) >= limit:
         raise HTTPException(
             status_code=402,
-            detail=f"Monthly quota exceeded ({brokerage.plan_limit} leads). Please upgrade your plan."
+            detail=f"Monthly quota exceeded ({limit} leads). Please upgrade your plan."
         )
 
     # ── 3. Validate email ──────────────────────
@@ -130,7 +177,9 @@ async def pixel_ingest(
 
     # ── 5. AI scoring ──────────────────────────
     try:
-        ai = analyze_lead_message(message_for_ai, brokerage.industry)
+        ai = await analyze_lead_message_async(
+            message_for_ai, brokerage.industry, str(brokerage.id), brokerage.plan
+        )
     except Exception as e:
         logger.error(f"AI scoring failed for pixel lead: {e}")
         # Don't fail the lead — give a default score
@@ -152,11 +201,6 @@ async def pixel_ingest(
     # ── 6. Save lead ───────────────────────────
     lead_id = str(uuid.uuid4())
 
-    # Get brokerage owner email for HOT alerts
-    owner = db.execute(text("""
-        SELECT email FROM users WHERE brokerage_id = :bid LIMIT 1
-    """), {"bid": str(brokerage.id)}).fetchone()
-
     lead_payload = {
         "name":     payload.name,
         "email":    payload.email,
@@ -178,24 +222,16 @@ async def pixel_ingest(
         urgency_score=score,
         sentiment=ai.get("sentiment"),
         ai_recommendation=ai.get("recommendation"),
+        prompt_version=ai.get("prompt_version"),
         score=score,
         bucket=bucket,
         created_at=datetime.now(timezone.utc)
     )
-    db.add(lead)
-    db.commit()
+    persist_leads(db, [lead])   # also queues the HOT alert
 
     logger.info(f"Pixel lead scored: {email} → {bucket} ({score}) for brokerage {brokerage.id}")
 
-    # ── 7. HOT alert ───────────────────────────
-    if bucket == "HOT" and owner:
-        try:
-            from backend.services.alerts import send_hot_alert
-            send_hot_alert(to_email=owner.email, lead_data={**lead_payload, "score": score})
-        except Exception as e:
-            logger.warning(f"HOT alert failed (non-fatal): {e}")
-
-    # ── 8. Create Magic Link portal JWT ────────
+    # ── 7. Create Magic Link portal JWT ────────
     portal_token = create_portal_jwt(
         lead_id=lead_id,
         brokerage_id=str(brokerage.id),
@@ -1,8 +1,8 @@
-from backend.services.email_ingest import fetch_emails
-import time
+import asyncio
+import logging
 
+from backend.services.email_ingest import run_mailboxes
 
 
-while True:
-    fetch_emails()
-    time.sleep(60)
\ No newline at end of file
+logging.basicConfig(level=logging.INFO)
+asyncio.run(run_mailboxes())
@@ -0,0 +1,8 @@
+from backend.db import SessionLocal
+from backend.services.outbox import run_forever
+import backend.services.lead_store     # registers the hot_alert / lead_enrichment handlers
+import backend.services.inbound_email  # registers the resend_inbound handler
+
+
+
+run_forever(SessionLocal)
@@ -0,0 +1,13 @@
+from backend.db import SessionLocal
+from backend.services.usage import reconcile_usage
+import time
+
+
+
+while True:
+    db = SessionLocal()
+    try:
+        reconcile_usage(db)
+    finally:
+        db.close()
+    time.sleep(3600)
@@ -25,12 +25,12 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
-import httpx
 from authlib.integrations.starlette_client import OAuth
 from starlette.config import Config
 
 from backend.db import get_db, set_tenant
 from backend.models import User, Brokerage
+from backend.services import mailer
 
 load_dotenv()
 
@@ -49,7 +49,6 @@ GOOGLE_CLIENT_ID     = os.getenv("GOOGLE_CLIENT_ID", "")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET", "")
 GOOGLE_REDIRECT_URI  = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/api/v1/auth/google/callback")
 FRONTEND_URL         = os.getenv("FRONTEND_URL", "http://localhost:5173")
-RESEND_API_KEY       = os.getenv("RESEND_API_KEY", "")
 
 oauth = OAuth(Config(environ={
     "GOOGLE_CLIENT_ID":     GOOGLE_CLIENT_ID,
@@ -141,114 +140,21 @@ def get_current_user(
 # ─────────────────────────────────────────────
 # Email Helpers
 # ─────────────────────────────────────────────
-async def _send_email(to: str, subject: str, html: str) -> bool:
-    if not RESEND_API_KEY:
-        logger.warning("RESEND_API_KEY not set — email skipped")
-        return False
-    try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-                json={
-                    "from":    "LeadRankerAI <onboarding@leadrankerai.com>",
-                    "to":      [to],
-                    "subject": subject,
-                    "html":    html,
-                },
-                timeout=10,
-            )
-        ok = res.status_code in (200, 201)
-        if not ok:
-            logger.error(f"Email failed {res.status_code}: {res.text}")
-        return ok
-    except Exception as e:
-        logger.error(f"Email error: {e}")
-        return False
-
-
-async def send_verify_email(to_email: str, token: str):
+def send_verify_email(to_email: str, token: str):
     """Email 1 of 2: sent immediately on register."""
-    verify_url = f"{FRONTEND_URL}/verify?token={token}"
-    await _send_email(
-        to_email,
-        "Verify your LeadRankerAI account",
-        f"""
-        <div style="font-family:sans-serif;max-width:600px;margin:auto;padding:32px">
-          <h2 style="color:#1e40af">Welcome to LeadRankerAI! 🚀</h2>
-          <p>Click below to verify your email and activate your account.</p>
-          <a href="{verify_url}"
-             style="display:inline-block;background:#2563eb;color:#fff;
-                    padding:14px 32px;border-radius:10px;text-decoration:none;
-                    font-weight:bold;font-size:16px;margin:16px 0">
-            Verify My Email →
-          </a>
-          <p style="color:#94a3b8;font-size:13px;margin-top:24px">
-            Link expires in 24 hours. If you didn't create an account, ignore this email.
-          </p>
-        </div>
-        """,
-    )
+    mailer.send("verify_email", to_email, verify_url=f"{FRONTEND_URL}/verify?token={token}")
 
 
-async def send_welcome_email(to_email: str, name: str):
+def send_welcome_email(to_email: str, name: str):
     """
     Email 2 of 2: sent ONLY after user clicks verify link.
     FIXED: Was sent simultaneously with verify email — now delayed until verified.
     """
-    await _send_email(
-        to_email,
-        "Your LeadRankerAI account is ready!",
-        f"""
-        <div style="font-family:sans-serif;max-width:600px;margin:auto;padding:32px">
-          <h2 style="color:#1e40af">You're verified, {name or 'there'}! 🎉</h2>
-          <p style="color:#475569;font-size:16px;line-height:1.6">
-            Your LeadRankerAI account is now active. Start scoring leads and 
-            discover who's HOT, WARM, or COLD — instantly.
-          </p>
-          <div style="background:#f8fafc;border-radius:12px;padding:20px;margin:20px 0">
-            <p style="margin:0;font-weight:600;color:#334155">Quick start:</p>
-            <ul style="color:#64748b;margin:8px 0;padding-left:20px">
-              <li>Install the WordPress plugin (40 seconds)</li>
-              <li>Or add the email CC address to your inquiry forms</li>
-              <li>Your first 50 leads are free</li>
-            </ul>
-          </div>
-          <a href="{FRONTEND_URL}/dashboard"
-             style="display:inline-block;background:#2563eb;color:#fff;
-                    padding:14px 32px;border-radius:10px;text-decoration:none;
-                    font-weight:bold;font-size:16px">
-            Go to Dashboard →
-          </a>
-          <p style="color:#94a3b8;font-size:12px;margin-top:32px">
-            Questions? Reply to this email or chat with Rank, your AI assistant.
-          </p>
-        </div>
-        """,
-    )
+    mailer.send("welcome_verified", to_email, name=name, frontend_url=FRONTEND_URL)
 
 
-async def send_password_reset_email(to_email: str, token: str):
-    reset_url = f"{FRONTEND_URL}/reset-password?token={token}"
-    await _send_email(
-        to_email,
-        "Reset your LeadRankerAI password",
-        f"""
-        <div style="font-family:sans-serif;max-width:600px;margin:auto;padding:32px">
-          <h2 style="color:#1e293b">Password Reset Request</h2>
-          <p style="color:#475569">Click below to reset your password. Link expires in 1 hour.</p>
-          <a href="{reset_url}"
-             style="display:inline-block;background:#dc2626;color:#fff;
-                    padding:14px 32px;border-radius:10px;text-decoration:none;
-                    font-weight:bold;font-size:16px;margin:16px 0">
-            Reset My Password →
-          </a>
-          <p style="color:#94a3b8;font-size:13px;margin-top:24px">
-            If you didn't request this, ignore this email. Your password won't change.
-          </p>
-        </div>
-        """,
-    )
+def send_password_reset_email(to_email: str, token: str):
+    mailer.send("password_reset", to_email, reset_url=f"{FRONTEND_URL}/reset-password?token={token}")
 
 
 # ─────────────────────────────────────────────
@@ -315,7 +221,7 @@ async def register(data: RegisterInput, db: Session = Depends(get_db)):
 
     # FIXED: Send ONLY verification email here.
     # Welcome email fires after they click the verify link (see GET /verify).
-    await send_verify_email(email, verify_token)
+    send_verify_email(email, verify_token)
 
     logger.info(f"Registered | {email} | brokerage={brokerage_id}")
     return {
@@ -376,7 +282,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
         {"bid": brokerage_id},
     ).fetchone()
     name = name_row[0] if name_row else ""
-    await send_welcome_email(email, name)
+    send_welcome_email(email, name)
 
     logger.info(f"Verified | {email}")
 
@@ -469,7 +375,7 @@ async def forgot_password(data: ForgotPasswordInput, db: Session = Depends(get_d
     )
     db.commit()
 
-    await send_password_reset_email(email, reset_token)
+    send_password_reset_email(email, reset_token)
     return {"status": "sent", "message": "If that email exists, a reset link was sent."}
 
 
@@ -586,7 +492,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             },
         )
         db.commit()
-        await send_welcome_email(email, name)
+        send_welcome_email(email, name)
 
     jwt_token = create_jwt(brokerage_id, email)
     redirect_url = f"{FRONTEND_URL}/auth/callback?token={jwt_token}&brokerage_id={brokerage_id}"
@@ -1,82 +1,440 @@
-import imaplib
-import email
+# backend/services/email_ingest.py
+# ─────────────────────────────────────────────────────────────────────
+# IMAP lead ingest: many mailboxes per process, one persistent
+# connection each, push not poll.
+#
+#   connect ─► drain ─► IDLE ─(EXISTS)─► drain ─► IDLE ...
+#
+# drain (repeated until a search finds nothing, then a NOOP: mail that
+# lands between the last search and IDLE shows up as an untagged EXISTS
+# and is drained before idling, not at the next push):
+#   UID SEARCH UID <last_uid + 1>:*   (UNSEEN on a box's first run)
+#   UID FETCH in IMAP_FETCH_BATCH ranges, BODY.PEEK of the few headers
+#     we use + the first IMAP_MAX_BODY bytes of the body (no \Seen side
+#     effect, no attachments beyond that)
+#   score the batch concurrently (EMAIL_SCORE_CONCURRENCY, and the
+#     per-tenant OpenAI scheduler behind analyze_lead_message_async)
+#   one transaction for the batch's leads + the box's new last_uid, so a
+#     restart resumes exactly where it stopped without rescanning
+#   UID STORE +FLAGS (\Seen) for anyone reading the box by hand
+#
+# Mailboxes live in the `mailboxes` table. A box is either dedicated to
+# one brokerage, or shared: then each message goes to the brokerage in
+# any of its To / Cc / Delivered-To plus-addresses (leads+<brokerage_id>@...),
+# so one box can serve any number of brokerages. Messages that match no
+# known brokerage are logged and counted, never silently dropped; the
+# high-water mark still moves past them. Passwords stay in the
+# environment (mailboxes.password_env names the variable). The legacy
+# EMAIL_USER / EMAIL_PASS box is registered automatically.
+#
+# Each process serves the boxes whose crc32(id) % EMAIL_WORKER_SHARDS ==
+# EMAIL_WORKER_SHARD; IMAP_MAX_DRAINS caps how many boxes fetch at once.
+# Connection errors reconnect with backoff; a failed mailbox refresh keeps
+# the running workers, and a box whose connection settings change gets a
+# fresh worker. Run with backend/run_email.py.
+# ─────────────────────────────────────────────────────────────────────
+
 import os
-from backend.services.ai_engine import analyze_lead_message
+import re
+import zlib
+import asyncio
+import logging
+from dataclasses import dataclass
+from email import message_from_bytes, policy
+from email.utils import getaddresses, parseaddr
+
+import aioimaplib
+from sqlalchemy import text
+
 from backend.db import SessionLocal
-from backend.models import LeadScore
-import uuid
-from datetime import datetime
+from backend.services.ai_engine import analyze_lead_message_async
+from backend.services.lead_store import build_lead, persist_leads
 
+logger = logging.getLogger(__name__)
 
-EMAIL_USER = os.getenv("EMAIL_USER")
-EMAIL_PASS = os.getenv("EMAIL_PASS")
+EMAIL_USER               = os.getenv("EMAIL_USER")
+IMAP_HOST                = os.getenv("IMAP_HOST", "imap.gmail.com")
+IMAP_FETCH_BATCH         = int(os.getenv("IMAP_FETCH_BATCH", "100"))
+IMAP_MAX_BODY            = int(os.getenv("IMAP_MAX_BODY", "65536"))
+IMAP_IDLE_SECONDS        = int(os.getenv("IMAP_IDLE_SECONDS", str(25 * 60)))   # servers drop IDLE at ~29 min
+EMAIL_SCORE_CONCURRENCY  = int(os.getenv("EMAIL_SCORE_CONCURRENCY", "16"))
+IMAP_MAX_DRAINS          = int(os.getenv("IMAP_MAX_DRAINS", "8"))       # mailboxes fetching at once
+MAILBOX_REFRESH_SECONDS  = int(os.getenv("MAILBOX_REFRESH_SECONDS", "60"))
+EMAIL_WORKER_SHARD       = int(os.getenv("EMAIL_WORKER_SHARD", "0"))
+EMAIL_WORKER_SHARDS      = max(1, int(os.getenv("EMAIL_WORKER_SHARDS", "1")))
 
+_HEADERS   = "FROM TO CC DELIVERED-TO SUBJECT MESSAGE-ID MIME-VERSION CONTENT-TYPE CONTENT-TRANSFER-ENCODING"
+FETCH_ITEMS = f"(UID BODY.PEEK[HEADER.FIELDS ({_HEADERS})] BODY.PEEK[TEXT]<0.{IMAP_MAX_BODY}>)"
 
-def fetch_emails():
+_FETCH_RE   = re.compile(rb"^\d+ FETCH \(")
+_UID_RE     = re.compile(rb"UID (\d+)")
+_SECTION_RE = re.compile(rb"BODY\[(HEADER\.FIELDS|TEXT)[^\]]*\](?:<\d+>)? \{\d+\}$")
+_UIDVALIDITY_RE = re.compile(rb"\[UIDVALIDITY (\d+)\]")
 
-    mail = imaplib.IMAP4_SSL("imap.gmail.com")
-    mail.login(EMAIL_USER, EMAIL_PASS)
-    mail.select("inbox")
 
-    status, data = mail.search(None, "UNSEEN")
+@dataclass
+class InboundEmail:
+    uid:     int
+    sender:  str
+    to:      list[str]
+    subject: str
+    body:    str
 
-    mail_ids = data[0].split()
+    @property
+    def message(self) -> str:
+        return f"{self.subject}\n\n{self.body}"
 
-    for num in mail_ids:
 
-        _, msg_data = mail.fetch(num, "(RFC822)")
-        raw = msg_data[0][1]
+def plus_tag(address: str) -> str | None:
+    """'leads+abc123@x.com' -> 'abc123'."""
+    local = address.split("@", 1)[0]
+    return local.split("+", 1)[1] if "+" in local else None
 
-        msg = email.message_from_bytes(raw)
 
-        subject = msg["subject"]
-        sender = msg["from"]
+def route_plus_address(addresses: list[str], domain: str) -> str | None:
+    """Brokerage id from the first leads+<id>@<domain> recipient, else None."""
+    for address in addresses:
+        if address.lower().endswith("@" + domain.lower()) and (tag := plus_tag(address)):
+            return tag
+    return None
 
-        body = ""
 
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    body = part.get_payload(decode=True).decode()
-        else:
-            body = msg.get_payload(decode=True).decode()
+# ─────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────
+def _text_body(msg) -> str:
+    part = msg.get_body(preferencelist=("plain", "html")) if msg.is_multipart() else msg
+    if part is None:
+        return ""
+    try:
+        return part.get_content().strip()
+    except (LookupError, ValueError):     # unknown charset, body cut off mid-encoding
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("utf-8", errors="replace").strip()
+
+
+def parse_fetch(lines: list) -> list[InboundEmail]:
+    """
+    Messages from an aioimaplib UID FETCH response. Each literal (header
+    block, body) is the item right after the line announcing it with
+    {size}; UID can come before or after them.
+    """
+    raw, section = [], None
+    for line in lines:
+        if section:
+            raw[-1][section] = bytes(line)
+            section = None
+            continue
+        if _FETCH_RE.match(line):
+            raw.append({})
+        if not raw:
+            continue
+        if (m := _UID_RE.search(line)) and "uid" not in raw[-1]:
+            raw[-1]["uid"] = int(m.group(1))
+        if m := _SECTION_RE.search(line):
+            section = "headers" if m.group(1).startswith(b"HEADER") else "text"
+
+    emails = []
+    for item in raw:
+        if "uid" not in item:
+            continue
+        msg = message_from_bytes(item.get("headers", b"") + item.get("text", b""), policy=policy.default)
+        emails.append(InboundEmail(
+            uid=item["uid"],
+            sender=parseaddr(str(msg.get("From", "")))[1],
+            to=[addr for _, addr in getaddresses(
+                [str(h) for h in msg.get_all("To", []) + msg.get_all("Cc", []) + msg.get_all("Delivered-To", [])]
+            ) if addr],
+            subject=str(msg.get("Subject", "")),
+            body=_text_body(msg),
+        ))
+    return emails
+
+
+# ─────────────────────────────────────────────
+# SCORING + PERSISTENCE
+# ─────────────────────────────────────────────
+def _brokerages(ids: set[str]) -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("SELECT id, industry, plan FROM brokerages WHERE id = ANY(:ids)"),
+            {"ids": list(ids)}
+        ).fetchall()
+        return {r.id: r for r in rows}
+    finally:
+        db.close()
+
+
+def _persist(leads: list, mailbox_id: str, last_uid: int) -> None:
+    """Save the leads and advance the mailbox's UID high-water mark in one transaction."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("UPDATE mailboxes SET last_uid = GREATEST(last_uid, :uid), updated_at = NOW() WHERE id = :id"),
+            {"uid": last_uid, "id": mailbox_id}
+        )
+        persist_leads(db, leads)
+        db.commit()         # persist_leads skips its commit when there are no leads
+    finally:
+        db.close()
+
+
+async def score_and_store(
+    routed: list[tuple[InboundEmail, str]],
+    sem: asyncio.Semaphore,
+    mailbox_id: str,
+    last_uid: int,
+) -> int:
+    """
+    Score (email, brokerage_id) pairs concurrently and save them, with
+    the mailbox's new high-water mark, in one transaction.
+    """
+    brokerages = await asyncio.to_thread(_brokerages, {bid for _, bid in routed}) if routed else {}
+
+    async def _score(mail: InboundEmail, bid: str):
+        row = brokerages.get(bid)
+        if row is None:
+            logger.warning(f"Mailbox {mailbox_id} UID {mail.uid}: unknown brokerage {bid!r} — not saved")
+            return None
+        if not mail.body:
+            return None
+        async with sem:
+            ai = await analyze_lead_message_async(mail.message, row.industry, bid, row.plan)
+        return build_lead(bid, mail.sender or "unknown", {
+            "name": None, "email": mail.sender, "phone": None,
+            "message": mail.message, "source": "email", "campaign": None,
+            "entities": ai.get("entities", {}),
+        }, ai)
+
+    leads = [lead for lead in await asyncio.gather(*(_score(m, b) for m, b in routed)) if lead]
+    await asyncio.to_thread(_persist, leads, mailbox_id, last_uid)
+    return len(leads)
 
-        process_email(sender, subject, body)
 
-    mail.logout()
+# ─────────────────────────────────────────────
+# MAILBOXES
+# ─────────────────────────────────────────────
+@dataclass
+class MailboxConfig:
+    id:           str
+    host:         str
+    username:     str
+    password_env: str
+    brokerage_id: str | None     # None = shared box, routed by plus-address
+    uid_validity: int | None
+    last_uid:     int
 
+    @property
+    def password(self) -> str | None:
+        return os.getenv(self.password_env)
 
-def process_email(sender, subject, body):
+    @property
+    def connection(self) -> tuple:
+        """Settings a running worker depends on; a change means a new worker."""
+        return (self.host, self.username, self.password_env, self.brokerage_id)
 
-    # Extract brokerage_id from email
-    # Example: leads+UUID@gmail.com
-    if "+" not in EMAIL_USER:
+
+def _shard_of(mailbox_id: str) -> int:
+    return zlib.crc32(mailbox_id.encode()) % EMAIL_WORKER_SHARDS
+
+
+def _ensure_env_mailbox(db) -> None:
+    """
+    Register the legacy EMAIL_USER / EMAIL_PASS mailbox, if configured.
+    Its plus-tag names the brokerage; if no such brokerage exists the box
+    is registered as shared (routed per message) instead.
+    """
+    if not EMAIL_USER:
         return
+    bid = plus_tag(EMAIL_USER)
+    if bid and not db.execute(text("SELECT 1 FROM brokerages WHERE id = :bid"), {"bid": bid}).first():
+        logger.error(f"EMAIL_USER {EMAIL_USER}: no brokerage {bid!r} — registering it as a shared mailbox")
+        bid = None
+    db.execute(text("""
+        INSERT INTO mailboxes (id, host, username, password_env, brokerage_id)
+        VALUES (:id, :host, :user, 'EMAIL_PASS', :bid)
+        ON CONFLICT (id) DO NOTHING
+    """), {"id": f"env:{EMAIL_USER}", "host": IMAP_HOST, "user": EMAIL_USER, "bid": bid})
+    db.commit()
 
-    brokerage_id = EMAIL_USER.split("+")[1].split("@")[0]
 
-    ai = analyze_lead_message(body, "real_estate")
+def load_mailboxes() -> list[MailboxConfig]:
+    """Enabled mailboxes belonging to this worker's shard."""
+    db = SessionLocal()
+    try:
+        _ensure_env_mailbox(db)
+        rows = db.execute(text("""
+            SELECT id, host, username, password_env, brokerage_id, uid_validity, last_uid
+            FROM mailboxes WHERE enabled
+        """)).fetchall()
+    finally:
+        db.close()
+    return [MailboxConfig(**r._mapping) for r in rows if _shard_of(r.id) == EMAIL_WORKER_SHARD]
 
+
+def _save_uid_validity(mailbox_id: str, uid_validity: int) -> None:
     db = SessionLocal()
+    try:
+        db.execute(text("""
+            UPDATE mailboxes SET uid_validity = :v, last_uid = 0, updated_at = NOW() WHERE id = :id
+        """), {"v": uid_validity, "id": mailbox_id})
+        db.commit()
+    finally:
+        db.close()
 
-    lead = LeadScore(
-        id=str(uuid.uuid4()),
-        brokerage_id=brokerage_id,
-        user_email=sender,
-        input_payload={"subject": subject, "body": body},
 
-        urgency_score=ai["urgency_score"],
-        sentiment=ai["sentiment"],
-        ai_recommendation=ai["recommendation"],
+# ─────────────────────────────────────────────
+# WORKER
+# ─────────────────────────────────────────────
+class MailboxWorker:
+    """One mailbox, one persistent connection, drained on connect and on every push."""
 
-        score=ai["urgency_score"],
-        bucket="HOT" if ai["urgency_score"] >= 80 else "WARM",
+    def __init__(self, box: MailboxConfig, score_sem: asyncio.Semaphore, drain_sem: asyncio.Semaphore):
+        self.box        = box
+        self.last_uid   = box.last_uid
+        self._score_sem = score_sem
+        self._drain_sem = drain_sem
+        self._imap      = None
+        self._domain    = box.username.rsplit("@", 1)[-1].lower()
 
-        created_at=datetime.utcnow()
-    )
+    async def _connect(self) -> None:
+        self._imap = aioimaplib.IMAP4_SSL(host=self.box.host, timeout=30)
+        await self._imap.wait_hello_from_server()
+        res = await self._imap.login(self.box.username, self.box.password)
+        if res.result != "OK":
+            raise ConnectionError(f"IMAP login failed for {self.box.username}")
+        res = await self._imap.select("INBOX")
 
-    db.add(lead)
-    db.commit()
-    db.close()
+        # UIDs are only comparable within one UIDVALIDITY — if it changed,
+        # the high-water mark is meaningless and we start over from UNSEEN
+        validity = None
+        for line in res.lines:
+            if m := _UIDVALIDITY_RE.search(line):
+                validity = int(m.group(1))
+        if validity is not None and validity != self.box.uid_validity:
+            if self.box.uid_validity is not None:
+                logger.warning(f"{self.box.username}: UIDVALIDITY changed, rescanning unseen mail")
+            await asyncio.to_thread(_save_uid_validity, self.box.id, validity)
+            self.box.uid_validity, self.last_uid = validity, 0
+
+    async def _search(self) -> list[int]:
+        if self.last_uid:
+            res = await self._imap.uid_search(f"UID {self.last_uid + 1}:*", charset=None)
+        else:
+            res = await self._imap.uid_search("UNSEEN", charset=None)
+        if res.result != "OK" or not res.lines:
+            return []
+        # "n:*" always matches the newest message, even when its UID < n
+        return sorted(u for u in map(int, res.lines[0].split()) if u > self.last_uid)
+
+    def route(self, mail: InboundEmail) -> str | None:
+        """The brokerage a message belongs to: the box's own, or the To plus-address."""
+        if self.box.brokerage_id:
+            return self.box.brokerage_id
+        if tag := route_plus_address(mail.to, self._domain):
+            return tag
+        logger.warning(f"{self.box.username} UID {mail.uid}: no brokerage plus-address in {mail.to} — not saved")
+        return None
+
+    async def _new_mail(self) -> bool:
+        """NOOP: did the server report new messages (untagged EXISTS) since we last asked?"""
+        res = await self._imap.noop()
+        return any(b"EXISTS" in line for line in res.lines)
+
+    async def drain(self) -> int:
+        """Fetch, score and store everything past last_uid, until nothing new is left."""
+        async with self._drain_sem:
+            seen, total, unrouted = 0, 0, 0
+            while True:
+                uids = await self._search()
+                if not uids:
+                    if await self._new_mail():
+                        continue
+                    break
+                seen += len(uids)
+                for i in range(0, len(uids), IMAP_FETCH_BATCH):
+                    batch   = uids[i:i + IMAP_FETCH_BATCH]
+                    uid_set = ",".join(map(str, batch))
+                    res     = await self._imap.uid("fetch", uid_set, FETCH_ITEMS)
+                    emails  = parse_fetch(res.lines)
+
+                    routed    = [(m, bid) for m in emails if (bid := self.route(m))]
+                    unrouted += len(emails) - len(routed)
+                    total    += await score_and_store(routed, self._score_sem, self.box.id, batch[-1])
+                    self.last_uid = batch[-1]
+                    await self._imap.uid("store", uid_set, "+FLAGS", r"(\Seen)")
+            if seen:
+                logger.info(f"{self.box.username}: {seen} emails, {total} leads saved, {unrouted} unroutable")
+            return total
+
+    async def _idle(self) -> None:
+        """Block until the server pushes new mail or the IDLE timeout lapses."""
+        idle = await self._imap.idle_start(timeout=IMAP_IDLE_SECONDS)
+        while self._imap.has_pending_idle():
+            push = await self._imap.wait_server_push()
+            if push == aioimaplib.STOP_WAIT_SERVER_PUSH or any(b"EXISTS" in line for line in push):
+                self._imap.idle_done()
+                await asyncio.wait_for(idle, 10)
+
+    async def run(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                await self._connect()
+                backoff = 1
+                while True:
+                    await self.drain()
+                    await self._idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.box.username}: IMAP error, reconnecting in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 300)
+            finally:
+                if self._imap is not None:
+                    try:
+                        await asyncio.wait_for(self._imap.logout(), 5)
+                    except Exception:
+                        pass
+
+
+async def run_mailboxes() -> None:
+    """
+    Ingest every enabled mailbox in this worker's shard until cancelled.
+    The mailbox list is re-read every MAILBOX_REFRESH_SECONDS: new boxes
+    get a worker, disabled or removed ones are stopped, and boxes whose
+    connection settings changed are restarted. If a refresh fails, the
+    running workers carry on until the next one.
+    """
+    score_sem = asyncio.Semaphore(EMAIL_SCORE_CONCURRENCY)
+    drain_sem = asyncio.Semaphore(IMAP_MAX_DRAINS)
+    workers: dict[str, tuple[MailboxConfig, asyncio.Task]] = {}
 
+    logger.info(f"Email ingest shard {EMAIL_WORKER_SHARD}/{EMAIL_WORKER_SHARDS}")
+    try:
+        while True:
+            try:
+                boxes = {b.id: b for b in await asyncio.to_thread(load_mailboxes)}
+            except Exception as e:
+                logger.error(f"Mailbox refresh failed, keeping {len(workers)} workers: {e}")
+                await asyncio.sleep(MAILBOX_REFRESH_SECONDS)
+                continue
 
+            for box_id in list(workers):
+                box = boxes.get(box_id)
+                if box is None or box.connection != workers[box_id][0].connection:
+                    if box is not None:
+                        logger.info(f"{box.username}: mailbox settings changed — restarting its worker")
+                    workers.pop(box_id)[1].cancel()
+            for box_id, box in boxes.items():
+                if box_id not in workers or workers[box_id][1].done():
+                    if not box.password:
+                        logger.error(f"{box.username}: ${box.password_env} is not set — skipped")
+                        continue
+                    workers[box_id] = (box, asyncio.create_task(MailboxWorker(box, score_sem, drain_sem).run()))
+            await asyncio.sleep(MAILBOX_REFRESH_SECONDS)
+    finally:
+        for _, task in workers.values():
+            task.cancel()
@@ -0,0 +1,167 @@
+# backend/services/inbound_email.py
+# ─────────────────────────────────────────────────────────────────────
+# Resend inbound email → lead, off the webhook's request path.
+#
+#   POST /inbound/email ──► enqueue "resend_inbound" (email_id) ──► 200
+#   outbox worker       ──► fetch bodies ──► score ──► persist_leads
+#
+# The webhook only writes one outbox row, keyed by email_id, and acks —
+# its latency no longer depends on Resend's API or OpenAI, and Resend's
+# retries of an email we already have are no-ops (the outbox dedupes on
+# (kind, dedupe_key)). The worker handles all claimed emails together:
+# bodies are fetched concurrently on a small thread pool through the
+# shared api.resend.com client (services/outbound.py), then scored with
+# analyze_lead_message_async on the worker's event loop, so they queue
+# in the per-tenant scheduler like every other lead. A failed fetch
+# retries just that email with the outbox's backoff. An email goes to
+# the brokerage of the first To / Cc recipient of the form
+# leads+<brokerage_id>@INBOUND_EMAIL_DOMAIN — the same rule as the IMAP
+# ingest's shared mailboxes (email_ingest.route_plus_address).
+#
+# Each saved email is recorded in inbound_emails in the same transaction
+# as its lead. A job that runs again (a lease that ran out after the
+# commit, a retried batch) skips those ids instead of saving them twice.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import getaddresses
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.services import outbound, outbox
+from backend.services.ai_engine import analyze_lead_message_async
+from backend.services.email_ingest import route_plus_address
+from backend.services.lead_store import build_lead, persist_leads
+
+logger = logging.getLogger(__name__)
+
+RESEND_API_KEY            = os.getenv("RESEND_API_KEY")
+INBOUND_EMAIL_CONCURRENCY = int(os.getenv("INBOUND_EMAIL_CONCURRENCY", "16"))
+INBOUND_EMAIL_DOMAIN      = os.getenv("INBOUND_EMAIL_DOMAIN", "leadrankerai.com")
+
+_pool = ThreadPoolExecutor(max_workers=INBOUND_EMAIL_CONCURRENCY, thread_name_prefix="inbound-email")
+
+
+def enqueue_inbound_email(db: Session, email_id: str) -> None:
+    """Record a received email for the worker. Does not commit."""
+    outbox.enqueue(db, "resend_inbound", email_id, {"email_id": email_id})
+
+
+def fetch_email(email_id: str) -> dict | None:
+    """The full email, or None if Resend doesn't have it. Raises on errors worth retrying."""
+    res = outbound.sync_client("resend").get(
+        f"/emails/receiving/{email_id}",
+        headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
+    )
+    if res.status_code == 404:
+        logger.warning(f"Inbound email {email_id} not found at Resend")
+        return None
+    res.raise_for_status()
+    return res.json()
+
+
+def _fetch_or_error(email_id: str) -> tuple[dict | None, str | None]:
+    try:
+        return fetch_email(email_id), None
+    except (httpx.HTTPError, ValueError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _recipients(email_full: dict) -> list[str]:
+    """Bare addresses from To and Cc, in order; Resend sends each as a string or a list."""
+    fields = []
+    for key in ("to", "cc"):
+        value = email_full.get(key) or []
+        fields += [value] if isinstance(value, str) else [v for v in value if isinstance(v, str)]
+    return [addr for _, addr in getaddresses(fields) if addr]
+
+
+def _route(email_id: str, email_full: dict) -> str | None:
+    """brokerage_id from the first leads+<brokerage_id>@INBOUND_EMAIL_DOMAIN recipient."""
+    recipients = _recipients(email_full)
+    if bid := route_plus_address(recipients, INBOUND_EMAIL_DOMAIN):
+        return bid
+    logger.warning(f"Inbound email {email_id}: no brokerage plus-address in {recipients} — not saved")
+    return None
+
+
+def _already_saved(db: Session, ids: list[str]) -> set[str]:
+    rows = db.execute(
+        text("SELECT email_id FROM inbound_emails WHERE email_id = ANY(:ids)"),
+        {"ids": ids}
+    ).fetchall()
+    return {r.email_id for r in rows}
+
+
+def _claim_email(db: Session, email_id: str, lead) -> bool:
+    """Record `email_id` as saved. False if another run got there first. Does not commit."""
+    return db.execute(text("""
+        INSERT INTO inbound_emails (email_id, brokerage_id, lead_id, created_at)
+        VALUES (:email_id, :bid, :lead_id, NOW())
+        ON CONFLICT (email_id) DO NOTHING
+        RETURNING email_id
+    """), {"email_id": email_id, "bid": lead.brokerage_id, "lead_id": lead.id}).first() is not None
+
+
+async def _score_all(emails: list, brokerages: dict) -> list[dict]:
+    return await asyncio.gather(*(
+        analyze_lead_message_async(message, brokerages[bid].industry, bid, brokerages[bid].plan)
+        for _, bid, _, message in emails
+    ))
+
+
+@outbox.batch_handler("resend_inbound")
+def process_inbound_emails(db: Session, payloads: list[dict]) -> list[str | None]:
+    ids    = [p["email_id"] for p in payloads]
+    errors = [None] * len(ids)
+    saved  = _already_saved(db, ids)
+    todo   = [email_id for email_id in ids if email_id not in saved]
+    if saved:
+        logger.info(f"Inbound email: skipping {len(saved)} already saved")
+    if not todo:
+        return errors
+
+    fetched = dict(zip(todo, _pool.map(_fetch_or_error, todo)))
+    emails  = []    # (email_id, brokerage_id, email, message); unroutable or empty ones are dropped
+    for i, email_id in enumerate(ids):
+        if email_id not in fetched:
+            continue
+        email_full, error = fetched[email_id]
+        if error:
+            errors[i] = error
+        elif email_full and (bid := _route(email_id, email_full)):
+            text_msg = email_full.get("text") or email_full.get("html") or ""
+            if text_msg:
+                emails.append((email_id, bid, email_full, f"{email_full.get('subject', '')}\n\n{text_msg}"))
+
+    if not emails:
+        return errors
+
+    rows = db.execute(
+        text("SELECT id, industry, plan FROM brokerages WHERE id = ANY(:ids)"),
+        {"ids": list({bid for _, bid, _, _ in emails})}
+    ).fetchall()
+    brokerages = {r.id: r for r in rows}
+    emails     = [e for e in emails if e[1] in brokerages]
+
+    results = outbox.run_async(_score_all(emails, brokerages))
+    leads   = []
+    for (email_id, bid, email_full, message), ai in zip(emails, results):
+        from_email = email_full.get("from", "")
+        lead = build_lead(bid, from_email, {
+            "name": None, "email": from_email, "phone": None,
+            "message": message, "source": "email", "campaign": None,
+            "entities": ai.get("entities", {}), "email_id": email_id,
+        }, ai)
+        if _claim_email(db, email_id, lead):
+            leads.append(lead)
+
+    persist_leads(db, leads)
+    db.commit()         # persist_leads skips its commit when every email was claimed elsewhere
+    logger.info(f"Inbound email: {len(todo)} fetched, {len(leads)} leads saved")
+    return errors
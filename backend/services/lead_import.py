@@ -0,0 +1,303 @@
+# backend/services/lead_import.py
+# ─────────────────────────────────────────────────────────────────────
+# Streaming lead import (NDJSON or CSV) for very large files.
+#
+#   request body ──► spool_body ──► iter_file ──► iter_lines ──► iter_*_rows
+#                                                   ──► import_leads ──► events
+#
+# The body is spooled to a temp file before the response starts: once a
+# StreamingResponse is running, Starlette listens for the client
+# disconnecting by reading the receive channel, which would swallow the
+# remaining body chunks. Past that point everything is a generator: rows
+# are parsed from the spool as needed, the next row is only pulled once
+# a scoring slot frees up, and rows are written in fixed-size bulk
+# inserts. Memory stays flat regardless of file size.
+#
+# Quota is reserved before scoring, IMPORT_CHUNK_SIZE leads at a time,
+# with usage.reserve_usage() — the same conditional increment the batch
+# route uses, so concurrent imports and live webhooks can't overshoot
+# the plan limit between them. Each row being scored holds one reserved
+# lead; rows that turn out not to be leads hand theirs to the next row.
+# Saved chunks settle their share through persist_leads(reserved=...),
+# and whatever is left is released when the import ends.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import csv
+import json
+import codecs
+import asyncio
+import logging
+import tempfile
+from typing import IO, AsyncIterator
+
+from backend.services.ai_engine import analyze_lead_message_async
+from backend.services.lead_store import build_lead, persist_leads
+from backend.services.usage import release_usage, reserve_usage
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "16"))
+IMPORT_CHUNK_SIZE  = int(os.getenv("IMPORT_CHUNK_SIZE", "200"))
+IMPORT_MAX_BYTES   = int(os.getenv("IMPORT_MAX_BYTES", str(500 * 1024 * 1024)))
+SPOOL_MEMORY_BYTES = 4 * 1024 * 1024    # larger bodies roll over to disk
+READ_CHUNK_BYTES   = 64 * 1024
+MAX_LINE_BYTES     = 64_000
+
+LEAD_FIELDS = ("name", "email", "phone", "message", "source", "campaign")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class ImportTooLarge(ValueError):
+    pass
+
+
+# ─────────────────────────────────────────────
+# SPOOLING
+# ─────────────────────────────────────────────
+async def spool_body(chunks: AsyncIterator[bytes], max_bytes: int = IMPORT_MAX_BYTES) -> IO[bytes]:
+    """
+    Read the whole body into a temp file (in memory up to
+    SPOOL_MEMORY_BYTES) and rewind it. The caller closes it.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size  = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImportTooLarge(f"Upload larger than {max_bytes} bytes")
+            await asyncio.to_thread(spool.write, chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def iter_file(f: IO[bytes]) -> AsyncIterator[bytes]:
+    """Read a file in chunks without blocking the event loop."""
+    while chunk := await asyncio.to_thread(f.read, READ_CHUNK_BYTES):
+        yield chunk
+
+
+# ─────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream incrementally and yield complete lines."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ImportFormatError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Yields (row_number, row, error) — one JSON object per line."""
+    n = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield n, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield n, None, "Row is not a JSON object"
+            continue
+        yield n, row, None
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yields (row_number, row, error). The first record is the header.
+    Quoted fields may span lines: a record is complete once its double
+    quotes balance (RFC 4180 escapes quotes by doubling them).
+    """
+    header: list[str] | None = None
+    record = ""
+    n = 0
+    async for line in iter_lines(chunks):
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_BYTES:
+                raise ImportFormatError(f"CSV record longer than {MAX_LINE_BYTES} bytes")
+            continue
+        values, record = next(csv.reader([record]), []), ""
+        if not values or not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            if "message" not in header:
+                raise ImportFormatError("CSV header must include a 'message' column")
+            continue
+        n += 1
+        if len(values) != len(header):
+            yield n, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield n, dict(zip(header, values)), None
+    if record:
+        n += 1
+        yield n, None, "Unterminated quoted field at end of file"
+
+
+def _clean_row(row: dict) -> tuple[dict | None, str | None]:
+    lead = {f: (str(row[f]).strip() or None) if row.get(f) is not None else None for f in LEAD_FIELDS}
+    if not lead["message"]:
+        return None, "Missing message"
+    lead["source"] = lead["source"] or "import"
+    return lead, None
+
+
+# ─────────────────────────────────────────────
+# SCORE + SAVE
+# ─────────────────────────────────────────────
+def _release(db, brokerage_id: str, n: int) -> None:
+    db.rollback()           # a failed flush may have left the transaction aborted
+    release_usage(db, brokerage_id, n)
+
+
+async def import_leads(
+    rows: AsyncIterator[tuple[int, dict | None, str | None]],
+    *,
+    db,
+    brokerage_id: str,
+    user_email: str,
+    industry: str,
+    plan: str | None,
+    quota_limit: int,
+    concurrency: int = IMPORT_CONCURRENCY,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Scores rows with at most `concurrency` AI calls in flight and yields
+    NDJSON-ready events: one "result" per row, a "progress" event per
+    bulk insert, and a final "done". Stops early once no more quota can
+    be reserved under `quota_limit` (the plan's monthly limit).
+    """
+    in_flight: set[asyncio.Task] = set()
+    buffer: list = []
+    stats = {"processed": 0, "saved": 0, "ignored": 0, "errors": 0}
+    reserved  = 0       # leads counted by reserve_usage() so far
+    free      = 0       # ... of which not yet held by a scoring row or a buffered lead
+    exhausted = False   # a reservation failed — the plan limit is reached
+    stopped   = None
+
+    async def _reserve() -> bool:
+        """Top up `free` with the largest block (up to chunk_size) the quota still allows."""
+        nonlocal reserved, free
+        n = chunk_size
+        while n:
+            if await asyncio.to_thread(reserve_usage, db, brokerage_id, n, quota_limit):
+                reserved += n
+                free     += n
+                return True
+            n //= 2
+        return False
+
+    async def _score(n: int, lead: dict) -> tuple[int, dict, dict]:
+        return n, lead, await analyze_lead_message_async(lead["message"], industry, brokerage_id, plan)
+
+    async def _flush():
+        nonlocal buffer
+        rows_to_save, buffer = buffer, []
+        await asyncio.to_thread(persist_leads, db, rows_to_save, {brokerage_id: len(rows_to_save)})
+        stats["saved"] += len(rows_to_save)
+        return {"type": "progress", **stats}
+
+    def _collect(done: set[asyncio.Task]) -> list[dict]:
+        nonlocal free
+        events = []
+        for task in done:
+            n, lead, ai = task.result()
+            stats["processed"] += 1
+            event = {
+                "type":           "result",
+                "row":            n,
+                "lead_id":        None,
+                "score":          0,
+                "bucket":         "IGNORE",
+                "sentiment":      ai.get("sentiment", "neutral"),
+                "recommendation": ai.get("recommendation", ""),
+            }
+            if not ai.get("is_lead", False):
+                stats["ignored"] += 1
+                free += 1               # its reserved lead goes to the next row
+            else:
+                lead_obj = build_lead(brokerage_id, user_email, {**lead, "entities": ai.get("entities", {})}, ai)
+                buffer.append(lead_obj)
+                event.update(lead_id=lead_obj.id, score=lead_obj.score, bucket=lead_obj.bucket)
+            events.append(event)
+        return events
+
+    try:
+        try:
+            async for n, row, error in rows:
+                lead = None
+                if error is None:
+                    lead, error = _clean_row(row)
+                if error is not None:
+                    stats["processed"] += 1
+                    stats["errors"] += 1
+                    yield {"type": "error", "row": n, "error": error}
+                    continue
+
+                # Back-pressure: don't read another row until a slot is free
+                if len(in_flight) >= concurrency:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for event in _collect(done):
+                        yield event
+                    if len(buffer) >= chunk_size:
+                        yield await _flush()
+
+                if not free and not exhausted:
+                    exhausted = not await _reserve()
+                # Out of quota: rows still being scored may not be leads and hand theirs back
+                while not free and in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for event in _collect(done):
+                        yield event
+                if not free:
+                    stopped = "quota_exceeded"
+                    break
+
+                free -= 1
+                in_flight.add(asyncio.create_task(_score(n, lead)))
+        except ImportFormatError as e:
+            stopped = str(e)
+
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for event in _collect(done):
+                yield event
+            if len(buffer) >= chunk_size:
+                yield await _flush()
+
+        if buffer:
+            yield await _flush()
+    finally:
+        # Only non-empty if the client went away mid-stream
+        for task in in_flight:
+            task.cancel()
+        unused = reserved - stats["saved"]
+        if unused:
+            try:
+                await asyncio.to_thread(_release, db, brokerage_id, unused)
+            except Exception as e:
+                # reconcile_usage() corrects the counter from lead_scores
+                logger.error(f"Import: releasing {unused} reserved leads for {brokerage_id} failed: {e}")
+
+    yield {"type": "done", **stats, "stopped": stopped}
@@ -0,0 +1,172 @@
+# backend/services/lead_store.py
+# ─────────────────────────────────────────────────────────────────────
+# Turning AI results into lead_scores rows, one lead or many at a time.
+# Every ingest path should persist through persist_leads() so that
+# anything that has to happen alongside a saved lead lives in one place.
+# Slow side effects (HOT alert emails) are queued in the outbox from the
+# same transaction and handled here, off the request path.
+# ─────────────────────────────────────────────────────────────────────
+
+import uuid
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.models import LeadScore
+from backend.services.alerts import hot_alert_email
+from backend.services.ai_engine import RULES_ONLY_VERSION, analyze_lead_message_async
+from backend.services import mailer, outbox, rollups, usage
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_for(ai: dict) -> tuple[str, int]:
+    """(bucket, score) for an analyze_lead_message result."""
+    is_lead = ai.get("is_lead", False)
+    score   = int(ai.get("urgency_score", 0))
+
+    if not is_lead:
+        return "IGNORE", 0
+    if score >= 80:
+        return "HOT", score
+    if score >= 50:
+        return "WARM", score
+    return "COLD", score
+
+
+def build_lead(brokerage_id: str, user_email: str, payload: dict, ai: dict) -> LeadScore:
+    is_lead       = ai.get("is_lead", False)
+    bucket, score = bucket_for(ai)
+
+    return LeadScore(
+        id=str(uuid.uuid4()),
+        brokerage_id=brokerage_id,
+        user_email=user_email,
+        input_payload={**payload, "is_lead": is_lead},
+        urgency_score=score if is_lead else None,
+        sentiment=ai.get("sentiment"),
+        ai_recommendation=ai.get("recommendation"),
+        prompt_version=ai.get("prompt_version"),
+        score=score,
+        bucket=bucket,
+        created_at=datetime.now(timezone.utc)
+    )
+
+
+def _enqueue_hot_alert(db: Session, lead: LeadScore) -> None:
+    outbox.enqueue(db, "hot_alert", lead.id, {
+        "brokerage_id": lead.brokerage_id,
+        "lead":         {**lead.input_payload, "score": lead.score},
+    })
+
+
+def persist_leads(db: Session, leads: list[LeadScore], reserved: dict[str, int] | None = None) -> None:
+    """
+    Insert all rows, bump the monthly usage counters and daily rollups,
+    and queue follow-up work, in a single transaction:
+
+      AI-scored HOT lead  → "hot_alert"
+      rules-only lead     → "lead_enrichment" (AI scores it later; the
+                            HOT alert waits for that final score)
+
+    Both are delivered by the outbox worker — nothing here waits.
+
+    `reserved` is usage already counted by usage.reserve_usage()
+    (brokerage_id -> leads); only the difference is applied, so the
+    unused part of a reservation is released in the same transaction.
+    """
+    if not leads and not reserved:
+        return
+    counts = Counter(lead.brokerage_id for lead in leads)
+    counts.subtract(reserved or {})
+    counts = {bid: n for bid, n in counts.items() if n}
+
+    db.add_all(leads)
+    db.flush()
+    usage.increment_usage(db, counts)
+    rollups.increment_rollups(db, leads)
+    for lead in leads:
+        if lead.prompt_version == RULES_ONLY_VERSION:
+            outbox.enqueue(db, "lead_enrichment", lead.id, {
+                "brokerage_id": lead.brokerage_id,
+                "lead_id":      lead.id,
+            })
+        elif lead.bucket == "HOT":
+            _enqueue_hot_alert(db, lead)
+    db.commit()
+
+    usage.note_committed(counts)
+
+
+# ─────────────────────────────────────────────
+# OUTBOX HANDLERS
+# ─────────────────────────────────────────────
+@outbox.batch_handler("hot_alert")
+def deliver_hot_alerts(db: Session, payloads: list[dict]) -> list[str | None]:
+    """Every claimed alert in as few Resend /emails/batch calls as possible."""
+    rows = db.execute(text("""
+        SELECT DISTINCT ON (brokerage_id) brokerage_id, email FROM users
+        WHERE brokerage_id = ANY(:bids)
+    """), {"bids": list({p["brokerage_id"] for p in payloads})}).fetchall()
+    owners = {str(r.brokerage_id): r.email for r in rows}
+
+    errors, sent, emails = [None] * len(payloads), [], []
+    for i, p in enumerate(payloads):
+        owner = owners.get(str(p["brokerage_id"]))
+        if not owner:
+            logger.info(f"HOT alert dropped — no owner for brokerage {p['brokerage_id']}")
+            continue
+        sent.append(i)
+        emails.append(hot_alert_email(owner, p["lead"]))
+
+    for i, error in zip(sent, mailer.send_batch_now(emails)):
+        errors[i] = error
+    return errors
+
+
+@outbox.handler("lead_enrichment")
+def enrich_lead(db: Session, payload: dict) -> None:
+    """
+    Replace a rules-only score with the AI score: update the AI fields,
+    re-bucket (moving the lead between rollup rows) and queue the HOT
+    alert if the final bucket is HOT.
+
+    Scoring waits for a slot in the per-tenant scheduler like any other
+    lead; if it is shed again the job simply retries later.
+    """
+    lead = db.get(LeadScore, payload["lead_id"])
+    if lead is None or lead.prompt_version != RULES_ONLY_VERSION:
+        return      # deleted, or already enriched
+
+    brokerage = db.execute(text(
+        "SELECT industry, plan FROM brokerages WHERE id = :bid"
+    ), {"bid": lead.brokerage_id}).fetchone()
+    industry  = (brokerage.industry if brokerage else None) or "general"
+    plan      = brokerage.plan if brokerage else None
+
+    message = (lead.input_payload or {}).get("message") or ""
+    ai      = outbox.run_async(analyze_lead_message_async(message, industry, lead.brokerage_id, plan))
+    if ai.get("prompt_version") in (None, RULES_ONLY_VERSION):
+        raise RuntimeError("AI scoring unavailable")    # fallback or shed again — retry later
+
+    old_key       = rollups.rollup_key(lead)
+    bucket, score = bucket_for(ai)
+    is_lead       = ai.get("is_lead", False)
+
+    lead.urgency_score     = score if is_lead else None
+    lead.sentiment         = ai.get("sentiment")
+    lead.ai_recommendation = ai.get("recommendation")
+    lead.prompt_version    = ai.get("prompt_version")
+    lead.score             = score
+    lead.bucket            = bucket
+    lead.input_payload     = {**lead.input_payload, "entities": ai.get("entities", {}), "is_lead": is_lead}
+
+    if bucket != old_key[2]:
+        rollups.adjust_rollups(db, Counter({old_key: -1, rollups.rollup_key(lead): 1}))
+    if bucket == "HOT":
+        _enqueue_hot_alert(db, lead)
+    db.commit()
+    logger.info(f"Lead {payload['lead_id']} enriched: {old_key[2]} → {bucket} ({score})")
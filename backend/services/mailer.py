@@ -0,0 +1,317 @@
+# backend/services/mailer.py
+# ─────────────────────────────────────────────────────────────────────
+# Every transactional email goes through here.
+#
+#   mailer.send("welcome", to, name=...)      request path: render, queue,
+#                                             return — never waits on Resend
+#   sender task ──► collect up to RESEND_BATCH_MAX queued mails
+#               ──► per-recipient throttle (GCRA, services/rate_limit.py)
+#               ──► POST /emails (one) or /emails/batch (many)
+#   mailer.send_batch_now([...])              outbox handlers: same path,
+#                                             synchronous, with a per-message
+#                                             result for retries
+#
+# start() records the app's event loop. send() from a sync route or any
+# other thread hands the email to that loop (call_soon_threadsafe), so
+# no caller ever blocks on Resend; only processes without an app loop
+# (scripts) fall back to sending synchronously.
+#
+# Templates live in backend/templates/email/ and are compiled once at
+# import; a send only renders the cached Template object. TEMPLATES
+# holds each one's sender, subject (also a template) and per-recipient
+# limit, so one recipient can't be flooded by any single kind of mail.
+#
+# Prometheus: emails_total{template, outcome}, email_send_seconds,
+# email_queue_depth.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from prometheus_client import Counter, Gauge, Histogram
+
+from backend.services import outbound
+from backend.services.rate_limit import hit, hit_sync, parse_rule
+
+logger = logging.getLogger(__name__)
+
+RESEND_API_KEY       = os.getenv("RESEND_API_KEY")
+FOUNDER_EMAIL        = os.getenv("FOUNDER_EMAIL", "nandprsd62@gmail.com")
+EMAIL_RECIPIENT_RATE = os.getenv("EMAIL_RECIPIENT_RATE", "20/hour")
+EMAIL_QUEUE_MAX      = int(os.getenv("EMAIL_QUEUE_MAX", "10000"))
+EMAIL_BATCH_WINDOW   = float(os.getenv("EMAIL_BATCH_WINDOW_SECONDS", "0.05"))
+EMAIL_FLUSH_SECONDS  = float(os.getenv("EMAIL_FLUSH_SECONDS", "10"))
+RESEND_BATCH_MAX     = 100      # Resend's limit per /emails/batch call
+
+TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "templates" / "email"
+
+ONBOARDING    = "LeadRankerAI <onboarding@leadrankerai.com>"
+NOTIFICATIONS = "LeadRankerAI <notifications@leadrankerai.com>"
+ALERTS        = "LeadRankerAI Alerts <notifications@leadrankerai.com>"
+
+EMAILS_TOTAL = Counter("emails_total", "Transactional emails by outcome", ["template", "outcome"])
+SEND_SECONDS = Histogram(
+    "email_send_seconds", "Resend API call latency", ["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8),
+)
+QUEUE_DEPTH  = Gauge("email_queue_depth", "Emails waiting for the sender task")
+
+
+class Spec(NamedTuple):
+    sender:   str
+    subject:  str               # Jinja source, same context as the body
+    throttle: str | None = None # per recipient; default EMAIL_RECIPIENT_RATE
+
+
+TEMPLATES = {
+    "hot_alert":            Spec(NOTIFICATIONS, "🔥 HOT Lead (Score {{ score }})", "60/hour"),
+    "verify_email":         Spec(ONBOARDING, "Verify your LeadRankerAI account", "5/hour"),
+    "password_reset":       Spec(ONBOARDING, "Reset your LeadRankerAI password", "5/hour"),
+    "welcome":              Spec(ONBOARDING, "Welcome to LeadRankerAI 🎉"),
+    "welcome_verified":     Spec(ONBOARDING, "Your LeadRankerAI account is ready!"),
+    "upgrade_confirmation": Spec(NOTIFICATIONS, "You're on the {{ plan | title }} plan! 🚀"),
+    "referral_invite":      Spec(NOTIFICATIONS, "{{ referrer_email }} invited you to LeadRankerAI", "3/day"),
+    "partner_invite":       Spec(ONBOARDING, "Invitation to Connect: LeadRanker Tech Partnership", "3/day"),
+    "referral_joined":      Spec(NOTIFICATIONS, "Your referral just upgraded! 🎉"),
+    "purchase_notice":      Spec(ALERTS, "💰 New {{ plan | title }} purchase — {{ customer_email }}", "100/hour"),
+    "error_report":         Spec(ALERTS, "🚨 {{ report.error_type }} — {{ report.page }}", "30/hour"),
+}
+
+
+class Email(NamedTuple):
+    template: str
+    to:       str
+    payload:  dict              # Resend API body
+
+
+# ─────────────────────────────────────────────
+# TEMPLATES — compiled once, rendered per send
+# ─────────────────────────────────────────────
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(default=True),
+    undefined=StrictUndefined,
+    auto_reload=False,
+)
+_subject_env = Environment(undefined=StrictUndefined)   # plain text, not escaped
+
+_bodies   = {name: _env.get_template(f"{name}.html") for name in TEMPLATES}
+_subjects = {name: _subject_env.from_string(spec.subject) for name, spec in TEMPLATES.items()}
+_rules    = {name: parse_rule(spec.throttle or EMAIL_RECIPIENT_RATE) for name, spec in TEMPLATES.items()}
+
+
+def render(template: str, to: str, **context) -> Email:
+    return Email(template, to, {
+        "from":    TEMPLATES[template].sender,
+        "to":      [to],
+        "subject": _subjects[template].render(**context),
+        "html":    _bodies[template].render(**context),
+    })
+
+
+def _throttle_key(email: Email) -> str:
+    return f"email:{email.template}:{email.to.lower()}"
+
+
+def _requests(emails: list[Email]) -> Iterable[tuple[list[Email], str, object]]:
+    """(emails, path, json) per Resend call: /emails for one, /emails/batch for many."""
+    for i in range(0, len(emails), RESEND_BATCH_MAX):
+        chunk = emails[i:i + RESEND_BATCH_MAX]
+        if len(chunk) == 1:
+            yield chunk, "/emails", chunk[0].payload
+        else:
+            yield chunk, "/emails/batch", [e.payload for e in chunk]
+
+
+def _headers() -> dict:
+    return {"Authorization": f"Bearer {RESEND_API_KEY}"}
+
+
+def _record(chunk: list[Email], outcome: str) -> None:
+    for e in chunk:
+        EMAILS_TOTAL.labels(e.template, outcome).inc()
+
+
+def _error(res) -> str | None:
+    if res.status_code in (200, 201):
+        return None
+    return f"Resend {res.status_code}: {res.text[:200]}"
+
+
+def _finish(chunk: list[Email], error: str | None, started: float) -> None:
+    SEND_SECONDS.labels("batch" if len(chunk) > 1 else "single").observe(time.perf_counter() - started)
+    _record(chunk, "failed" if error else "sent")
+    if error:
+        logger.error(f"Email send failed ({len(chunk)}): {error}")
+
+
+def _throttled(email: Email, allowed: bool) -> bool:
+    if not allowed:
+        logger.warning(f"Email throttled: {email.template} → {email.to}")
+        EMAILS_TOTAL.labels(email.template, "throttled").inc()
+    return not allowed
+
+
+# ─────────────────────────────────────────────
+# SYNC PATH — threads and outbox handlers
+# ─────────────────────────────────────────────
+def send_batch_now(emails: list[Email]) -> list[str | None]:
+    """
+    Send now, batching where possible. One result per email: None if it
+    was sent or deliberately skipped (no API key), else the error, so
+    outbox handlers can retry just the failures. A throttled email is an
+    error too — it goes out on a later attempt, once the recipient's
+    limit has room, or ends up dead rather than counted as delivered.
+    """
+    results = [None] * len(emails)
+    if not RESEND_API_KEY:
+        logger.warning(f"RESEND_API_KEY not set — {len(emails)} email(s) skipped")
+        _record(emails, "skipped")
+        return results
+
+    allowed = []
+    for i, e in enumerate(emails):
+        ok, retry_after = hit_sync(_throttle_key(e), _rules[e.template])
+        if _throttled(e, ok):
+            results[i] = f"Throttled: {e.template} → {e.to}, retry in {retry_after:.0f}s"
+        else:
+            allowed.append(e)
+
+    index  = {id(e): i for i, e in enumerate(emails)}
+    client = outbound.sync_client("resend")
+    for chunk, path, body in _requests(allowed):
+        started = time.perf_counter()
+        try:
+            error = _error(client.post(path, headers=_headers(), json=body))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        _finish(chunk, error, started)
+        for e in chunk:
+            results[index[id(e)]] = error
+    return results
+
+
+def send_now(template: str, to: str, **context) -> bool:
+    return send_batch_now([render(template, to, **context)])[0] is None
+
+
+# ─────────────────────────────────────────────
+# ASYNC PATH — queue + sender task
+# ─────────────────────────────────────────────
+_queue:  asyncio.Queue | None = None
+_sender: asyncio.Task | None  = None
+_loop:   asyncio.AbstractEventLoop | None = None     # the loop _sender runs on
+
+
+async def _deliver(emails: list[Email]) -> None:
+    if not RESEND_API_KEY:
+        logger.warning(f"RESEND_API_KEY not set — {len(emails)} email(s) skipped")
+        _record(emails, "skipped")
+        return
+
+    allowed = []
+    for e in emails:
+        ok, _ = await hit(_throttle_key(e), _rules[e.template])
+        if not _throttled(e, ok):
+            allowed.append(e)
+
+    client = outbound.async_client("resend")
+    for chunk, path, body in _requests(allowed):
+        started = time.perf_counter()
+        try:
+            error = _error(await client.post(path, headers=_headers(), json=body))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        _finish(chunk, error, started)
+
+
+async def _run_sender() -> None:
+    while True:
+        batch = [await _queue.get()]
+        await asyncio.sleep(EMAIL_BATCH_WINDOW)     # let a burst gather into one call
+        while len(batch) < RESEND_BATCH_MAX and not _queue.empty():
+            batch.append(_queue.get_nowait())
+        QUEUE_DEPTH.set(_queue.qsize())
+        try:
+            await _deliver(batch)
+        except Exception as e:
+            logger.error(f"Email sender error: {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def start() -> None:
+    """Start the sender task on the running loop (app startup, or first send)."""
+    global _queue, _sender, _loop
+    loop = asyncio.get_running_loop()
+    if _queue is None or _loop is not loop:
+        _queue = asyncio.Queue(maxsize=EMAIL_QUEUE_MAX)
+    if _sender is None or _sender.done() or _loop is not loop:
+        _sender = loop.create_task(_run_sender())
+    _loop = loop
+
+
+async def stop() -> None:
+    """Flush what's queued (up to EMAIL_FLUSH_SECONDS), then stop the sender."""
+    global _sender, _loop
+    if _sender is None:
+        return
+    try:
+        await asyncio.wait_for(_queue.join(), EMAIL_FLUSH_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Email queue not flushed on shutdown — {_queue.qsize()} dropped")
+    _sender.cancel()
+    _sender = None
+    _loop   = None          # later sends from threads go out synchronously
+
+
+def _put(emails: list[Email]) -> None:
+    start()
+    for e in emails:
+        try:
+            _queue.put_nowait(e)
+        except asyncio.QueueFull:
+            logger.error(f"Email queue full — dropped {e.template} → {e.to}")
+            EMAILS_TOTAL.labels(e.template, "dropped").inc()
+    QUEUE_DEPTH.set(_queue.qsize())
+
+
+def enqueue(emails: Iterable[Email]) -> None:
+    """
+    Queue rendered emails for the sender task. From another thread (sync
+    routes run in a threadpool) they are handed to the app's loop; only
+    with no app loop at all (scripts) are they sent synchronously.
+    """
+    emails = list(emails)
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    loop = _loop
+    if loop is not None and loop is not running and loop.is_running():
+        try:
+            loop.call_soon_threadsafe(_put, emails)
+            return
+        except RuntimeError:        # closed under us at shutdown
+            pass
+    if running is not None:
+        _put(emails)
+    else:
+        send_batch_now(emails)
+
+
+def send(template: str, to: str, **context) -> None:
+    """Render and queue one email; returns immediately."""
+    enqueue([render(template, to, **context)])
+
+
+def send_many(template: str, recipients: Iterable[tuple[str, dict]]) -> None:
+    """Fan-out: one email per (to, context), delivered through /emails/batch."""
+    enqueue(render(template, to, **context) for to, context in recipients)
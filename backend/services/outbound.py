@@ -0,0 +1,109 @@
+# backend/services/outbound.py
+# ─────────────────────────────────────────────────────────────────────
+# Shared HTTP clients for every outbound integration.
+#
+# One pooled client per upstream host, per process, instead of a fresh
+# httpx.AsyncClient() / requests.post() (and a fresh TLS handshake) per
+# call. Each host gets its own timeouts and connection cap, and speaks
+# HTTP/2 when `h2` is installed, so concurrent calls multiplex over a
+# few long-lived connections:
+#
+#   resend  api.resend.com          transactional email, inbound fetch
+#   openai  api.openai.com          scoring (ai_engine), Ranky chat
+#   google  oauth2.googleapis.com   OAuth token exchange + userinfo
+#
+#   await outbound.async_client("resend").post("/emails", ...)   # coroutines
+#   outbound.sync_client("resend").post("/emails", ...)          # threads
+#
+# Clients are created by the app's startup hook (or on first use in
+# the outbox / IMAP workers) and closed on shutdown. Both kinds are safe
+# to share: the async one across coroutines on the event loop, the
+# sync one across threads.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import logging
+import importlib.util
+from dataclasses import dataclass
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class Host:
+    base_url:        str
+    timeout:         float      # read/write/pool, seconds
+    max_connections: int
+    connect_timeout: float = 5.0
+
+
+HOSTS = {
+    "resend": Host(
+        "https://api.resend.com",
+        timeout=float(os.getenv("RESEND_TIMEOUT_SECONDS", "10")),
+        max_connections=int(os.getenv("RESEND_MAX_CONNECTIONS", "20")),
+    ),
+    "openai": Host(
+        "https://api.openai.com",
+        timeout=float(os.getenv("AI_TIMEOUT_SECONDS", "30")),
+        max_connections=int(os.getenv("AI_MAX_CONCURRENCY", "64")),
+    ),
+    "google": Host(
+        "https://oauth2.googleapis.com",
+        timeout=float(os.getenv("GOOGLE_TIMEOUT_SECONDS", "10")),
+        max_connections=int(os.getenv("GOOGLE_MAX_CONNECTIONS", "10")),
+    ),
+}
+
+_async: dict[str, httpx.AsyncClient] = {}
+_sync:  dict[str, httpx.Client]      = {}
+
+
+def _options(name: str) -> dict:
+    host = HOSTS[name]
+    return {
+        "base_url": host.base_url,
+        "http2":    HTTP2,
+        "timeout":  httpx.Timeout(host.timeout, connect=host.connect_timeout),
+        "limits":   httpx.Limits(
+            max_connections=host.max_connections,
+            max_keepalive_connections=host.max_connections,
+            keepalive_expiry=60,
+        ),
+    }
+
+
+def async_client(name: str) -> httpx.AsyncClient:
+    """The process-wide AsyncClient for a host in HOSTS."""
+    if name not in _async or _async[name].is_closed:
+        _async[name] = httpx.AsyncClient(**_options(name))
+    return _async[name]
+
+
+def sync_client(name: str) -> httpx.Client:
+    """The process-wide Client for a host in HOSTS, for sync / threaded callers."""
+    if name not in _sync or _sync[name].is_closed:
+        _sync[name] = httpx.Client(**_options(name))
+    return _sync[name]
+
+
+# ─────────────────────────────────────────────
+# APP LIFECYCLE
+# ─────────────────────────────────────────────
+def start() -> None:
+    for name in HOSTS:
+        async_client(name)
+    logger.info(f"Outbound clients ready: {', '.join(HOSTS)} (http2={HTTP2})")
+
+
+async def close() -> None:
+    for c in _async.values():
+        await c.aclose()
+    for c in _sync.values():
+        c.close()
+    _async.clear()
+    _sync.clear()
@@ -0,0 +1,233 @@
+# backend/services/outbox.py
+# ─────────────────────────────────────────────────────────────────────
+# Transactional outbox for side effects that must not block a request.
+#
+#   ingest txn:  INSERT lead_scores ... ; enqueue(db, "hot_alert", ...)
+#   worker:      claim due jobs ──► handler(db, payload) ──► done / retry
+#
+# A job is written in the same transaction as the rows it describes, so
+# it exists if and only if they do. (kind, dedupe_key) is unique — the
+# same lead can never be alerted twice. Workers claim jobs with
+# FOR UPDATE SKIP LOCKED and push next_attempt_at out by a lease, so any
+# number of workers can drain concurrently and a job held by a crashed
+# worker is picked up again once the lease runs out. Failures retry with
+# exponential backoff until OUTBOX_MAX_ATTEMPTS, then the job is "dead".
+# Kinds registered with @batch_handler get all their claimed jobs in one
+# call instead of one at a time.
+#
+# Handlers run on a worker thread. Async work they need (scheduled
+# OpenAI scoring) goes through run_async(), which runs it on the
+# worker's event loop: the API's own loop under drain_forever(), a
+# private background loop under run_forever().
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Coroutine
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE    = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_SECONDS  = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS  = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_BACKOFF_BASE  = 30      # seconds; doubles per attempt
+OUTBOX_BACKOFF_MAX   = 3600
+
+Handler      = Callable[[Session, dict], None]
+BatchHandler = Callable[[Session, list[dict]], list[str | None]]
+
+HANDLERS: dict[str, Handler] = {}
+BATCH_HANDLERS: dict[str, BatchHandler] = {}
+
+_loop: asyncio.AbstractEventLoop | None = None     # where run_async() runs coroutines
+_loop_lock = threading.Lock()
+
+
+def handler(kind: str):
+    """Register the function that delivers jobs of `kind`. Raise to retry."""
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def batch_handler(kind: str):
+    """
+    Register a function that delivers all claimed jobs of `kind` in one
+    call, for work that is cheaper done together (concurrent I/O, one
+    bulk insert). It returns one entry per payload: None when done, an
+    error message to retry that job. Raise to retry all of them.
+    """
+    def register(fn: BatchHandler) -> BatchHandler:
+        BATCH_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="outbox-loop", daemon=True).start()
+        return _loop
+
+
+def run_async(coro: Coroutine) -> Any:
+    """
+    Run `coro` on the worker's event loop and wait for its result.
+    For handlers only — they run off the loop, so blocking here is fine.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
+# ─────────────────────────────────────────────
+# ENQUEUE (inside the caller's transaction)
+# ─────────────────────────────────────────────
+def enqueue(db: Session, kind: str, dedupe_key: str, payload: dict) -> None:
+    """Add a job; a no-op if (kind, dedupe_key) was already enqueued. Does not commit."""
+    db.execute(text("""
+        INSERT INTO outbox (id, kind, dedupe_key, payload, status, attempts, next_attempt_at, created_at)
+        VALUES (:id, :kind, :key, CAST(:payload AS JSON), 'pending', 0, NOW(), NOW())
+        ON CONFLICT (kind, dedupe_key) DO NOTHING
+    """), {
+        "id":      str(uuid.uuid4()),
+        "kind":    kind,
+        "key":     dedupe_key,
+        "payload": json.dumps(payload, default=str),
+    })
+
+
+# ─────────────────────────────────────────────
+# DRAIN
+# ─────────────────────────────────────────────
+def _claim(db: Session, limit: int) -> list:
+    try:
+        rows = db.execute(text("""
+            UPDATE outbox
+            SET attempts        = attempts + 1,
+                next_attempt_at = NOW() + make_interval(secs => :lease)
+            WHERE id IN (
+                SELECT id FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= NOW()
+                ORDER BY next_attempt_at
+                LIMIT :n
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, kind, payload, attempts
+        """), {"n": limit, "lease": OUTBOX_LEASE_SECONDS}).fetchall()
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 4)
+
+
+def _finish(db: Session, job_id: str, error: str | None, attempts: int) -> None:
+    if error is None:
+        db.execute(text("""
+            UPDATE outbox SET status = 'done', last_error = NULL, completed_at = NOW()
+            WHERE id = :id
+        """), {"id": job_id})
+    else:
+        db.execute(text("""
+            UPDATE outbox
+            SET status          = :status,
+                last_error      = :error,
+                next_attempt_at = NOW() + make_interval(secs => :delay)
+            WHERE id = :id
+        """), {
+            "id":     job_id,
+            "status": "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending",
+            "error":  error[:2000],
+            "delay":  _backoff(attempts),
+        })
+    db.commit()
+
+
+def _run_batch(db: Session, kind: str, jobs: list) -> None:
+    try:
+        errors = BATCH_HANDLERS[kind](db, [job.payload for job in jobs])
+    except Exception as e:
+        db.rollback()
+        errors = [f"{type(e).__name__}: {e}"] * len(jobs)
+    for job, error in zip(jobs, errors):
+        if error is not None:
+            logger.warning(f"Outbox {job.kind} {job.id} failed (attempt {job.attempts}): {error}")
+        _finish(db, job.id, error, job.attempts)
+
+
+def drain_once(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Claim and run up to `limit` due jobs. Returns how many were claimed."""
+    jobs    = _claim(db, limit)
+    batched = {}
+    for job in jobs:
+        if job.kind in BATCH_HANDLERS:
+            batched.setdefault(job.kind, []).append(job)
+            continue
+        fn = HANDLERS.get(job.kind)
+        try:
+            if fn is None:
+                raise RuntimeError(f"No outbox handler for kind {job.kind!r}")
+            fn(db, job.payload)
+            error = None
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Outbox {job.kind} {job.id} failed (attempt {job.attempts}): {error}")
+        _finish(db, job.id, error, job.attempts)
+    for kind, group in batched.items():
+        _run_batch(db, kind, group)
+    return len(jobs)
+
+
+def run_forever(session_factory) -> None:
+    """Blocking worker loop for a dedicated process."""
+    while True:
+        db = session_factory()
+        try:
+            claimed = drain_once(db)
+        except Exception as e:
+            logger.error(f"Outbox drain failed: {e}")
+            claimed = 0
+        finally:
+            db.close()
+        if claimed < OUTBOX_BATCH_SIZE:
+            time.sleep(OUTBOX_POLL_SECONDS)
+
+
+async def drain_forever(session_factory) -> None:
+    """Same loop as a background task inside the API process."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+
+    def _tick() -> int:
+        db = session_factory()
+        try:
+            return drain_once(db)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            claimed = await asyncio.to_thread(_tick)
+        except Exception as e:
+            logger.error(f"Outbox drain failed: {e}")
+            claimed = 0
+        if claimed < OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
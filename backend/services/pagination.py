@@ -0,0 +1,88 @@
+# backend/services/pagination.py
+# ─────────────────────────────────────────────────────────────────────
+# Keyset (cursor) pagination over a (timestamp, id) ordering, newest first.
+#
+# OFFSET n makes Postgres walk and discard n rows, so deep pages get
+# slower the deeper you go. A keyset page instead starts right after the
+# last row the client saw:
+#
+#   WHERE created_at <= :t AND (created_at < :t OR id < :id)
+#   ORDER BY created_at DESC, id DESC LIMIT :n
+#
+# which is an index range scan on (…, created_at DESC) whatever the page.
+# Cursors are opaque to clients: base64url JSON of the direction and the
+# boundary row's (created_at, id). An empty page past a cursor still
+# returns a prev_cursor at the same boundary, so a client polling for
+# newer rows can keep asking with it until some arrive.
+# ─────────────────────────────────────────────────────────────────────
+
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    rows:        list
+    next_cursor: str | None    # older rows
+    prev_cursor: str | None    # newer rows
+
+
+def encode_cursor(direction: str, created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([direction, created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, created_at, row_id = json.loads(raw)
+        if direction not in ("next", "prev") or not isinstance(row_id, str):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(created_at), row_id
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset_paginate(query: Query, time_col, id_col, cursor: str | None, limit: int) -> Page:
+    """
+    One page of `query` ordered by (time_col, id_col) descending.
+    `query` must not already be ordered or limited.
+    """
+    direction, t, row_id = decode_cursor(cursor) if cursor else ("next", None, None)
+
+    if direction == "next":
+        if t is not None:
+            # The redundant `<=` gives the planner an index bound; the OR
+            # breaks ties between rows sharing a timestamp.
+            query = query.filter(time_col <= t, or_(time_col < t, and_(time_col == t, id_col < row_id)))
+        rows = query.order_by(time_col.desc(), id_col.desc()).limit(limit + 1).all()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        has_older, has_newer = more, t is not None
+    else:
+        query = query.filter(time_col >= t, or_(time_col > t, and_(time_col == t, id_col > row_id)))
+        rows = query.order_by(time_col.asc(), id_col.asc()).limit(limit + 1).all()
+        more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_older, has_newer = True, more
+
+    if not rows:
+        return Page(rows, None, encode_cursor("prev", t, row_id) if t is not None else None)
+
+    def _cursor(direction: str, row) -> str:
+        return encode_cursor(direction, getattr(row, time_col.key), getattr(row, id_col.key))
+
+    return Page(
+        rows,
+        _cursor("next", rows[-1]) if has_older else None,
+        _cursor("prev", rows[0]) if has_newer else None,
+    )
@@ -0,0 +1,212 @@
+# backend/services/rate_limit.py
+# ─────────────────────────────────────────────────────────────────────
+# One rate limiter for the whole API: GCRA (generic cell rate algorithm).
+#
+# Each key stores a single number — its theoretical arrival time (TAT).
+# A request is allowed if now >= TAT - burst tolerance, and then pushes
+# TAT forward by one emission interval. That's O(1) time and space per
+# key, with "N per period" behaving like a token bucket of size N.
+#
+#   backend 1 = Redis (REDIS_URL) — atomic Lua script, Redis clock,
+#               shared by every worker and node
+#   backend 2 = in-process TTLCache — used when Redis is unset or
+#               erroring; LRU-bounded, so memory stays flat
+#
+# Routes opt in with `dependencies=[Depends(rate_limit("20/minute"))]`;
+# key_func picks what is limited (client IP by default). Limits per
+# tenant (pixel, inbound webhooks) are applied with enforce() once the
+# route has resolved the brokerage server-side: a client-chosen API key
+# or id is never a bucket of its own, and unknown ones share their IP's
+# bucket. default_limit_middleware() applies a per-IP ceiling to every
+# request.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import math
+import time
+import logging
+import threading
+from typing import Callable, NamedTuple
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from backend.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL             = os.getenv("REDIS_URL", "")
+REDIS_PREFIX          = "lr:rl:"
+RATE_LIMIT_MAX_KEYS   = int(os.getenv("RATE_LIMIT_MAX_KEYS", "50000"))
+DEFAULT_RATE_LIMIT    = os.getenv("DEFAULT_RATE_LIMIT", "100/minute")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Rule(NamedTuple):
+    limit:  int
+    period: float       # seconds
+
+    @property
+    def interval(self) -> float:
+        """Emission interval: time one request 'costs'."""
+        return self.period / self.limit
+
+    @property
+    def tolerance(self) -> float:
+        """How far TAT may run ahead of now — allows a burst of `limit`."""
+        return self.period - self.interval
+
+
+def parse_rule(spec: str) -> Rule:
+    """'20/minute' -> Rule(20, 60)."""
+    count, _, unit = spec.partition("/")
+    return Rule(int(count), _PERIODS[unit.strip().rstrip("s")])
+
+
+DEFAULT_RULE = parse_rule(DEFAULT_RATE_LIMIT)
+
+
+# ─────────────────────────────────────────────
+# BACKENDS
+# ─────────────────────────────────────────────
+# KEYS[1] = bucket key; ARGV = interval_ms, tolerance_ms
+# Returns {allowed, retry_after_ms}
+_GCRA_LUA = """
+local t   = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local interval  = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+if now < tat - tolerance then
+    return {0, tat - tolerance - now}
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+_redis       = None
+_script      = None
+_sync_redis  = None
+_sync_script = None
+_local      = TTLCache(maxsize=RATE_LIMIT_MAX_KEYS, ttl=3600)
+_local_lock = threading.Lock()
+
+
+def _async_redis():
+    global _redis, _script
+    if REDIS_URL and _redis is None:
+        _redis = aioredis.Redis.from_url(
+            REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+        _script = _redis.register_script(_GCRA_LUA)
+    return _redis
+
+
+def _redis_sync():
+    global _sync_redis, _sync_script
+    if REDIS_URL and _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(
+            REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+        _sync_script = _sync_redis.register_script(_GCRA_LUA)
+    return _sync_redis
+
+
+def _hit_local(key: str, rule: Rule) -> tuple[bool, float]:
+    now = time.monotonic()
+    with _local_lock:
+        tat = max(_local.get(key, now), now)
+        if now < tat - rule.tolerance:
+            return False, tat - rule.tolerance - now
+        new_tat = tat + rule.interval
+        _local.set(key, new_tat, ttl=new_tat - now)
+        return True, 0.0
+
+
+async def hit(key: str, rule: Rule) -> tuple[bool, float]:
+    """Count one request against `key`. Returns (allowed, retry_after_seconds)."""
+    if _async_redis() is not None:
+        try:
+            allowed, retry_ms = await _script(
+                keys=[REDIS_PREFIX + key],
+                args=[max(1, int(rule.interval * 1000)), int(rule.tolerance * 1000)],
+            )
+            return bool(allowed), retry_ms / 1000
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter falling back to memory: {e}")
+    return _hit_local(key, rule)
+
+
+def hit_sync(key: str, rule: Rule) -> tuple[bool, float]:
+    """hit() for threads and sync workers (outbox handlers)."""
+    if _redis_sync() is not None:
+        try:
+            allowed, retry_ms = _sync_script(
+                keys=[REDIS_PREFIX + key],
+                args=[max(1, int(rule.interval * 1000)), int(rule.tolerance * 1000)],
+            )
+            return bool(allowed), retry_ms / 1000
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter falling back to memory: {e}")
+    return _hit_local(key, rule)
+
+
+# ─────────────────────────────────────────────
+# KEY FUNCTIONS
+# ─────────────────────────────────────────────
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def brokerage_or_ip(request: Request, brokerage_id: str | None) -> str:
+    """Key for a brokerage resolved server-side, else the client IP."""
+    return f"brokerage:{brokerage_id}" if brokerage_id else f"ip:{client_ip(request)}"
+
+
+# ─────────────────────────────────────────────
+# FASTAPI INTEGRATION
+# ─────────────────────────────────────────────
+def _too_many(rule: Rule, retry_after: float) -> dict:
+    return {
+        "status_code": 429,
+        "detail":      f"Too many requests. Max {rule.limit} per {int(rule.period)}s.",
+        "headers":     {"Retry-After": str(max(1, math.ceil(retry_after)))},
+    }
+
+
+async def enforce(bucket: str, key: str, rule: Rule) -> None:
+    """Count one request against `key` in `bucket`; 429 if over the limit."""
+    allowed, retry_after = await hit(f"{bucket}:{key}", rule)
+    if not allowed:
+        logger.warning(f"Rate limit hit: {key} on {bucket}")
+        raise HTTPException(**_too_many(rule, retry_after))
+
+
+def rate_limit(spec: str, key_func: Callable[[Request], str] = client_ip, scope: str | None = None):
+    """
+    Route dependency enforcing `spec` ("N/second|minute|hour|day").
+    Buckets are per route (or per `scope`, to share one between routes).
+    """
+    rule = parse_rule(spec)
+
+    async def _check(request: Request) -> None:
+        bucket = scope or getattr(request.scope.get("route"), "path", request.url.path)
+        await enforce(bucket, key_func(request), rule)
+
+    return _check
+
+
+async def default_limit_middleware(request: Request, call_next):
+    """Per-IP ceiling (DEFAULT_RATE_LIMIT) across all routes."""
+    if request.method == "OPTIONS":
+        return await call_next(request)
+    allowed, retry_after = await hit(f"default:{client_ip(request)}", DEFAULT_RULE)
+    if not allowed:
+        err = _too_many(DEFAULT_RULE, retry_after)
+        return JSONResponse(status_code=429, content={"detail": err["detail"]}, headers=err["headers"])
+    return await call_next(request)
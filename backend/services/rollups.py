@@ -0,0 +1,110 @@
+# backend/services/rollups.py
+# ─────────────────────────────────────────────────────────────────────
+# Daily lead counts per brokerage × bucket × source × campaign.
+#
+# lead_daily_rollups is bumped in the same transaction that inserts the
+# leads (see lead_store.persist_leads), so dashboards read a few hundred
+# pre-aggregated rows for a year of data instead of every lead.
+# lead_stats() answers any date range / granularity in one grouped query
+# on the table's primary key (brokerage_id, day, ...).
+# ─────────────────────────────────────────────────────────────────────
+
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+GRANULARITIES = ("day", "week", "month")
+BUCKETS       = ("HOT", "WARM", "COLD", "IGNORE")
+
+
+def rollup_key(lead) -> tuple:
+    payload = lead.input_payload or {}
+    day     = (lead.created_at or datetime.utcnow()).date()
+    return (
+        lead.brokerage_id, day, lead.bucket,
+        payload.get("source") or "", payload.get("campaign") or "",
+    )
+
+
+# ─────────────────────────────────────────────
+# WRITE PATH
+# ─────────────────────────────────────────────
+def adjust_rollups(db: Session, deltas: Counter) -> None:
+    """Apply {(brokerage_id, day, bucket, source, campaign): delta}. Does not commit."""
+    for (bid, day, bucket, source, campaign), n in deltas.items():
+        if not n:
+            continue
+        db.execute(text("""
+            INSERT INTO lead_daily_rollups (brokerage_id, day, bucket, source, campaign, lead_count)
+            VALUES (:bid, :day, :bucket, :source, :campaign, :n)
+            ON CONFLICT (brokerage_id, day, bucket, source, campaign)
+            DO UPDATE SET lead_count = lead_daily_rollups.lead_count + EXCLUDED.lead_count
+        """), {"bid": bid, "day": day, "bucket": bucket,
+               "source": source, "campaign": campaign, "n": n})
+
+
+def increment_rollups(db: Session, leads: list) -> None:
+    adjust_rollups(db, Counter(rollup_key(lead) for lead in leads))
+
+
+# ─────────────────────────────────────────────
+# READ PATH
+# ─────────────────────────────────────────────
+def lead_stats(
+    db: Session,
+    brokerage_id: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    granularity: str = "day",
+) -> dict:
+    """
+    Totals, per-bucket counts, per-source / per-campaign breakdowns and a
+    time series for [date_from, date_to), all from one grouped query.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+    rows = db.execute(text(f"""
+        SELECT date_trunc('{granularity}', day)::date AS period,
+               bucket, source, campaign,
+               SUM(lead_count) AS n
+        FROM lead_daily_rollups
+        WHERE brokerage_id = :bid
+          AND (CAST(:date_from AS DATE) IS NULL OR day >= :date_from)
+          AND (CAST(:date_to   AS DATE) IS NULL OR day <  :date_to)
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1
+    """), {"bid": brokerage_id, "date_from": date_from, "date_to": date_to}).fetchall()
+
+    totals      = Counter()
+    by_source   = {}
+    by_campaign = {}
+    series      = {}
+
+    for r in rows:
+        n = int(r.n)
+        totals[r.bucket] += n
+        for key, bucket_map in ((r.source or "unknown", by_source), (r.campaign or "none", by_campaign)):
+            entry = bucket_map.setdefault(key, {"total": 0, "hot": 0})
+            entry["total"] += n
+            if r.bucket == "HOT":
+                entry["hot"] += n
+        point = series.setdefault(r.period, {b.lower(): 0 for b in BUCKETS})
+        point[r.bucket.lower()] = point.get(r.bucket.lower(), 0) + n
+
+    return {
+        "total":       sum(totals.values()),
+        "hot":         totals["HOT"],
+        "warm":        totals["WARM"],
+        "cold":        totals["COLD"],
+        "ignored":     totals["IGNORE"],
+        "by_source":   by_source,
+        "by_campaign": by_campaign,
+        "granularity": granularity,
+        "series": [
+            {"period": period.isoformat(), "total": sum(counts.values()), **counts}
+            for period, counts in series.items()
+        ],
+    }
@@ -0,0 +1,218 @@
+# backend/services/scheduler.py
+# ─────────────────────────────────────────────────────────────────────
+# Per-tenant fair scheduling of OpenAI scoring calls.
+#
+#   analyze_lead_message_async ──► acquire(tenant, plan) ──► OpenAI
+#                                     │
+#                                     └─ past deadline ──► rules-only
+#
+# Every call that would hit OpenAI (cache misses only) asks for a slot.
+# Slots are granted by weighted fair queuing: each request gets a
+# virtual finish tag = max(virtual clock, tenant's last tag) + 1/weight
+# and the smallest tag goes next. One brokerage flooding /inbound only
+# lengthens its own queue; a team-plan tenant gets 10x the share of a
+# trial tenant when both are backlogged.
+#
+# A slot needs all of: a free concurrency slot (AI_MAX_CONCURRENCY), a
+# request from the RPM budget and an estimated token count from the TPM
+# budget. Budgets are per worker — the account-wide OpenAI limits
+# divided by WEB_CONCURRENCY. A request still queued after
+# SCORING_QUEUE_DEADLINE seconds is shed: the caller falls back to
+# rule-based scoring instead of waiting on OpenAI.
+#
+# Metrics (prometheus_client, per worker): queue depth, in-flight
+# calls, queue wait and shed counts, all labelled by plan.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+_WORKERS               = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+AI_MAX_CONCURRENCY     = int(os.getenv("AI_MAX_CONCURRENCY", "64"))
+OPENAI_RPM             = int(os.getenv("OPENAI_RPM", "5000")) / _WORKERS
+OPENAI_TPM             = int(os.getenv("OPENAI_TPM", "2000000")) / _WORKERS
+SCORING_QUEUE_DEADLINE = float(os.getenv("SCORING_QUEUE_DEADLINE", "8"))
+
+PLAN_WEIGHTS = {"trial": 1, "free": 1, "starter": 4, "team": 10}
+
+QUEUE_DEPTH = Gauge("scoring_queue_depth", "Scoring requests waiting for an OpenAI slot", ["plan"])
+IN_FLIGHT   = Gauge("scoring_in_flight", "OpenAI scoring calls in flight")
+QUEUE_WAIT  = Histogram(
+    "scoring_queue_wait_seconds", "Time from enqueue to dispatch or shed", ["plan", "outcome"],
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+SHED_TOTAL  = Counter("scoring_shed_total", "Scoring requests shed to rules-only", ["plan"])
+
+
+def _plan_label(plan: str | None) -> str:
+    plan = (plan or "trial").lower()
+    return plan if plan in PLAN_WEIGHTS else "trial"
+
+
+class _Budget:
+    """Continuously refilling allowance (per-minute rate, one minute of burst)."""
+
+    def __init__(self, per_minute: float):
+        self.rate     = per_minute / 60.0
+        self.capacity = per_minute
+        self.level    = per_minute
+        self.stamp    = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("tenant", "plan", "tokens", "enqueued", "future")
+
+    def __init__(self, tenant: str, plan: str, tokens: int, future: asyncio.Future):
+        self.tenant   = tenant
+        self.plan     = plan
+        self.tokens   = tokens
+        self.enqueued = time.monotonic()
+        self.future   = future
+
+
+class FairScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        rpm: float = OPENAI_RPM,
+        tpm: float = OPENAI_TPM,
+        deadline: float = SCORING_QUEUE_DEADLINE,
+    ):
+        self.max_concurrency = max_concurrency
+        self.deadline        = deadline
+        self._rpm            = _Budget(rpm)
+        self._tpm            = _Budget(tpm)
+        self._heap: list     = []           # (finish_tag, seq, ticket)
+        self._seq            = itertools.count()
+        self._vclock         = 0.0
+        self._last_tag: dict[str, float] = {}
+        self._in_flight      = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    # ── queueing ───────────────────────────────
+    def _finish_tag(self, tenant: str, plan: str) -> float:
+        start = max(self._vclock, self._last_tag.get(tenant, 0.0))
+        tag   = start + 1.0 / PLAN_WEIGHTS[plan]
+        self._last_tag[tenant] = tag
+        return tag
+
+    def _grant(self, ticket: _Ticket, tag: float) -> None:
+        self._in_flight += 1
+        IN_FLIGHT.set(self._in_flight)
+        self._rpm.take(1)
+        self._tpm.take(ticket.tokens)
+        self._vclock = max(self._vclock, tag)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._heap and self._in_flight < self.max_concurrency:
+            tag, _, ticket = self._heap[0]
+            if ticket.future.done():          # shed or cancelled while queued
+                heapq.heappop(self._heap)
+                continue
+            now  = time.monotonic()
+            wait = max(self._rpm.wait_for(1, now), self._tpm.wait_for(ticket.tokens, now))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._heap)
+            QUEUE_DEPTH.labels(ticket.plan).dec()
+            self._grant(ticket, tag)
+            ticket.future.set_result(True)
+
+        # Forget tags of tenants that have caught up with the clock
+        if not self._heap and len(self._last_tag) > 10_000:
+            self._last_tag = {t: v for t, v in self._last_tag.items() if v > self._vclock}
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        IN_FLIGHT.set(self._in_flight)
+        if self._heap and self._timer is None:
+            self._dispatch()
+
+    # ── public API ─────────────────────────────
+    @asynccontextmanager
+    async def slot(self, tenant: str | None, plan: str | None, tokens: int):
+        """
+        Yields True once an OpenAI call may proceed (the slot is released
+        on exit), or False if the request was shed past the deadline.
+        """
+        tenant = tenant or "anonymous"
+        plan   = _plan_label(plan)
+        now    = time.monotonic()
+
+        # Fast path: nothing queued, capacity and budget available
+        if (not self._heap and self._in_flight < self.max_concurrency
+                and self._rpm.wait_for(1, now) == 0 and self._tpm.wait_for(tokens, now) == 0):
+            self._grant(_Ticket(tenant, plan, tokens, None), self._finish_tag(tenant, plan))
+            QUEUE_WAIT.labels(plan, "dispatched").observe(0)
+            try:
+                yield True
+            finally:
+                self._release()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        ticket = _Ticket(tenant, plan, tokens, future)
+        heapq.heappush(self._heap, (self._finish_tag(tenant, plan), next(self._seq), ticket))
+        QUEUE_DEPTH.labels(plan).inc()
+        if self._timer is None:
+            self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.deadline)
+            granted = True
+        except asyncio.TimeoutError:
+            granted = future.done()           # granted in the same tick as the timeout
+            if not granted:
+                future.cancel()
+                QUEUE_DEPTH.labels(plan).dec()
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+                QUEUE_DEPTH.labels(plan).dec()
+            raise
+
+        waited = time.monotonic() - ticket.enqueued
+        if not granted:
+            QUEUE_WAIT.labels(plan, "shed").observe(waited)
+            SHED_TOTAL.labels(plan).inc()
+            logger.warning(f"Scoring shed to rules-only: tenant={tenant} plan={plan} waited={waited:.1f}s")
+            yield False
+            return
+
+        QUEUE_WAIT.labels(plan, "dispatched").observe(waited)
+        try:
+            yield True
+        finally:
+            self._release()
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, t in self._heap if not t.future.done())
+
+
+scheduler = FairScheduler()
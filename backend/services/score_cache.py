@@ -0,0 +1,140 @@
+# backend/services/score_cache.py
+# ─────────────────────────────────────────────────────────────────────
+# Content-addressed cache for AI scoring results.
+#
+# Forms, ad platforms and webhook retries resubmit identical lead text.
+# A hit returns the stored model output without an OpenAI round trip;
+# ai_engine still re-applies the (cheap, deterministic) rule signals.
+#
+#   key   = sha256(normalized sanitized message, industry, prompt version)
+#   tier1 = in-process LRU (TTLCache) — microsecond hits, per worker
+#   tier2 = Redis (optional, REDIS_URL) — shared across workers/nodes
+#
+# Redis is best-effort: any Redis error is logged and treated as a miss.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import copy
+import json
+import hashlib
+import logging
+
+import redis
+import redis.asyncio as aioredis
+
+from backend.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SCORE_CACHE_TTL     = int(os.getenv("SCORE_CACHE_TTL", "86400"))   # seconds
+SCORE_CACHE_MAXSIZE = int(os.getenv("SCORE_CACHE_MAXSIZE", "10000"))
+REDIS_URL           = os.getenv("REDIS_URL", "")
+REDIS_PREFIX        = "lr:score:"
+
+_local = TTLCache(maxsize=SCORE_CACHE_MAXSIZE, ttl=SCORE_CACHE_TTL)
+
+_redis_sync  = None
+_redis_async = None
+
+
+def _sync_redis():
+    global _redis_sync
+    if REDIS_URL and _redis_sync is None:
+        _redis_sync = redis.Redis.from_url(
+            REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+    return _redis_sync
+
+
+def _async_redis():
+    global _redis_async
+    if REDIS_URL and _redis_async is None:
+        _redis_async = aioredis.Redis.from_url(
+            REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+    return _redis_async
+
+
+# ─────────────────────────────────────────────
+# KEYING
+# ─────────────────────────────────────────────
+def normalize_message(message: str) -> str:
+    """Collapse whitespace and case so trivially different resubmits share a key."""
+    return " ".join(message.split()).casefold()
+
+
+def cache_key(message: str, industry: str, prompt_version: str) -> str:
+    raw = json.dumps([normalize_message(message), industry, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────────
+# SYNC API (used by analyze_lead_message)
+# ─────────────────────────────────────────────
+def get(key: str) -> dict | None:
+    hit = _local.get(key)
+    if hit is not None:
+        return copy.deepcopy(hit)
+
+    r = _sync_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(REDIS_PREFIX + key)
+    except redis.RedisError as e:
+        logger.warning(f"Score cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+
+    result = json.loads(raw)
+    _local.set(key, result)
+    return copy.deepcopy(result)
+
+
+def put(key: str, result: dict) -> None:
+    _local.set(key, copy.deepcopy(result))
+
+    r = _sync_redis()
+    if r is None:
+        return
+    try:
+        r.set(REDIS_PREFIX + key, json.dumps(result), ex=SCORE_CACHE_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"Score cache write failed: {e}")
+
+
+# ─────────────────────────────────────────────
+# ASYNC API (used by analyze_lead_message_async)
+# ─────────────────────────────────────────────
+async def aget(key: str) -> dict | None:
+    hit = _local.get(key)
+    if hit is not None:
+        return copy.deepcopy(hit)
+
+    r = _async_redis()
+    if r is None:
+        return None
+    try:
+        raw = await r.get(REDIS_PREFIX + key)
+    except redis.RedisError as e:
+        logger.warning(f"Score cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+
+    result = json.loads(raw)
+    _local.set(key, result)
+    return copy.deepcopy(result)
+
+
+async def aput(key: str, result: dict) -> None:
+    _local.set(key, copy.deepcopy(result))
+
+    r = _async_redis()
+    if r is None:
+        return
+    try:
+        await r.set(REDIS_PREFIX + key, json.dumps(result), ex=SCORE_CACHE_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"Score cache write failed: {e}")
@@ -0,0 +1,173 @@
+# backend/services/usage.py
+# ─────────────────────────────────────────────────────────────────────
+# Monthly lead-usage counters for quota checks.
+#
+# Instead of COUNT(*) over lead_scores on every request, each brokerage
+# has one brokerage_monthly_usage row per month, incremented in the same
+# transaction that inserts its leads (see lead_store.persist_leads).
+# Reads are a primary-key lookup behind a short-TTL in-process cache.
+# Bulk endpoints reserve_usage() up front — an atomic conditional
+# increment — and settle the reservation when the leads are saved.
+# reconcile_usage() corrects the counters from lead_scores if they ever
+# drift (manual deletes, restored backups, ...).
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import logging
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PLAN_LIMITS     = {"trial": 50, "starter": 1000, "team": 5000, "free": 50}
+USAGE_CACHE_TTL = float(os.getenv("USAGE_CACHE_TTL", "5"))
+
+_usage_cache = TTLCache(maxsize=10000, ttl=USAGE_CACHE_TTL)
+
+
+def current_period() -> date:
+    """First day of the current month, UTC."""
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+def plan_limit(plan: str | None) -> int:
+    return PLAN_LIMITS.get((plan or "trial").lower(), PLAN_LIMITS["trial"])
+
+
+# ─────────────────────────────────────────────
+# WRITE PATH
+# ─────────────────────────────────────────────
+def increment_usage(db: Session, counts: dict[str, int]) -> None:
+    """
+    Add `counts` (brokerage_id -> new leads) to this month's counters.
+    Runs inside the caller's transaction — does not commit.
+    """
+    period = current_period()
+    for brokerage_id, n in counts.items():
+        db.execute(text("""
+            INSERT INTO brokerage_monthly_usage (brokerage_id, period, lead_count, updated_at)
+            VALUES (:bid, :period, :n, NOW())
+            ON CONFLICT (brokerage_id, period)
+            DO UPDATE SET lead_count = brokerage_monthly_usage.lead_count + EXCLUDED.lead_count,
+                          updated_at = NOW()
+        """), {"bid": brokerage_id, "period": period, "n": n})
+
+
+def reserve_usage(db: Session, brokerage_id: str, n: int, limit: int) -> bool:
+    """
+    Count `n` leads against this month's quota before scoring them.
+    The check and the increment are one statement, so concurrent
+    batches can't both pass it. Commits. Returns False (nothing
+    reserved) if usage + n would exceed `limit`. Settle it with
+    persist_leads(..., reserved=...) or release_usage().
+    """
+    if n > limit:
+        return False
+    period = current_period()
+    row = db.execute(text("""
+        INSERT INTO brokerage_monthly_usage (brokerage_id, period, lead_count, updated_at)
+        VALUES (:bid, :period, :n, NOW())
+        ON CONFLICT (brokerage_id, period)
+        DO UPDATE SET lead_count = brokerage_monthly_usage.lead_count + EXCLUDED.lead_count,
+                      updated_at = NOW()
+        WHERE brokerage_monthly_usage.lead_count + EXCLUDED.lead_count <= :limit
+        RETURNING lead_count
+    """), {"bid": brokerage_id, "period": period, "n": n, "limit": limit}).fetchone()
+    db.commit()
+    if row is None:
+        return False
+    _usage_cache.set((brokerage_id, period), row.lead_count)
+    return True
+
+
+def release_usage(db: Session, brokerage_id: str, n: int) -> None:
+    """Give back `n` reserved leads that won't be saved. Commits."""
+    increment_usage(db, {brokerage_id: -n})
+    db.commit()
+    note_committed({brokerage_id: -n})
+
+
+def note_committed(counts: dict[str, int]) -> None:
+    """Bump cached values after the increments above have committed."""
+    period = current_period()
+    for brokerage_id, n in counts.items():
+        key    = (brokerage_id, period)
+        cached = _usage_cache.get(key)
+        if cached is not None:
+            _usage_cache.set(key, cached + n)
+
+
+# ─────────────────────────────────────────────
+# READ PATH
+# ─────────────────────────────────────────────
+def get_monthly_usage(db: Session, brokerage_id: str) -> int:
+    key    = (brokerage_id, current_period())
+    cached = _usage_cache.get(key)
+    if cached is not None:
+        return cached
+
+    usage = db.execute(text("""
+        SELECT lead_count FROM brokerage_monthly_usage
+        WHERE brokerage_id = :bid AND period = :period
+    """), {"bid": brokerage_id, "period": key[1]}).scalar() or 0
+
+    _usage_cache.set(key, usage)
+    return usage
+
+
+def forget_brokerage(brokerage_id: str) -> None:
+    _usage_cache.invalidate_where(lambda key, _: key[0] == brokerage_id)
+
+
+# ─────────────────────────────────────────────
+# RECONCILIATION
+# ─────────────────────────────────────────────
+def reconcile_usage(db: Session, period: date | None = None) -> int:
+    """
+    Correct every counter for `period` (default: this month) against
+    lead_scores. The lead counts and the counters are read in one
+    statement snapshot, and only the difference is applied
+    (lead_count + drift), so increments committed after the snapshot
+    are kept instead of being overwritten. Brokerages whose leads were
+    all deleted drift to 0. A batch reservation still being scored
+    looks like drift too; it is off by at most that batch until the
+    next run. Returns the number of counters corrected.
+    """
+    period = period or current_period()
+    try:
+        written = db.execute(text("""
+            WITH actual AS (
+                SELECT brokerage_id, COUNT(*) AS n
+                FROM lead_scores
+                WHERE created_at >= :period
+                  AND created_at <  (:period + INTERVAL '1 month')
+                GROUP BY brokerage_id
+            ), counted AS (
+                SELECT brokerage_id, lead_count
+                FROM brokerage_monthly_usage
+                WHERE period = :period
+            ), drift AS (
+                SELECT brokerage_id, COALESCE(a.n, 0) - COALESCE(c.lead_count, 0) AS delta
+                FROM actual a FULL JOIN counted c USING (brokerage_id)
+            )
+            INSERT INTO brokerage_monthly_usage (brokerage_id, period, lead_count, updated_at)
+            SELECT brokerage_id, :period, delta, NOW()
+            FROM drift
+            WHERE delta <> 0
+            ON CONFLICT (brokerage_id, period)
+            DO UPDATE SET lead_count = brokerage_monthly_usage.lead_count + EXCLUDED.lead_count,
+                          updated_at = NOW()
+        """), {"period": period}).rowcount
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    _usage_cache.clear()
+    logger.info(f"Usage reconciled for {period}: {written} counters corrected")
+    return written
@@ -0,0 +1,94 @@
+# backend/test_auth.py
+# ─────────────────────────────────────────────────────────────────────
+# get_current_user's principal cache: hits skip the DB, but never serve
+# a token past its `exp`. And account deletion leaves no per-brokerage
+# rows behind.
+# ─────────────────────────────────────────────────────────────────────
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from backend.routes import auth
+
+
+class FakeSession:
+    def __init__(self):
+        self.info    = {}
+        self.lookups = 0
+
+    def in_transaction(self):
+        return False
+
+    def query(self, model):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        self.lookups += 1
+        return SimpleNamespace(id="u-1", brokerage_id="b-1", email="a@b.co")
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(auth, "_principal_cache", auth.TTLCache(maxsize=100, ttl=auth.PRINCIPAL_CACHE_TTL))
+    return auth._principal_cache
+
+
+def _token(**claims) -> str:
+    return "Bearer " + jwt.encode({"sub": "a@b.co", "brokerage_id": "b-1", **claims},
+                                  auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+
+
+def test_cache_hit_skips_the_lookup():
+    db, token = FakeSession(), _token()
+    assert auth.get_current_user(token, db)["brokerage_id"] == "b-1"
+    assert auth.get_current_user(token, db)["email"] == "a@b.co"
+    assert db.lookups == 1
+
+
+def test_cache_hit_rejects_an_expired_token(monkeypatch):
+    db, now = FakeSession(), time.time()
+    token   = _token(exp=int(now) + 30)
+    auth.get_current_user(token, db)
+
+    monkeypatch.setattr(auth.time, "time", lambda: now + 31)
+    with pytest.raises(HTTPException) as e:
+        auth.get_current_user(token, db)
+    assert e.value.status_code == 401
+    assert db.lookups == 1
+
+
+def test_cache_entry_ttl_is_capped_at_exp(cache):
+    token = _token(exp=int(time.time()) + 5)
+    auth.get_current_user(token, FakeSession())
+
+    (expires_at, principal), = cache._data.values()
+    assert expires_at - time.monotonic() <= 5
+    assert principal["exp"] is not None
+
+
+class RecordingSession:
+    def __init__(self):
+        self.deleted = []
+
+    def execute(self, stmt, params):
+        self.deleted.append(str(stmt).split()[2])       # DELETE FROM <table> ...
+
+    def commit(self):
+        pass
+
+
+def test_delete_account_clears_every_brokerage_table(monkeypatch):
+    for name in ("forget_brokerage", "invalidate_brokerage_keys", "invalidate_principals"):
+        monkeypatch.setattr(auth, name, lambda *args, **kwargs: None)
+    db = RecordingSession()
+
+    assert auth.delete_account({"brokerage_id": "b-1", "email": "a@b.co"}, db) == {"status": "deleted"}
+    assert {"lead_scores", "outbox", "lead_daily_rollups", "mailboxes", "inbound_emails"} <= set(db.deleted)
+    assert db.deleted[-1] == "brokerages"
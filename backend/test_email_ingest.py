@@ -0,0 +1,301 @@
+# backend/test_email_ingest.py
+# ─────────────────────────────────────────────────────────────────────
+# MailboxWorker.drain against an in-memory IMAP server: UID high-water
+# mark, repeat searches, mail that arrives mid-drain, and plus-address
+# routing. Plus the mailbox refresh loop and the legacy env mailbox.
+# ─────────────────────────────────────────────────────────────────────
+
+import re
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import email_ingest
+from backend.services.email_ingest import MailboxConfig, MailboxWorker
+
+
+def _ok(lines=()):
+    return SimpleNamespace(result="OK", lines=list(lines))
+
+
+def _raw(to: str, subject: str, body: str, cc: str = "") -> tuple[bytes, bytes]:
+    headers = f"From: Buyer <buyer@example.com>\r\nTo: {to}\r\n"
+    if cc:
+        headers += f"Cc: {cc}\r\n"
+    headers += f"Subject: {subject}\r\n\r\n"
+    return headers.encode(), body.encode()
+
+
+class FakeIMAP:
+    """Just enough of aioimaplib for drain(): UID SEARCH/FETCH/STORE and NOOP."""
+
+    def __init__(self):
+        self.messages: dict[int, tuple[bytes, bytes]] = {}
+        self.seen:     set[int] = set()
+        self.next_uid  = 1
+        self.reported  = 0          # message count last announced with EXISTS
+        self.searches: list[str] = []
+        self.on_command = None      # hook(name) to deliver mail mid-drain
+
+    def deliver(self, to="leads@agency.com", subject="Hi", body="Looking for a 2BHK", cc=""):
+        self.messages[self.next_uid] = _raw(to, subject, body, cc)
+        self.next_uid += 1
+
+    def _hook(self, name):
+        if self.on_command:
+            self.on_command(name)
+
+    async def uid_search(self, criteria, charset=None):
+        self._hook("search")
+        self.searches.append(criteria)
+        if criteria == "UNSEEN":
+            uids = [u for u in self.messages if u not in self.seen]
+        else:
+            low  = int(re.match(r"UID (\d+):\*", criteria).group(1))
+            uids = [u for u in self.messages if u >= low]
+            if self.messages:
+                uids.append(max(self.messages))     # n:* always matches the newest
+        return _ok([" ".join(map(str, sorted(set(uids)))).encode()])
+
+    async def uid(self, command, uid_set, *args):
+        self._hook(command)
+        uids = [int(u) for u in uid_set.split(",")]
+        if command == "store":
+            self.seen.update(uids)
+            return _ok()
+        lines = []
+        for i, u in enumerate(uids, 1):
+            headers, body = self.messages[u]
+            lines += [
+                f"{i} FETCH (UID {u} BODY[HEADER.FIELDS (FROM TO CC)] {{{len(headers)}}}".encode(), headers,
+                f" BODY[TEXT]<0> {{{len(body)}}}".encode(), body,
+                b")",
+            ]
+        return _ok(lines)
+
+    async def noop(self):
+        self._hook("noop")
+        lines = []
+        if len(self.messages) != self.reported:
+            self.reported = len(self.messages)
+            lines.append(f"{self.reported} EXISTS".encode())
+        return _ok(lines + [b"NOOP completed."])
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """score_and_store stub: records (uids, brokerage ids, high-water mark) per batch."""
+    calls = []
+
+    async def fake_store(routed, sem, mailbox_id, last_uid):
+        calls.append(([m.uid for m, _ in routed], [bid for _, bid in routed], last_uid))
+        return len(routed)
+
+    monkeypatch.setattr(email_ingest, "score_and_store", fake_store)
+    return calls
+
+
+def _worker(imap: FakeIMAP, brokerage_id: str | None = "b-1", last_uid: int = 0) -> MailboxWorker:
+    box = MailboxConfig(id="m-1", host="imap.test", username="leads@agency.com", password_env="X",
+                        brokerage_id=brokerage_id, uid_validity=1, last_uid=last_uid)
+    worker = MailboxWorker(box, asyncio.Semaphore(4), asyncio.Semaphore(1))
+    worker._imap = imap
+    return worker
+
+
+# ─────────────────────────────────────────────
+# UID HIGH-WATER MARK
+# ─────────────────────────────────────────────
+def test_drain_fetches_in_batches_and_advances_last_uid(monkeypatch, stored):
+    monkeypatch.setattr(email_ingest, "IMAP_FETCH_BATCH", 2)
+    imap = FakeIMAP()
+    for _ in range(5):
+        imap.deliver()
+    worker = _worker(imap)
+
+    assert asyncio.run(worker.drain()) == 5
+    assert [c[2] for c in stored] == [2, 4, 5]          # mark saved with each batch
+    assert worker.last_uid == 5
+    assert imap.seen == {1, 2, 3, 4, 5}
+    assert imap.searches[0] == "UNSEEN"                  # first run of a box
+
+
+def test_drain_resumes_after_the_mark_and_ignores_the_newest_match(stored):
+    imap = FakeIMAP()
+    for _ in range(3):
+        imap.deliver()
+    worker = _worker(imap, last_uid=3)
+
+    assert asyncio.run(worker.drain()) == 0             # "4:*" still matches UID 3
+    assert imap.searches[0] == "UID 4:*"
+    assert stored == []
+
+    imap.deliver()
+    assert asyncio.run(worker.drain()) == 1
+    assert stored[-1][0] == [4] and worker.last_uid == 4
+
+
+# ─────────────────────────────────────────────
+# MAIL ARRIVING MID-DRAIN
+# ─────────────────────────────────────────────
+def test_mail_arriving_during_a_fetch_is_picked_up_by_the_repeat_search(stored):
+    imap = FakeIMAP()
+    imap.deliver()
+    worker = _worker(imap)
+
+    def on_command(name):
+        if name == "fetch" and imap.next_uid == 2:
+            imap.deliver()
+
+    imap.on_command = on_command
+    assert asyncio.run(worker.drain()) == 2
+    assert worker.last_uid == 2
+
+
+def test_mail_arriving_after_the_last_search_is_seen_by_the_noop(stored):
+    imap = FakeIMAP()
+    imap.deliver()
+    imap.reported = 1
+    worker = _worker(imap, last_uid=1)
+
+    def on_command(name):
+        # Lands between the empty search and IDLE
+        if name == "noop" and imap.next_uid == 2:
+            imap.deliver()
+
+    imap.on_command = on_command
+    assert asyncio.run(worker.drain()) == 1
+    assert worker.last_uid == 2
+
+
+# ─────────────────────────────────────────────
+# ROUTING
+# ─────────────────────────────────────────────
+def _parsed(to: str, cc: str = "", delivered_to: str = ""):
+    headers, body = _raw(to, "Hi", "Need a flat", cc)
+    if delivered_to:
+        headers = f"Delivered-To: {delivered_to}\r\n".encode() + headers
+    lines = [f"1 FETCH (UID 9 BODY[HEADER.FIELDS (TO)] {{{len(headers)}}}".encode(), headers,
+             f" BODY[TEXT]<0> {{{len(body)}}}".encode(), body, b")"]
+    return email_ingest.parse_fetch(lines)[0]
+
+
+def test_parse_fetch_reads_every_recipient():
+    mail = _parsed('"Sales" <sales@agency.com>, leads+b-7@agency.com', cc="Ops <ops+x@agency.com>",
+                   delivered_to="leads+b-7@agency.com")
+    assert mail.to == ["sales@agency.com", "leads+b-7@agency.com", "ops+x@agency.com", "leads+b-7@agency.com"]
+    assert mail.sender == "buyer@example.com" and mail.uid == 9
+
+
+@pytest.mark.parametrize("to, cc, expected", [
+    ("leads+b-1@agency.com", "", "b-1"),
+    ("Agent <agent@agency.com>, leads+b-2@agency.com", "", "b-2"),    # second address in To
+    ("agent@agency.com", "leads+b-3@agency.com", "b-3"),               # only in Cc
+    ("leads+b-4@elsewhere.com", "", None),                             # other domain
+    ("leads@agency.com", "", None),                                    # no plus-tag
+])
+def test_shared_box_routes_by_plus_address(to, cc, expected):
+    assert _worker(FakeIMAP(), brokerage_id=None).route(_parsed(to, cc)) == expected
+
+
+def test_dedicated_box_takes_everything():
+    assert _worker(FakeIMAP(), brokerage_id="b-9").route(_parsed("someone@else.com")) == "b-9"
+
+
+def test_unroutable_mail_is_logged_and_passed_over(stored, caplog):
+    imap = FakeIMAP()
+    imap.deliver(to="leads+b-1@agency.com")
+    imap.deliver(to="nobody@agency.com")
+    imap.deliver(to="x@y.com", cc="leads+b-2@agency.com")
+    worker = _worker(imap, brokerage_id=None)
+
+    with caplog.at_level("INFO"):
+        assert asyncio.run(worker.drain()) == 2
+
+    assert stored == [([1, 3], ["b-1", "b-2"], 3)]
+    assert worker.last_uid == 3                          # mark moves past the unroutable one
+    warnings = [r.message for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1 and "UID 2" in warnings[0]
+    assert "3 emails, 2 leads saved, 1 unroutable" in caplog.text
+
+
+# ─────────────────────────────────────────────
+# MAILBOX REFRESH
+# ─────────────────────────────────────────────
+def _box(host="imap.test", password_env="BOX_PASS", box_id="m-1") -> MailboxConfig:
+    return MailboxConfig(id=box_id, host=host, username="leads@agency.com", password_env=password_env,
+                         brokerage_id=None, uid_validity=None, last_uid=0)
+
+
+def test_refresh_survives_errors_and_restarts_changed_boxes(monkeypatch):
+    monkeypatch.setenv("BOX_PASS", "x")
+    monkeypatch.setenv("OTHER_PASS", "y")
+    monkeypatch.setattr(email_ingest, "MAILBOX_REFRESH_SECONDS", 0)
+
+    refreshes = [
+        [_box()],
+        RuntimeError("db down"),
+        [_box()],                               # unchanged: same worker
+        [_box(host="imap.other")],              # host changed: restart
+        [_box(host="imap.other", password_env="OTHER_PASS")],
+        [],                                     # removed: stopped
+    ]
+    started, cancelled = [], []
+    done = asyncio.Event()
+
+    def fake_load():
+        if not refreshes:
+            done.set()
+            return []
+        item = refreshes.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def fake_run(self):
+        started.append(self.box.connection)
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append(self.box.connection)
+            raise
+
+    monkeypatch.setattr(email_ingest, "load_mailboxes", fake_load)
+    monkeypatch.setattr(MailboxWorker, "run", fake_run)
+
+    async def go():
+        task = asyncio.create_task(email_ingest.run_mailboxes())
+        await asyncio.wait_for(done.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+    asyncio.run(go())
+
+    assert [c[0] for c in started] == ["imap.test", "imap.other", "imap.other"]
+    assert [c[2] for c in started] == ["BOX_PASS", "BOX_PASS", "OTHER_PASS"]
+    assert cancelled == started
+
+
+class _EnvMailboxSession:
+    def __init__(self, brokerages):
+        self.brokerages = brokerages
+        self.inserted   = None
+
+    def execute(self, stmt, params):
+        if "FROM brokerages" in str(stmt):
+            return SimpleNamespace(first=lambda: (1,) if params["bid"] in self.brokerages else None)
+        self.inserted = params
+
+    def commit(self):
+        pass
+
+
+@pytest.mark.parametrize("brokerages, expected", [({"b-1"}, "b-1"), (set(), None)])
+def test_env_mailbox_only_links_an_existing_brokerage(monkeypatch, brokerages, expected):
+    monkeypatch.setattr(email_ingest, "EMAIL_USER", "leads+b-1@agency.com")
+    db = _EnvMailboxSession(brokerages)
+    email_ingest._ensure_env_mailbox(db)
+    assert db.inserted["bid"] == expected
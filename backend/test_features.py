@@ -0,0 +1,78 @@
+# backend/test_features.py
+# ─────────────────────────────────────────────────────────────────────
+# ml.features .npy output: the memmap is sized from an upper bound on
+# the CSV's rows and trimmed to the rows actually parsed; raw features
+# read from free-text leads for retraining.
+# ─────────────────────────────────────────────────────────────────────
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.features import (
+    FEATURE_COLUMNS, NPY_COLUMNS, RAW_COLUMNS, RAW_DEFAULTS, TARGET_COLUMN,
+    build_features, feature_matrix, raw_from_records, record_from_lead, transform,
+)
+
+
+def _leads(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df  = pd.DataFrame({c: rng.integers(0, 50, n) for c in RAW_COLUMNS})
+    df[TARGET_COLUMN] = rng.integers(0, 2, n)
+    return df
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("blank_lines", [0, 7])
+def test_npy_has_exactly_the_parsed_rows(tmp_path, trailing_newline, blank_lines):
+    leads = _leads(1000)
+    csv   = leads.to_csv(index=False, lineterminator="\n") + "\n" * blank_lines
+    if not trailing_newline:
+        csv = csv.rstrip("\n")
+    src, dst = tmp_path / "leads.csv", tmp_path / "features.npy"
+    src.write_text(csv)
+
+    assert build_features(str(src), str(dst), chunk_size=300) == len(leads)
+
+    out = np.load(dst, mmap_mode="r")
+    assert out.shape == (len(leads), len(NPY_COLUMNS))
+    expected = transform(leads).reindex(columns=NPY_COLUMNS).to_numpy(np.float32)
+    np.testing.assert_array_equal(out, expected)
+
+
+# ─────────────────────────────────────────────
+# Free-text leads
+# ─────────────────────────────────────────────
+@pytest.mark.parametrize("message, expected", [
+    ("Need a 3BHK, budget 50 lakhs, loan approved, want to move this week",
+     {"budget": 5_000_000, "urgency": 7, "bedrooms": 3, "preapproved": 1}),
+    ("Looking for a 2 bedroom condo around $750,000, can we schedule a visit?",
+     {"budget": 750_000, "bedrooms": 2, "open_house": 1}),
+    ("Budget 1.2 crore, buying in 3 months", {"budget": 12_000_000, "urgency": 90}),
+    ("Want to buy in 2 weeks, pre-approved", {"urgency": 14, "preapproved": 1}),
+    ("just browsing for now", {"urgency": 90}),
+    ("call me on 9876543210", {}),
+])
+def test_record_from_lead_reads_the_message(message, expected):
+    record = record_from_lead({"message": message})
+    assert set(record) == set(RAW_COLUMNS)
+    assert {k: v for k, v in record.items() if v is not None} == expected
+
+
+def test_record_from_lead_prefers_structured_fields_and_uses_signals():
+    record = record_from_lead({
+        "message":  "Interested, budget $900k",
+        "budget":   400000,
+        "views":    12,
+        "entities": {"rule_signals": ["hot_signal:urgent"]},
+    })
+    assert record["budget"] == 400000 and record["views"] == 12
+    assert record["urgency"] == 30
+
+
+def test_free_text_leads_make_a_feature_matrix():
+    leads = [{"message": "3bhk, budget 80 lakhs, ready to buy"}, {"message": "hi"}]
+    X = feature_matrix(raw_from_records([record_from_lead(p) for p in leads]))
+    assert X.shape == (2, len(FEATURE_COLUMNS))
+    assert X[0, FEATURE_COLUMNS.index("buyer_readiness_score")] == 60     # budget + urgency
+    assert X[1, FEATURE_COLUMNS.index("urgency")] == RAW_DEFAULTS["urgency"]
@@ -0,0 +1,172 @@
+# backend/test_inbound_email.py
+# ─────────────────────────────────────────────────────────────────────
+# The "resend_inbound" outbox handler: emails are scored through the
+# per-tenant scheduler with their brokerage and plan, an email that was
+# already saved is never fetched, scored or saved again, and any To / Cc
+# inbound plus-address routes it.
+# ─────────────────────────────────────────────────────────────────────
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import inbound_email, outbox
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeSession:
+    """inbound_emails and brokerages held in memory; just the statements the handler runs."""
+
+    def __init__(self, saved=(), brokerages=None):
+        self.saved      = set(saved)
+        self.brokerages = brokerages or {"b-1": ("real_estate", "team")}
+        self.commits    = 0
+
+    def execute(self, stmt, params):
+        sql = str(stmt)
+        if "FROM inbound_emails" in sql:
+            return _Result([SimpleNamespace(email_id=i) for i in params["ids"] if i in self.saved])
+        if "INSERT INTO inbound_emails" in sql:
+            if params["email_id"] in self.saved:
+                return _Result([])
+            self.saved.add(params["email_id"])
+            return _Result([SimpleNamespace(email_id=params["email_id"])])
+        if "FROM brokerages" in sql:
+            return _Result([SimpleNamespace(id=b, industry=ind, plan=plan)
+                            for b, (ind, plan) in self.brokerages.items() if b in params["ids"]])
+        raise AssertionError(sql)
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def world(monkeypatch):
+    """Fake Resend, scorer and persist_leads; records what each was asked to do."""
+    w = SimpleNamespace(emails={}, fetched=[], scored=[], persisted=[], loops=set())
+
+    def fetch(email_id):
+        w.fetched.append(email_id)
+        return w.emails.get(email_id)
+
+    async def score(message, industry, tenant=None, plan=None):
+        w.loops.add(id(asyncio.get_running_loop()))
+        w.scored.append((message.split("\n")[0], industry, tenant, plan))
+        return {"is_lead": True, "urgency_score": 60, "prompt_version": "v1", "entities": {}}
+
+    monkeypatch.setattr(inbound_email, "fetch_email", fetch)
+    monkeypatch.setattr(inbound_email, "analyze_lead_message_async", score)
+    monkeypatch.setattr(inbound_email, "persist_leads", lambda db, leads: w.persisted.extend(leads))
+    return w
+
+
+def _email(subject: str, to: str = "leads+b-1@leadrankerai.com") -> dict:
+    return {"from": "buyer@example.com", "to": [to], "subject": subject, "text": "Need a 3BHK"}
+
+
+def test_scores_through_the_scheduler_with_brokerage_and_plan(world):
+    world.emails = {"e1": _email("one"), "e2": _email("two")}
+    errors = inbound_email.process_inbound_emails(FakeSession(), [{"email_id": "e1"}, {"email_id": "e2"}])
+
+    assert errors == [None, None]
+    assert world.scored == [("one", "real_estate", "b-1", "team"), ("two", "real_estate", "b-1", "team")]
+    assert len(world.loops) == 1                        # both on the worker's loop
+    assert [lead.input_payload["email_id"] for lead in world.persisted] == ["e1", "e2"]
+
+
+def test_already_saved_emails_are_skipped(world):
+    world.emails = {"e1": _email("one"), "e2": _email("two")}
+    db = FakeSession()
+    inbound_email.process_inbound_emails(db, [{"email_id": "e1"}])
+
+    # e1 comes round again, e.g. its lease ran out after the commit
+    errors = inbound_email.process_inbound_emails(db, [{"email_id": "e1"}, {"email_id": "e2"}])
+    assert errors == [None, None]
+    assert world.fetched == ["e1", "e2"]
+    assert [lead.input_payload["email_id"] for lead in world.persisted] == ["e1", "e2"]
+
+
+def test_email_saved_by_a_concurrent_run_is_dropped(world):
+    world.emails = {"e1": _email("one")}
+
+    class Racing(FakeSession):
+        def execute(self, stmt, params):
+            result = super().execute(stmt, params)
+            if "FROM inbound_emails" in str(stmt):
+                self.saved.add("e1")                    # another worker commits it meanwhile
+            return result
+
+    inbound_email.process_inbound_emails(Racing(), [{"email_id": "e1"}])
+    assert world.scored and world.persisted == []
+
+
+def test_fetch_errors_retry_only_that_email(world, monkeypatch):
+    world.emails = {"e2": _email("two")}
+
+    def flaky(email_id):
+        return (None, "HTTPStatusError: 503") if email_id == "e1" else (world.emails[email_id], None)
+
+    monkeypatch.setattr(inbound_email, "_fetch_or_error", flaky)
+    errors = inbound_email.process_inbound_emails(FakeSession(), [{"email_id": "e1"}, {"email_id": "e2"}])
+    assert errors == ["HTTPStatusError: 503", None]
+    assert [lead.input_payload["email_id"] for lead in world.persisted] == ["e2"]
+
+
+def test_unknown_brokerage_is_not_scored(world):
+    world.emails = {"e1": _email("one", to="leads+b-404@leadrankerai.com")}
+    assert inbound_email.process_inbound_emails(FakeSession(), [{"email_id": "e1"}]) == [None]
+    assert world.scored == [] and world.persisted == []
+
+
+# ─────────────────────────────────────────────
+# ROUTING
+# ─────────────────────────────────────────────
+@pytest.mark.parametrize("to, cc, expected", [
+    (["leads+b-1@leadrankerai.com"], None, "b-1"),
+    ("Leads <leads+b-2@LeadRankerAI.com>", None, "b-2"),                      # display name, a string
+    (["agent@agency.com", "leads+b-3@leadrankerai.com"], None, "b-3"),         # second recipient
+    (["agent@agency.com"], ["Ops <leads+b-4@leadrankerai.com>"], "b-4"),        # only in Cc
+    (["leads+b-5@other.com"], None, None),                                     # other domain
+    (["leads@leadrankerai.com"], None, None),                                  # no plus-tag
+    ([], None, None),
+])
+def test_route_uses_the_first_inbound_recipient(to, cc, expected):
+    assert inbound_email._route("e1", {"to": to, "cc": cc}) == expected
+
+
+def test_unroutable_email_is_logged_and_done(world, caplog):
+    world.emails = {"e1": _email("one", to="someone@other.com")}
+    assert inbound_email.process_inbound_emails(FakeSession(), [{"email_id": "e1"}]) == [None]
+    assert world.scored == []
+    assert "e1" in caplog.text and "not saved" in caplog.text
+
+
+# ─────────────────────────────────────────────
+# outbox.run_async
+# ─────────────────────────────────────────────
+def test_run_async_uses_the_api_loop_under_drain_forever(monkeypatch):
+    async def where():
+        return asyncio.get_running_loop()
+
+    async def go():
+        monkeypatch.setattr(outbox, "_loop", asyncio.get_running_loop())
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(loop=outbox.run_async(where())))
+        worker.start()
+        while worker.is_alive():
+            await asyncio.sleep(0.01)
+        return result["loop"] is asyncio.get_running_loop()
+
+    assert asyncio.run(go())
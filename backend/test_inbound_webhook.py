@@ -0,0 +1,76 @@
+# backend/test_inbound_webhook.py
+# ─────────────────────────────────────────────────────────────────────
+# The inbound webhooks ack fast because their DB work (brokerage lookup,
+# lead save, outbox row) runs in worker threads, never on the event
+# loop thread that serves every other request.
+# ─────────────────────────────────────────────────────────────────────
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from backend import main
+from backend.db import get_db
+from backend.services import rate_limit
+
+
+def _on_loop() -> bool:
+    return threading.current_thread() is threading.main_thread()     # asyncio.run's thread
+
+
+class FakeSession:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    def execute(self, stmt, params=None):
+        self.calls.append(("execute", _on_loop()))
+        return SimpleNamespace(fetchone=lambda: SimpleNamespace(industry="real_estate", plan="team"))
+
+    def commit(self):
+        self.calls.append(("commit", _on_loop()))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    seen = []
+
+    async def fake_analyze(message, industry, brokerage_id, plan):
+        return {"is_lead": True, "urgency_score": 85, "sentiment": "positive",
+                "recommendation": "Call", "entities": {}, "prompt_version": "test"}
+
+    monkeypatch.setattr(main, "analyze_lead_message_async", fake_analyze)
+    monkeypatch.setattr(main, "persist_leads", lambda db, leads: seen.append(("persist", _on_loop())))
+    monkeypatch.setattr(main, "enqueue_inbound_email", lambda db, email_id: seen.append(("enqueue", _on_loop())))
+    monkeypatch.setattr(rate_limit, "_local", rate_limit.TTLCache(maxsize=100, ttl=3600))
+    main.app.dependency_overrides[get_db] = lambda: FakeSession(seen)
+    yield seen
+    main.app.dependency_overrides.clear()
+
+
+def _post(path: str, body: dict) -> httpx.Response:
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body)
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("mode", ["ai", "fast"])
+def test_brokerage_webhook_keeps_db_work_off_the_loop(calls, mode):
+    res = _post(f"/inbound/b-1?mode={mode}", {"name": "Asha", "email": "asha@example.com",
+                                              "message": "Need a 3BHK flat this month, budget 90 lakhs"})
+    assert res.status_code == 200, res.text
+    assert [name for name, _ in calls] == ["execute", "persist"]
+    assert not any(on_loop for _, on_loop in calls)
+
+
+def test_email_webhook_keeps_db_work_off_the_loop(calls):
+    res = _post("/inbound/email", {"type": "email.received", "data": {"email_id": "e-1"}})
+    assert res.json() == {"status": "accepted"}
+    assert calls == [("enqueue", False), ("commit", False)]
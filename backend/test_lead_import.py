@@ -0,0 +1,189 @@
+# backend/test_lead_import.py
+# ─────────────────────────────────────────────────────────────────────
+# POST /leads/import end to end with the AI call and the DB stubbed:
+# a body that arrives in many chunks must be imported row for row. And
+# import_leads against an in-memory usage counter: quota is reserved
+# before scoring, so concurrent imports never pass the plan limit.
+# ─────────────────────────────────────────────────────────────────────
+
+import json
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from backend import main
+from backend.db import get_db
+from backend.routes.auth import get_current_user
+from backend.services import lead_import, rate_limit
+
+BID = "b-1"
+
+
+class _Session:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Ledger:
+    """brokerage_monthly_usage for one brokerage, with reserve_usage / release_usage / persist_leads."""
+
+    def __init__(self):
+        self.usage = 0
+        self.saved = []
+        self._lock = threading.Lock()       # called from to_thread workers
+
+    def reserve(self, db, bid, n, limit):
+        with self._lock:
+            if self.usage + n > limit:
+                return False
+            self.usage += n
+            return True
+
+    def release(self, db, bid, n):
+        with self._lock:
+            self.usage -= n
+
+    def persist(self, db, leads, reserved=None):
+        with self._lock:
+            self.usage += len(leads) - (reserved or {}).get(BID, 0)
+            self.saved.extend(leads)
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    led = Ledger()
+
+    async def fake_analyze(message, industry, brokerage_id, plan):
+        await asyncio.sleep(0)
+        return {"is_lead": "not a lead" not in message, "score": 80, "sentiment": "positive",
+                "recommendation": "Call", "entities": {}, "prompt_version": "test"}
+
+    monkeypatch.setattr(lead_import, "analyze_lead_message_async", fake_analyze)
+    monkeypatch.setattr(lead_import, "persist_leads", led.persist)
+    monkeypatch.setattr(lead_import, "reserve_usage", led.reserve)
+    monkeypatch.setattr(lead_import, "release_usage", led.release)
+    return led
+
+
+@pytest.fixture
+def saved(ledger, monkeypatch):
+    rows = ledger.saved
+    monkeypatch.setattr(main, "get_billing_and_industry",
+                        lambda db, bid: ({"plan": "pro", "limit": 10_000, "remaining": 10_000, "blocked": False},
+                                         "real_estate"))
+    monkeypatch.setattr(main, "SessionLocal", _Session)
+    monkeypatch.setattr(rate_limit, "_local", rate_limit.TTLCache(maxsize=100, ttl=3600))
+    main.app.dependency_overrides[get_current_user] = lambda: {"brokerage_id": BID, "sub": "a@b.co"}
+    main.app.dependency_overrides[get_db] = lambda: _Session()
+    yield rows
+    main.app.dependency_overrides.clear()
+
+
+async def _chunked(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def _post(path: str, body: bytes, chunk_size: int) -> httpx.Response:
+    """POST through the ASGI app; each chunk is its own http.request message."""
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, content=_chunked(body, chunk_size))
+    return asyncio.run(go())
+
+
+def _events(res) -> list[dict]:
+    assert res.status_code == 200, res.text
+    return [json.loads(line) for line in res.text.splitlines()]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 100, 4096])
+def test_ndjson_import_reads_every_chunk(saved, chunk_size):
+    n    = 250
+    body = "".join(json.dumps({"name": f"Lead {i}", "message": f"Looking for a 2BHK, lead {i}"}) + "\n"
+                   for i in range(n)).encode()
+
+    res    = _post("/leads/import?format=ndjson", body, chunk_size)
+    events = _events(res)
+
+    assert events[-1]["type"] == "done"
+    assert events[-1]["saved"] == n and events[-1]["stopped"] is None
+    assert sorted(e["row"] for e in events if e["type"] == "result") == list(range(1, n + 1))
+    assert sorted(lead.input_payload["name"] for lead in saved) == sorted(f"Lead {i}" for i in range(n))
+
+
+def test_csv_import_reads_every_chunk(saved):
+    n    = 120
+    body = ("name,message\n" + "".join(f'Lead {i},"Budget 50 lakhs,\nneeds flat {i}"\n' for i in range(n))).encode()
+
+    res    = _post("/leads/import?format=csv", body, 13)
+    events = _events(res)
+
+    assert events[-1]["saved"] == n and events[-1]["errors"] == 0
+    assert {lead.input_payload["message"] for lead in saved} == {f"Budget 50 lakhs,\nneeds flat {i}" for i in range(n)}
+
+
+def test_import_rejects_oversized_body(saved, monkeypatch):
+    monkeypatch.setattr(lead_import, "IMPORT_MAX_BYTES", 100)
+    monkeypatch.setattr(lead_import.spool_body, "__defaults__", (100,))
+
+    res = _post("/leads/import?format=ndjson", b"x" * 500, 50)
+
+    assert res.status_code == 413
+    assert saved == []
+
+
+# ─────────────────────────────────────────────
+# QUOTA RESERVATION
+# ─────────────────────────────────────────────
+async def _rows(messages):
+    for n, message in enumerate(messages, 1):
+        yield n, {"message": message}, None
+
+
+async def _import(messages, limit, **kwargs) -> list[dict]:
+    return [event async for event in lead_import.import_leads(
+        _rows(messages), db=_Session(), brokerage_id=BID, user_email="a@b.co",
+        industry="real_estate", plan="pro", quota_limit=limit, **kwargs,
+    )]
+
+
+def test_import_stops_at_the_limit_and_releases_the_rest(ledger):
+    events = asyncio.run(_import([f"Need a flat {i}" for i in range(50)], limit=30, chunk_size=8, concurrency=4))
+
+    assert events[-1]["saved"] == 30 and events[-1]["stopped"] == "quota_exceeded"
+    assert ledger.usage == 30
+
+
+def test_non_leads_hand_their_reservation_on(ledger):
+    messages = [f"not a lead {i}" if i % 2 else f"Need a flat {i}" for i in range(40)]
+    events   = asyncio.run(_import(messages, limit=10, chunk_size=4, concurrency=3))
+
+    assert events[-1]["saved"] == 10 and events[-1]["ignored"] >= 9
+    assert ledger.usage == 10
+
+
+def test_unused_reservation_is_released_when_the_file_ends(ledger):
+    events = asyncio.run(_import(["Need a flat"] * 5, limit=1000, chunk_size=200))
+    assert events[-1]["saved"] == 5 and events[-1]["stopped"] is None
+    assert ledger.usage == 5
+
+
+def test_concurrent_imports_share_the_limit(ledger):
+    ledger.usage = 20                                   # live webhooks already used some
+
+    async def both():
+        return await asyncio.gather(
+            _import([f"A {i}" for i in range(100)], limit=120, chunk_size=16, concurrency=4),
+            _import([f"B {i}" for i in range(100)], limit=120, chunk_size=16, concurrency=4),
+        )
+
+    a, b = asyncio.run(both())
+    assert a[-1]["saved"] + b[-1]["saved"] == 100
+    assert ledger.usage == 120 and len(ledger.saved) == 100
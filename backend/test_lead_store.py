@@ -0,0 +1,103 @@
+# backend/test_lead_store.py
+# ─────────────────────────────────────────────────────────────────────
+# Deferred "lead_enrichment": the AI re-score of a rules-only lead waits
+# for a per-tenant scheduler slot like any other lead, and a shed or
+# failed re-score retries instead of overwriting the lead.
+# ─────────────────────────────────────────────────────────────────────
+
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models import LeadScore
+from backend.services import ai_engine, lead_store, outbox, rollups, score_cache
+from backend.services.ai_engine import RULES_ONLY_VERSION
+
+
+class FakeSession:
+    def __init__(self, lead: LeadScore, brokerage=("real_estate", "team")):
+        self.lead      = lead
+        self.brokerage = brokerage
+        self.commits   = 0
+
+    def get(self, model, lead_id):
+        return self.lead if lead_id == self.lead.id else None
+
+    def execute(self, stmt, params):
+        assert "FROM brokerages" in str(stmt)
+        industry, plan = self.brokerage
+        return SimpleNamespace(fetchone=lambda: SimpleNamespace(industry=industry, plan=plan))
+
+    def commit(self):
+        self.commits += 1
+
+
+def _rules_only_lead() -> LeadScore:
+    return LeadScore(
+        id="l-1", brokerage_id="b-1", user_email="buyer@example.com",
+        input_payload={"message": "Need a 3BHK flat urgently, budget 90 lakhs", "source": "api", "is_lead": True},
+        urgency_score=40, score=40, bucket="COLD", prompt_version=RULES_ONLY_VERSION,
+    )
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    """Scheduler slots asked for, as (tenant, plan); grants them unless `shed` is set."""
+    calls = SimpleNamespace(asked=[], shed=False)
+
+    @asynccontextmanager
+    async def slot(tenant, plan, tokens):
+        calls.asked.append((tenant, plan))
+        yield not calls.shed
+
+    async def create(**kwargs):
+        content = json.dumps({"is_lead": True, "urgency_score": 90, "intent": "buy", "sentiment": "positive"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def no_cache(key):
+        return None
+
+    async def put(key, data):
+        pass
+
+    monkeypatch.setattr(ai_engine.scheduler, "slot", slot)
+    monkeypatch.setattr(ai_engine.async_client.chat.completions, "create", create)
+    monkeypatch.setattr(score_cache, "aget", no_cache)
+    monkeypatch.setattr(score_cache, "aput", put)
+    monkeypatch.setattr(rollups, "adjust_rollups", lambda db, delta: None)
+    return calls
+
+
+def test_enrichment_goes_through_the_scheduler(slots, monkeypatch):
+    alerts = []
+    monkeypatch.setattr(outbox, "enqueue", lambda db, kind, key, payload: alerts.append((kind, key)))
+    lead = _rules_only_lead()
+    db   = FakeSession(lead)
+
+    lead_store.enrich_lead(db, {"brokerage_id": "b-1", "lead_id": "l-1"})
+
+    assert slots.asked == [("b-1", "team")]
+    assert lead.prompt_version not in (None, RULES_ONLY_VERSION)
+    assert lead.bucket == "HOT" and alerts == [("hot_alert", "l-1")]
+    assert db.commits == 1
+
+
+def test_shed_again_retries_without_touching_the_lead(slots):
+    slots.shed = True
+    lead = _rules_only_lead()
+    db   = FakeSession(lead)
+
+    with pytest.raises(RuntimeError):
+        lead_store.enrich_lead(db, {"brokerage_id": "b-1", "lead_id": "l-1"})
+    assert slots.asked == [("b-1", "team")]
+    assert lead.prompt_version == RULES_ONLY_VERSION and lead.score == 40
+    assert db.commits == 0
+
+
+def test_already_enriched_lead_is_left_alone(slots):
+    lead = _rules_only_lead()
+    lead.prompt_version = "v3"
+    lead_store.enrich_lead(FakeSession(lead), {"brokerage_id": "b-1", "lead_id": "l-1"})
+    assert slots.asked == []
@@ -0,0 +1,149 @@
+# backend/test_mailer.py
+# ─────────────────────────────────────────────────────────────────────
+# mailer.send() never blocks its caller on Resend — from a threadpool
+# route the email is handed to the app loop's sender task — and
+# send_batch_now() reports throttled mail as retryable, not delivered.
+# Every email, partner invites included, is rendered from a template.
+# ─────────────────────────────────────────────────────────────────────
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from backend import main
+from backend.routes.auth import get_current_user
+from backend.services import mailer, rate_limit
+from backend.services.rate_limit import Rule
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_local", rate_limit.TTLCache(maxsize=100, ttl=3600))
+    monkeypatch.setattr(rate_limit, "REDIS_URL", "")
+    monkeypatch.setattr(mailer, "RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(mailer, "EMAIL_BATCH_WINDOW", 0)
+    monkeypatch.setattr(mailer, "_queue", None)
+    monkeypatch.setattr(mailer, "_sender", None)
+    monkeypatch.setattr(mailer, "_loop", None)
+
+
+class FakeClient:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, path, headers, json):
+        self.posts.append((path, json))
+        return SimpleNamespace(status_code=200, text="")
+
+
+def _email(to="owner@agency.com") -> mailer.Email:
+    return mailer.Email("hot_alert", to, {"to": [to]})
+
+
+# ─────────────────────────────────────────────
+# SYNC PATH
+# ─────────────────────────────────────────────
+def test_throttled_mail_is_a_retryable_error(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(mailer.outbound, "sync_client", lambda name: client)
+    monkeypatch.setitem(mailer._rules, "hot_alert", Rule(1, 3600))
+
+    results = mailer.send_batch_now([_email(), _email(), _email("other@agency.com")])
+
+    assert results[0] is None and results[2] is None
+    assert results[1].startswith("Throttled: hot_alert → owner@agency.com")
+    assert client.posts == [("/emails/batch", [{"to": ["owner@agency.com"]}, {"to": ["other@agency.com"]}])]
+
+
+def test_missing_api_key_is_skipped_not_retried(monkeypatch):
+    monkeypatch.setattr(mailer, "RESEND_API_KEY", None)
+    assert mailer.send_batch_now([_email()]) == [None]
+
+
+# ─────────────────────────────────────────────
+# ENQUEUE
+# ─────────────────────────────────────────────
+def _never_sync(emails):
+    raise AssertionError("sent synchronously")
+
+
+def test_send_from_a_worker_thread_goes_to_the_app_loop(monkeypatch):
+    delivered = []
+
+    async def deliver(emails):
+        delivered.append((threading.current_thread().name, [e.to for e in emails]))
+
+    monkeypatch.setattr(mailer, "_deliver", deliver)
+    monkeypatch.setattr(mailer, "send_batch_now", _never_sync)
+
+    async def go():
+        mailer.start()
+        worker = threading.Thread(target=mailer.enqueue, args=([_email(), _email("b@x.com")],), name="route")
+        worker.start()
+        await asyncio.to_thread(worker.join)
+        await asyncio.wait_for(mailer._queue.join(), 5)
+        await mailer.stop()
+
+    asyncio.run(go())
+    assert delivered == [("MainThread", ["owner@agency.com", "b@x.com"])]
+
+
+def test_send_inside_the_loop_is_queued(monkeypatch):
+    delivered = []
+
+    async def deliver(emails):
+        delivered.extend(e.to for e in emails)
+
+    monkeypatch.setattr(mailer, "_deliver", deliver)
+    monkeypatch.setattr(mailer, "send_batch_now", _never_sync)
+
+    async def go():
+        mailer.enqueue([_email()])                  # first send starts the sender
+        await asyncio.wait_for(mailer._queue.join(), 5)
+        await mailer.stop()
+
+    asyncio.run(go())
+    assert delivered == ["owner@agency.com"]
+
+
+def test_without_an_app_loop_sends_synchronously(monkeypatch):
+    sent = []
+    monkeypatch.setattr(mailer, "send_batch_now", lambda emails: sent.extend(emails) or [None] * len(emails))
+    mailer.enqueue([_email()])
+    assert [e.to for e in sent] == ["owner@agency.com"]
+
+
+# ─────────────────────────────────────────────
+# TEMPLATES
+# ─────────────────────────────────────────────
+def test_partner_invite_renders_from_its_template():
+    email = mailer.render("partner_invite", "dev@partner.io",
+                          webhook_url="https://api.leadrankerai.com/inbound/b-1",
+                          docs_url="https://api.leadrankerai.com/docs")
+    assert email.payload["from"] == mailer.ONBOARDING
+    assert email.payload["subject"] == "Invitation to Connect: LeadRanker Tech Partnership"
+    assert "https://api.leadrankerai.com/inbound/b-1" in email.payload["html"]
+
+
+def test_invite_partner_goes_through_the_mailer(monkeypatch):
+    sent = []
+    monkeypatch.setattr(mailer, "send", lambda template, to, **context: sent.append((template, to, context)))
+    main.app.dependency_overrides[get_current_user] = lambda: {"brokerage_id": "b-1", "sub": "a@b.co"}
+
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/invite-partner", json={"email": "dev@partner.io"})
+    try:
+        res = asyncio.run(go())
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert res.json() == {"status": "success"}
+    assert sent == [("partner_invite", "dev@partner.io", {
+        "webhook_url": "https://api.leadrankerai.com/inbound/b-1",
+        "docs_url":    "https://api.leadrankerai.com/docs",
+    })]
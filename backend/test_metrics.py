@@ -0,0 +1,48 @@
+# backend/test_metrics.py
+# ─────────────────────────────────────────────────────────────────────
+# /metrics is served to scrapers only: a bearer token when METRICS_TOKEN
+# is set, otherwise direct requests from loopback / private addresses.
+# ─────────────────────────────────────────────────────────────────────
+
+import asyncio
+
+import httpx
+import pytest
+
+from backend import main
+from backend.services import rate_limit
+
+
+@pytest.fixture(autouse=True)
+def fresh_limits(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_local", rate_limit.TTLCache(maxsize=100, ttl=3600))
+
+
+def _get(ip: str, headers: dict | None = None) -> int:
+    async def go():
+        transport = httpx.ASGITransport(app=main.app, client=(ip, 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get("/metrics", headers=headers or {})).status_code
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("ip, status", [
+    ("127.0.0.1", 200),
+    ("10.1.2.3", 200),
+    ("8.8.8.8", 404),
+])
+def test_without_token_only_local_clients(monkeypatch, ip, status):
+    monkeypatch.setattr(main, "METRICS_TOKEN", "")
+    assert _get(ip) == status
+
+
+def test_without_token_proxied_requests_are_refused(monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", "")
+    assert _get("127.0.0.1", {"X-Forwarded-For": "8.8.8.8"}) == 404
+
+
+def test_with_token(monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", "s3cret")
+    assert _get("8.8.8.8", {"Authorization": "Bearer s3cret"}) == 200
+    assert _get("8.8.8.8", {"Authorization": "Bearer nope"}) == 404
+    assert _get("127.0.0.1") == 404
@@ -0,0 +1,189 @@
+# backend/test_outbox.py
+# ─────────────────────────────────────────────────────────────────────
+# Outbox claim / finish / retry and batch handlers, against a fake
+# session that records the SQL it is given instead of running it.
+# ─────────────────────────────────────────────────────────────────────
+
+from typing import NamedTuple
+
+import pytest
+
+from backend.services import outbox
+
+
+class Job(NamedTuple):
+    id:       str
+    kind:     str
+    payload:  dict
+    attempts: int
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, claimed=(), fail_claim: bool = False):
+        self.claimed    = list(claimed)
+        self.fail_claim = fail_claim
+        self.executed   = []
+        self.commits    = 0
+        self.rollbacks  = 0
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append((sql, params or {}))
+        if "RETURNING id, kind" in sql:
+            if self.fail_claim:
+                raise RuntimeError("db down")
+            return _Result(self.claimed)
+        return _Result([])
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def outcomes(self) -> dict[str, tuple[str, str | None]]:
+        """job id -> (status, last_error) from the _finish() updates."""
+        out = {}
+        for sql, params in self.executed:
+            if "UPDATE outbox SET status = 'done'" in sql:
+                out[params["id"]] = ("done", None)
+            elif "last_error      = :error" in sql:
+                out[params["id"]] = (params["status"], params["error"])
+        return out
+
+
+@pytest.fixture(autouse=True)
+def handlers(monkeypatch):
+    monkeypatch.setattr(outbox, "HANDLERS", {})
+    monkeypatch.setattr(outbox, "BATCH_HANDLERS", {})
+
+
+# ─────────────────────────────────────────────
+# CLAIM
+# ─────────────────────────────────────────────
+def test_claim_uses_skip_locked_and_a_lease():
+    db   = FakeSession([Job("j1", "k", {}, 1)])
+    rows = outbox._claim(db, 5)
+
+    sql, params = db.executed[0]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "attempts        = attempts + 1" in sql
+    assert params == {"n": 5, "lease": outbox.OUTBOX_LEASE_SECONDS}
+    assert rows == db.claimed and db.commits == 1
+
+
+def test_claim_rolls_back_on_error():
+    db = FakeSession(fail_claim=True)
+    with pytest.raises(RuntimeError):
+        outbox._claim(db, 5)
+    assert db.rollbacks == 1 and db.commits == 0
+
+
+# ─────────────────────────────────────────────
+# SINGLE HANDLERS + RETRY
+# ─────────────────────────────────────────────
+def test_drain_marks_done_and_retries_failures():
+    calls = []
+
+    @outbox.handler("ok")
+    def ok(db, payload):
+        calls.append(payload)
+
+    @outbox.handler("boom")
+    def boom(db, payload):
+        raise ValueError("nope")
+
+    db = FakeSession([Job("j1", "ok", {"a": 1}, 1), Job("j2", "boom", {}, 1)])
+
+    assert outbox.drain_once(db) == 2
+    assert calls == [{"a": 1}]
+    assert db.outcomes() == {"j1": ("done", None), "j2": ("pending", "ValueError: nope")}
+    assert db.rollbacks == 1
+
+
+def test_failure_on_last_attempt_is_dead():
+    @outbox.handler("boom")
+    def boom(db, payload):
+        raise ValueError("nope")
+
+    db = FakeSession([Job("j1", "boom", {}, outbox.OUTBOX_MAX_ATTEMPTS)])
+    outbox.drain_once(db)
+    assert db.outcomes()["j1"][0] == "dead"
+
+
+def test_unknown_kind_is_retried_not_dropped():
+    db = FakeSession([Job("j1", "nobody", {}, 1)])
+    outbox.drain_once(db)
+    status, error = db.outcomes()["j1"]
+    assert status == "pending" and "No outbox handler" in error
+
+
+@pytest.mark.parametrize("attempts", range(1, 15))
+def test_backoff_doubles_with_jitter_and_is_capped(attempts):
+    base = min(outbox.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), outbox.OUTBOX_BACKOFF_MAX)
+    for _ in range(20):
+        assert base <= outbox._backoff(attempts) <= base * 1.25
+
+
+# ─────────────────────────────────────────────
+# BATCH HANDLERS
+# ─────────────────────────────────────────────
+def test_batch_handler_gets_all_jobs_in_one_call():
+    calls = []
+
+    @outbox.batch_handler("mail")
+    def send(db, payloads):
+        calls.append(payloads)
+        return [None, "Resend 500", None]
+
+    db = FakeSession([Job(f"j{i}", "mail", {"i": i}, 1) for i in range(3)])
+    outbox.drain_once(db)
+
+    assert calls == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+    assert db.outcomes() == {
+        "j0": ("done", None),
+        "j1": ("pending", "Resend 500"),
+        "j2": ("done", None),
+    }
+
+
+def test_batch_handler_raising_retries_every_job():
+    @outbox.batch_handler("mail")
+    def send(db, payloads):
+        raise ConnectionError("down")
+
+    db = FakeSession([Job("j1", "mail", {}, 1), Job("j2", "mail", {}, 2)])
+    outbox.drain_once(db)
+
+    assert db.outcomes() == {
+        "j1": ("pending", "ConnectionError: down"),
+        "j2": ("pending", "ConnectionError: down"),
+    }
+    assert db.rollbacks == 1
+
+
+def test_batch_and_single_kinds_in_one_claim():
+    seen = []
+
+    @outbox.handler("one")
+    def one(db, payload):
+        seen.append(("one", payload["i"]))
+
+    @outbox.batch_handler("many")
+    def many(db, payloads):
+        seen.append(("many", [p["i"] for p in payloads]))
+        return [None] * len(payloads)
+
+    db = FakeSession([Job("a", "many", {"i": 1}, 1), Job("b", "one", {"i": 2}, 1), Job("c", "many", {"i": 3}, 1)])
+    outbox.drain_once(db)
+
+    assert seen == [("one", 2), ("many", [1, 3])]
+    assert {status for status, _ in db.outcomes().values()} == {"done"}
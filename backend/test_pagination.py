@@ -0,0 +1,96 @@
+# backend/test_pagination.py
+# ─────────────────────────────────────────────────────────────────────
+# Keyset pagination walked forwards and back over an in-memory SQLite
+# table, plus the history endpoints' handling of the retired ?offset=.
+# ─────────────────────────────────────────────────────────────────────
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from backend.routes.leads import HistoryFilters
+from backend.services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_paginate
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id         = Column(String, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+T0 = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # Pairs share a timestamp so the id tie-break is exercised
+        session.add_all(Row(id=f"r{i:02d}", created_at=T0 + timedelta(minutes=i // 2)) for i in range(25))
+        session.commit()
+        yield session
+
+
+def _page(db, cursor, limit=10):
+    return keyset_paginate(db.query(Row), Row.created_at, Row.id, cursor, limit)
+
+
+def test_walks_every_row_once_both_ways(db):
+    seen, cursor, pages = [], None, []
+    while True:
+        page = _page(db, cursor)
+        pages.append(page)
+        seen += [r.id for r in page.rows]
+        if not page.next_cursor:
+            break
+        cursor = page.next_cursor
+    assert seen == [f"r{i:02d}" for i in reversed(range(25))]
+
+    back = _page(db, pages[-1].prev_cursor)
+    assert [r.id for r in back.rows] == [r.id for r in pages[-2].rows]
+
+
+def test_empty_page_returns_the_cursor_to_poll_with(db):
+    newest = _page(db, None).rows[0]
+    cursor = encode_cursor("prev", newest.created_at, newest.id)
+
+    empty = _page(db, cursor)
+    assert empty.rows == []
+    assert empty.next_cursor is None
+    assert empty.prev_cursor == cursor
+
+    db.add(Row(id="r99", created_at=T0 + timedelta(hours=1)))
+    db.commit()
+    assert [r.id for r in _page(db, empty.prev_cursor).rows] == ["r99"]
+
+
+def test_empty_page_past_the_end_can_go_back(db):
+    oldest = _page(db, None, limit=100).rows[-1]
+    page   = _page(db, encode_cursor("next", oldest.created_at, oldest.id))
+    assert page.rows == [] and page.next_cursor is None
+    assert [r.id for r in _page(db, page.prev_cursor, limit=2).rows] == ["r02", "r01"]
+
+
+def test_no_cursor_and_no_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        assert _page(session, None) == ([], None, None)
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_offset_is_rejected_with_a_pointer_to_cursor():
+    with pytest.raises(HTTPException) as e:
+        HistoryFilters(offset=50, limit=50)
+    assert e.value.status_code == 400
+    assert "cursor" in e.value.detail
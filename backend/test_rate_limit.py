@@ -0,0 +1,162 @@
+# backend/test_rate_limit.py
+# ─────────────────────────────────────────────────────────────────────
+# GCRA allow/deny on the in-process backend, the fallback to it when
+# Redis errors, and per-tenant keys chosen only after server-side
+# resolution (pixel API keys, inbound brokerage ids).
+# ─────────────────────────────────────────────────────────────────────
+
+import asyncio
+
+import pytest
+import redis
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend.routes import pixel_route
+from backend.routes.pixel_route import BrokerageKey
+from backend.services import rate_limit
+from backend.services.rate_limit import Rule, parse_rule
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", c)
+    return c
+
+
+@pytest.fixture(autouse=True)
+def local(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_local", rate_limit.TTLCache(maxsize=1000, ttl=3600))
+    monkeypatch.setattr(rate_limit, "REDIS_URL", "")
+
+
+def _request(ip: str = "10.0.0.1") -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": (ip, 1234)})
+
+
+# ─────────────────────────────────────────────
+# RULES + GCRA
+# ─────────────────────────────────────────────
+@pytest.mark.parametrize("spec, rule", [
+    ("20/minute", Rule(20, 60)),
+    ("5 / second", Rule(5, 1)),
+    ("3/day", Rule(3, 86400)),
+])
+def test_parse_rule(spec, rule):
+    assert parse_rule(spec) == rule
+
+
+def test_burst_of_limit_then_denied(clock):
+    rule = Rule(5, 60)                          # one every 12s, burst of 5
+    assert all(rate_limit._hit_local("k", rule)[0] for _ in range(5))
+
+    allowed, retry_after = rate_limit._hit_local("k", rule)
+    assert not allowed
+    assert retry_after == pytest.approx(12)
+
+
+def test_denied_requests_do_not_push_the_window(clock):
+    rule = Rule(2, 10)
+    rate_limit._hit_local("k", rule)
+    rate_limit._hit_local("k", rule)
+    for _ in range(10):
+        assert not rate_limit._hit_local("k", rule)[0]
+
+    clock.now += 5                              # one emission interval
+    assert rate_limit._hit_local("k", rule)[0]
+    assert not rate_limit._hit_local("k", rule)[0]
+
+
+def test_steady_rate_is_always_allowed(clock):
+    rule = Rule(10, 10)
+    for _ in range(100):
+        assert rate_limit._hit_local("k", rule)[0]
+        clock.now += 1
+
+
+def test_keys_are_independent(clock):
+    rule = Rule(1, 60)
+    assert rate_limit._hit_local("a", rule)[0]
+    assert rate_limit._hit_local("b", rule)[0]
+    assert not rate_limit._hit_local("a", rule)[0]
+
+
+# ─────────────────────────────────────────────
+# REDIS FALLBACK
+# ─────────────────────────────────────────────
+def test_async_hit_falls_back_to_memory_on_redis_error(monkeypatch, clock):
+    async def broken_script(keys, args):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(rate_limit, "_async_redis", lambda: object())
+    monkeypatch.setattr(rate_limit, "_script", broken_script)
+
+    rule = Rule(2, 60)
+    results = [asyncio.run(rate_limit.hit("k", rule))[0] for _ in range(3)]
+    assert results == [True, True, False]
+
+
+def test_sync_hit_falls_back_to_memory_on_redis_error(monkeypatch, clock):
+    def broken_script(keys, args):
+        raise redis.TimeoutError("slow")
+
+    monkeypatch.setattr(rate_limit, "_redis_sync", lambda: object())
+    monkeypatch.setattr(rate_limit, "_sync_script", broken_script)
+
+    rule = Rule(1, 60)
+    assert rate_limit.hit_sync("k", rule)[0]
+    assert not rate_limit.hit_sync("k", rule)[0]
+
+
+def test_redis_result_is_used_when_available(monkeypatch):
+    async def script(keys, args):
+        assert keys == [rate_limit.REDIS_PREFIX + "k"]
+        return [0, 1500]
+
+    monkeypatch.setattr(rate_limit, "_async_redis", lambda: object())
+    monkeypatch.setattr(rate_limit, "_script", script)
+    assert asyncio.run(rate_limit.hit("k", Rule(1, 60))) == (False, 1.5)
+
+
+# ─────────────────────────────────────────────
+# TENANT KEYS
+# ─────────────────────────────────────────────
+def test_enforce_raises_429_with_retry_after(clock):
+    rule = Rule(1, 30)
+    asyncio.run(rate_limit.enforce("b", "k", rule))
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(rate_limit.enforce("b", "k", rule))
+    assert e.value.status_code == 429
+    assert e.value.headers["Retry-After"] == "30"
+
+
+def test_unknown_pixel_keys_share_the_ip_bucket(monkeypatch, clock):
+    known = BrokerageKey("b-1", "real_estate", "pro")
+    monkeypatch.setattr(pixel_route, "PIXEL_RULE", Rule(2, 60))
+    monkeypatch.setattr(pixel_route, "get_brokerage_from_api_key",
+                        lambda key, db: known if key == "good" else None)
+
+    def call(key, ip="10.0.0.1"):
+        try:
+            return asyncio.run(pixel_route.pixel_brokerage(_request(ip), key, db=None))
+        except HTTPException as e:
+            return e.status_code
+
+    # Fresh made-up keys don't get fresh buckets
+    assert [call(f"made-up-{i}") for i in range(3)] == [401, 401, 429]
+    assert call(None) == 429
+    assert call("made-up", ip="10.0.0.2") == 401
+
+    # A real key is limited per brokerage, not by the caller's IP
+    assert call("good") == known
+    assert call("good", ip="10.0.0.9") == known
+    assert call("good", ip="10.0.0.3") == 429
@@ -9,29 +9,26 @@ const Analytics = () => {
   useEffect(() => {
     const fetchAnalytics = async () => {
       try {
-        const response = await api.get("/leads/history");
-        // Pulling lead array from backend
-        const leadList = Array.isArray(response.data) ? response.data : response.data?.data || [];
-        
+        // Last 12 months, pre-aggregated server-side
+        const since = new Date();
+        since.setFullYear(since.getFullYear() - 1);
+        const summary = await api.get(
+          `/api/v1/leads/stats?granularity=month&date_from=${since.toISOString().slice(0, 10)}`
+        );
+
         const sourceMap: any = {};
-        const qualityMap: any = {}; 
-        let hotCount = 0;
+        const qualityMap: any = {};
 
-        leadList.forEach((lead: any) => {
+        Object.entries(summary.by_source || {}).forEach(([name, counts]: any) => {
           // Default to 'Website' if source is missing
-          const source = lead.source || 'Website'; 
-          sourceMap[source] = (sourceMap[source] || 0) + 1;
-          
-          // Identify HOT Leads for accuracy calculation
-          if (lead.bucket === 'HOT') {
-            hotCount++;
-            qualityMap[source] = (qualityMap[source] || 0) + 1;
-          }
+          const source = name === 'unknown' ? 'Website' : name;
+          sourceMap[source] = (sourceMap[source] || 0) + counts.total;
+          qualityMap[source] = (qualityMap[source] || 0) + counts.hot;
         });
 
         setStats({
-          total: leadList.length,
-          hot: hotCount,
+          total: summary.total || 0,
+          hot: summary.hot || 0,
           sources: sourceMap,
           qualityBySource: qualityMap
         });
@@ -11,26 +11,22 @@ export default function Dashboard() {
   useEffect(() => {
     const loadData = async () => {
       try {
-        const response = await api.get("/leads/history")
+        const [response, summary] = await Promise.all([
+          api.get("/leads/history"),
+          api.get("/api/v1/leads/stats?granularity=month"),
+        ])
         const leadsArray = Array.isArray(response.data)
           ? response.data
           : response.data?.data || []
         setLeads(leadsArray)
 
-        const hot = leadsArray.filter((l: any) => l.bucket === "HOT").length
-
-        const sourceCounts = leadsArray.reduce((acc: any, lead: any) => {
-          const s = lead.source || "Website"
-          acc[s] = (acc[s] || 0) + 1
-          return acc
-        }, {})
-
-        const top = Object.entries(sourceCounts).reduce(
-          (a: any, b: any) => (a[1] > b[1] ? a : b),
+        const top = Object.entries(summary.by_source || {}).reduce(
+          (a: any, [name, counts]: any) =>
+            counts.total > a[1] ? [name === "unknown" ? "Website" : name, counts.total] : a,
           ["Website", 0]
         )[0] as string
 
-        setMetrics({ hotCount: hot, topSource: top })
+        setMetrics({ hotCount: summary.hot || 0, topSource: top })
       } catch (err) {
         console.error("Dashboard load error:", err)
       } finally {
@@ -0,0 +1,180 @@
+# infra/bench_lead_indexes.py
+# ─────────────────────────────────────────────────────────────────────
+# Query plans for the lead_scores hot paths, before and after the
+# (brokerage_id, created_at DESC) and (brokerage_id, bucket, created_at
+# DESC) indexes.
+#
+# Builds a synthetic copy of lead_scores in a scratch schema — the real
+# table is never touched — with a skewed tenant mix: one big brokerage,
+# a few mid-sized ones and a long tail. Then runs EXPLAIN (ANALYZE,
+# BUFFERS) for each query without the indexes, adds them, and runs it
+# again.
+#
+#   BENCH_DATABASE_URL=postgresql://... python -m infra.bench_lead_indexes --rows 10000000
+#
+# Falls back to DATABASE_URL. Generating 10M rows takes a few minutes
+# and ~3 GB of disk; --keep leaves the schema in place for poking at.
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import time
+import argparse
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+SCHEMA = "bench_leads"
+
+BIG_TENANT = "bench-big"      # ~10% of all rows
+MID_TENANT = "bench-mid-0"    # ~1% of all rows
+SMALL_TENANTS = 5000
+
+QUERIES = {
+    "history page 1 (/leads/history)": """
+        SELECT id, score, bucket, created_at FROM {t}.lead_scores
+        WHERE brokerage_id = :bid
+        ORDER BY created_at DESC
+        LIMIT 50
+    """,
+    "history deep page (OFFSET 25000)": """
+        SELECT id, score, bucket, created_at FROM {t}.lead_scores
+        WHERE brokerage_id = :bid
+        ORDER BY created_at DESC
+        LIMIT 50 OFFSET 25000
+    """,
+    "history keyset deep page": """
+        SELECT id, score, bucket, created_at FROM {t}.lead_scores
+        WHERE brokerage_id = :bid
+          AND created_at <= NOW() - INTERVAL '365 days'
+        ORDER BY created_at DESC, id DESC
+        LIMIT 50
+    """,
+    "history HOT only (keyset)": """
+        SELECT id, score, bucket, created_at FROM {t}.lead_scores
+        WHERE brokerage_id = :bid AND bucket = 'HOT'
+        ORDER BY created_at DESC, id DESC
+        LIMIT 50
+    """,
+    "bucket counts (/leads/stats)": """
+        SELECT bucket, COUNT(*) FROM {t}.lead_scores
+        WHERE brokerage_id = :bid
+        GROUP BY bucket
+    """,
+    "monthly count (quota / reconcile)": """
+        SELECT COUNT(*) FROM {t}.lead_scores
+        WHERE brokerage_id = :bid
+          AND created_at >= date_trunc('month', NOW())
+    """,
+}
+
+INDEXES = [
+    f"CREATE INDEX ix_bench_brokerage_created ON {SCHEMA}.lead_scores (brokerage_id, created_at DESC)",
+    f"CREATE INDEX ix_bench_brokerage_bucket_created ON {SCHEMA}.lead_scores (brokerage_id, bucket, created_at DESC)",
+]
+
+
+def build_table(conn, rows: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.lead_scores (
+            id                VARCHAR PRIMARY KEY,
+            brokerage_id      VARCHAR NOT NULL,
+            user_email        VARCHAR NOT NULL,
+            input_payload     JSON NOT NULL,
+            urgency_score     INTEGER,
+            sentiment         VARCHAR,
+            ai_recommendation VARCHAR,
+            prompt_version    VARCHAR,
+            score             INTEGER NOT NULL,
+            bucket            VARCHAR NOT NULL,
+            created_at        TIMESTAMP NOT NULL
+        )
+    """))
+
+    # Insert in slices so a 10M-row run doesn't hold one giant transaction
+    step = 1_000_000
+    for start in range(0, rows, step):
+        stop = min(start + step, rows)
+        t0 = time.perf_counter()
+        conn.execute(text(f"""
+            INSERT INTO {SCHEMA}.lead_scores
+            SELECT
+                md5(g::text),
+                CASE
+                    WHEN r < 0.10 THEN :big
+                    WHEN r < 0.20 THEN 'bench-mid-' || (g % 10)
+                    ELSE 'bench-small-' || (g % :small)
+                END,
+                'lead' || g || '@example.com',
+                json_build_object('message', 'synthetic lead ' || g, 'source', 'bench'),
+                s, 'neutral', 'Follow up', 'real_estate@bench',
+                s,
+                CASE WHEN s >= 80 THEN 'HOT' WHEN s >= 50 THEN 'WARM'
+                     WHEN s > 0 THEN 'COLD' ELSE 'IGNORE' END,
+                NOW() - (random() * INTERVAL '730 days')
+            FROM (
+                SELECT g, random() AS r, (random() * 100)::int AS s
+                FROM generate_series(:start, :stop - 1) AS g
+            ) src
+        """), {"big": BIG_TENANT, "small": SMALL_TENANTS, "start": start, "stop": stop})
+        print(f"  inserted {stop:>12,} rows ({time.perf_counter() - t0:.1f}s)")
+
+    conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.lead_scores"))
+
+
+def explain_all(conn, label: str) -> dict[str, float]:
+    print(f"\n{'═' * 72}\n{label}\n{'═' * 72}")
+    timings = {}
+    for name, sql in QUERIES.items():
+        for bid in (BIG_TENANT, MID_TENANT):
+            plan = conn.execute(
+                text("EXPLAIN (ANALYZE, BUFFERS) " + sql.format(t=SCHEMA)),
+                {"bid": bid},
+            ).scalars().all()
+            ms = float(plan[-1].split(":")[1].split()[0])   # "Execution Time: 12.3 ms"
+            timings[(name, bid)] = ms
+            print(f"\n── {name} [{bid}] — {ms:.2f} ms")
+            for line in plan:
+                print("   " + line)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lead_scores index benchmark")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--keep", action="store_true", help="don't drop the scratch schema")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("Set BENCH_DATABASE_URL (or DATABASE_URL)")
+
+    engine = create_engine(url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        print(f"Building {SCHEMA}.lead_scores with {args.rows:,} rows…")
+        build_table(conn, args.rows)
+
+        before = explain_all(conn, "BEFORE — primary key only")
+
+        for ddl in INDEXES:
+            t0 = time.perf_counter()
+            conn.execute(text(ddl))
+            print(f"\n{ddl}  ({time.perf_counter() - t0:.1f}s)")
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.lead_scores"))
+
+        after = explain_all(conn, "AFTER — composite indexes")
+
+        print(f"\n{'═' * 72}\nSUMMARY (execution time, ms)\n{'═' * 72}")
+        for key, ms in before.items():
+            name, bid = key
+            print(f"{name:<38} {bid:<12} {ms:>10.2f} → {after[key]:>8.2f}")
+
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,40 @@
-import pandas as pd
-
-# Load raw data
-df = pd.read_csv("leads.csv")
-
-# --- Feature engineering ---
-
-# 1. Buyer readiness score (0–100)
-df["buyer_readiness_score"] = (
-    (df["budget"] >= 500000).astype(int) * 30 +
-    (df["urgency"] <= 30).astype(int) * 30 +
-    (df["preapproved"] == 1).astype(int) * 40
-)
+# ml/features.py
+# ─────────────────────────────────────────────────────────────────────
+# Lead feature definitions and the offline feature pipeline.
+#
+# The feature functions are shared by training (this pipeline) and
+# serving (backend/services/model_tier.py), so both compute exactly the
+# same columns. They work on NumPy arrays or pandas Series.
+#
+# The pipeline reads leads.csv / .parquet in chunks with explicit narrow
+# dtypes, transforms chunks on a process pool (a bounded number in
+# flight, so memory stays flat) and writes them in input order:
+#
+#   python -m ml.features                                   # leads.csv → leads_features.csv
+#   python -m ml.features --in leads.parquet --out leads_features.parquet --workers 8
+#   python -m ml.features --in leads.parquet --out leads_features.npy
+#
+# .npy output is one float32 matrix of NPY_COLUMNS, written through a
+# memmap and loadable with np.load(path, mmap_mode="r").
+#
+# Leads scored from free text carry no structured fields; for them
+# record_from_lead() reads what it can (budget, purchase timeline,
+# bedrooms, pre-approval, viewings) out of the message and the
+# rule-based signals stored with it, and the rest take RAW_DEFAULTS.
+# Parquet in/out needs pyarrow.
+# ─────────────────────────────────────────────────────────────────────
 
-# 2. Engagement score (0–100)
-df["engagement_score"] = (
-    (df["views"] / 50.0) * 50 +
-    (df["saves"] / 20.0) * 30 +
-    (df["open_house"] == 1).astype(int) * 20
-)
+import os
+import re
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-# 3. Speed-to-contact penalty (slower response = worse)
-df["speed_penalty"] = df["agent_response_hours"].clip(0, 72) / 72.0 * 100
+import numpy as np
+import pandas as pd
 
-# 4. Final feature set
-features = df[[
+# Raw columns, in the order the model was trained on
+RAW_COLUMNS = [
     "budget",
     "urgency",
     "views",
@@ -32,14 +43,294 @@ features = df[[
     "preapproved",
     "open_house",
     "agent_response_hours",
+]
+
+DERIVED_COLUMNS = [
     "buyer_readiness_score",
     "engagement_score",
     "speed_penalty",
-    "converted"
-]]
+]
+
+FEATURE_COLUMNS = RAW_COLUMNS + DERIVED_COLUMNS
+TARGET_COLUMN   = "converted"
+NPY_COLUMNS     = FEATURE_COLUMNS + [TARGET_COLUMN]
+
+# Value assumed when a lead record doesn't carry a field: no budget,
+# not in a hurry, no engagement, slowest response
+RAW_DEFAULTS = {c: 0.0 for c in RAW_COLUMNS} | {"urgency": 90.0, "agent_response_hours": 72.0}
+
+READ_DTYPES = {
+    "budget":               "int32",
+    "urgency":              "int16",
+    "views":                "int16",
+    "saves":                "int16",
+    "bedrooms":             "int8",
+    "preapproved":          "int8",
+    "open_house":           "int8",
+    "agent_response_hours": "int16",
+    "converted":            "int8",
+}
+
+
+# 1. Buyer readiness score (0–100)
+def buyer_readiness_score(budget, urgency, preapproved):
+    return (
+        (budget >= 500000).astype(int) * 30 +
+        (urgency <= 30).astype(int) * 30 +
+        (preapproved == 1).astype(int) * 40
+    )
+
+
+# 2. Engagement score (0–100)
+def engagement_score(views, saves, open_house):
+    return (
+        (views / 50.0) * 50 +
+        (saves / 20.0) * 30 +
+        (open_house == 1).astype(int) * 20
+    )
+
+
+# 3. Speed-to-contact penalty (slower response = worse)
+def speed_penalty(agent_response_hours):
+    return np.clip(agent_response_hours, 0, 72) / 72.0 * 100
+
+
+def feature_matrix(raw) -> np.ndarray:
+    """
+    (n, len(FEATURE_COLUMNS)) float32 matrix from a DataFrame or a dict
+    of equal-length arrays keyed by RAW_COLUMNS.
+    """
+    cols = {c: np.asarray(raw[c], dtype=np.float32) for c in RAW_COLUMNS}
+    cols["buyer_readiness_score"] = buyer_readiness_score(cols["budget"], cols["urgency"], cols["preapproved"])
+    cols["engagement_score"]      = engagement_score(cols["views"], cols["saves"], cols["open_house"])
+    cols["speed_penalty"]         = speed_penalty(cols["agent_response_hours"])
+    return np.column_stack([cols[c] for c in FEATURE_COLUMNS]).astype(np.float32, copy=False)
+
+
+# ─────────────────────────────────────────────
+# FREE-TEXT LEADS
+# ─────────────────────────────────────────────
+_AMOUNT = re.compile(
+    r"(?:(?:\$|usd|rs\.?|inr|₹)\s*)?(\d+(?:[.,]\d+)*)\s*(lakhs?|lacs?|crores?|cr\b|million|mn\b|m\b|k\b)?",
+    re.I,
+)
+_UNITS = {"lakh": 1e5, "lac": 1e5, "crore": 1e7, "cr": 1e7, "million": 1e6, "mn": 1e6, "m": 1e6, "k": 1e3}
+_BUDGET_HINT = re.compile(r"budget|\$|usd|rs\.?\s*\d|inr|₹|lakh|lac|crore|\bcr\b|million", re.I)
+_IN_N_UNITS  = re.compile(r"(?:in|within|next)\s+(\d+)\s*(day|week|month)s?", re.I)
+_TIMELINES   = [   # (pattern, days until purchase) — first match wins
+    (re.compile(r"today|tomorrow|immediate|asap|urgent|right away|ready to (?:buy|move)", re.I), 0),
+    (re.compile(r"this week|next week|few days", re.I), 7),
+    (re.compile(r"this month|within a month|by end", re.I), 30),
+    (re.compile(r"next month|couple of months|few months", re.I), 60),
+    (re.compile(r"just (?:browsing|looking)|no rush|next year|someday|in future", re.I), 90),
+]
+_BEDROOMS    = re.compile(r"(\d)\s*-?\s*(?:bhk|bed(?:room)?s?|br\b)", re.I)
+_PREAPPROVED = re.compile(r"pre-?approved|loan (?:is )?(?:approved|sanctioned)|mortgage approved|cash buyer", re.I)
+_VIEWING     = re.compile(r"open house|site visit|viewing|schedule a visit|visit the (?:property|flat|house)", re.I)
+
+
+def _budget(message: str) -> float | None:
+    """Largest amount in the message, as written (no currency conversion)."""
+    if not _BUDGET_HINT.search(message):
+        return None
+    amounts = []
+    for number, unit in _AMOUNT.findall(message):
+        value = float(number.replace(",", ""))
+        if unit:
+            value *= _UNITS[unit.lower().rstrip("s")]
+        amounts.append(value)
+    amounts = [a for a in amounts if a >= 1000]      # not bedrooms, days, ...
+    return max(amounts) if amounts else None
+
+
+def _urgency(message: str, signals: list[str]) -> float | None:
+    """Days until the lead means to buy, when the message says."""
+    if m := _IN_N_UNITS.search(message):
+        return min(90.0, int(m.group(1)) * {"day": 1, "week": 7, "month": 30}[m.group(2).lower()])
+    for pattern, days in _TIMELINES:
+        if pattern.search(message):
+            return float(days)
+    if "timeline_mentioned" in signals or any(s.startswith("hot_signal:") for s in signals):
+        return 30.0
+    return None
+
+
+def record_from_lead(payload: dict) -> dict:
+    """
+    A raw-feature record for a stored lead (lead_scores.input_payload).
+    Structured fields win; otherwise they are read from the message and
+    its rule signals. Fields that can't be read stay missing.
+    """
+    message = str(payload.get("message") or "")
+    signals = (payload.get("entities") or {}).get("rule_signals") or []
+    derived = {
+        "budget":      _budget(message),
+        "urgency":     _urgency(message, signals),
+        "bedrooms":    float(m.group(1)) if (m := _BEDROOMS.search(message)) else None,
+        "preapproved": 1.0 if _PREAPPROVED.search(message) else None,
+        "open_house":  1.0 if _VIEWING.search(message) else None,
+    }
+    return {c: payload[c] if payload.get(c) is not None else derived.get(c) for c in RAW_COLUMNS}
+
+
+def raw_from_records(records: list[dict]) -> dict[str, np.ndarray]:
+    """
+    Column arrays for feature_matrix() from dict-like lead records (API
+    input, lead_scores.input_payload). Missing or non-numeric values
+    fall back to RAW_DEFAULTS.
+    """
+    def _num(value, default: float) -> float:
+        try:
+            return default if value is None else float(value)
+        except (TypeError, ValueError):
+            return default
+
+    n = len(records)
+    return {
+        c: np.fromiter((_num(r.get(c), RAW_DEFAULTS[c]) for r in records), dtype=np.float32, count=n)
+        for c in RAW_COLUMNS
+    }
+
+
+def transform(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Raw columns (dtypes kept) + float32 derived features + the target, if present."""
+    out = chunk[RAW_COLUMNS].copy()
+    out["buyer_readiness_score"] = buyer_readiness_score(out["budget"], out["urgency"], out["preapproved"]).astype(np.float32)
+    out["engagement_score"]      = engagement_score(out["views"], out["saves"], out["open_house"]).astype(np.float32)
+    out["speed_penalty"]         = speed_penalty(out["agent_response_hours"]).astype(np.float32)
+    if TARGET_COLUMN in chunk:
+        out[TARGET_COLUMN] = chunk[TARGET_COLUMN]
+    return out
+
+
+# ─────────────────────────────────────────────
+# PIPELINE
+# ─────────────────────────────────────────────
+def iter_chunks(path: str, chunk_size: int):
+    """DataFrames of up to chunk_size rows with READ_DTYPES applied."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        pf   = pq.ParquetFile(path)
+        cols = [c for c in pf.schema_arrow.names if c in READ_DTYPES]
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=cols):
+            yield batch.to_pandas().astype({c: READ_DTYPES[c] for c in cols})
+    else:
+        yield from pd.read_csv(
+            path, chunksize=chunk_size, dtype=READ_DTYPES,
+            usecols=lambda c: c in READ_DTYPES,
+        )
+
+
+def max_rows(path: str) -> int:
+    """
+    Upper bound on the data rows in `path` (exact for parquet). A CSV's
+    newline count is one more than its rows when the file ends in a
+    newline and can be far more with quoted multi-line fields or blank
+    lines, so the .npy writer trims to the rows actually parsed.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, "rb") as f:
+        return sum(buf.count(b"\n") for buf in iter(lambda: f.read(1 << 20), b""))
+
+
+def _trim_npy(path: str, n_rows: int) -> None:
+    """Shrink an .npy file to its first n_rows in place: rewrite the shape, truncate the data."""
+    fmt = np.lib.format
+    with open(path, "r+b") as f:
+        version = fmt.read_magic(f)
+        read_header = fmt.read_array_header_1_0 if version == (1, 0) else fmt.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        data_start = f.tell()
+        prefix     = 10 if version == (1, 0) else 12     # magic + version + header length
+        header = repr({"descr": fmt.dtype_to_descr(dtype), "fortran_order": fortran_order,
+                       "shape": (n_rows, *shape[1:])})
+        # Fewer digits in the shape: pad to the old length, so the data offset stays put
+        f.seek(prefix)
+        f.write(header.encode("latin1").ljust(data_start - prefix - 1) + b"\n")
+        f.truncate(data_start + n_rows * int(np.prod(shape[1:])) * dtype.itemsize)
+
+
+def transformed_chunks(path: str, chunk_size: int, workers: int):
+    """transform() over every chunk, in order, with at most 2×workers chunks in flight."""
+    if workers <= 1:
+        yield from map(transform, iter_chunks(path, chunk_size))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(path, chunk_size):
+            pending.append(pool.submit(transform, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _FeatureWriter:
+    def __init__(self, path: str, n_rows: int | None = None):
+        self.path    = path
+        self.kind    = os.path.splitext(path)[1].lstrip(".")
+        self.rows    = 0
+        self._writer = None
+        if self.kind == "npy":
+            self.capacity = n_rows
+            self._mm = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=(n_rows, len(NPY_COLUMNS))
+            )
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.kind == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        elif self.kind == "npy":
+            if self.rows + len(df) > self.capacity:
+                raise ValueError(f"{self.path}: more than the {self.capacity} rows it was sized for")
+            self._mm[self.rows:self.rows + len(df)] = df.reindex(columns=NPY_COLUMNS).to_numpy(np.float32)
+        else:
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self.kind == "npy":
+            self._mm.flush()
+            del self._mm
+            if self.rows < self.capacity:
+                _trim_npy(self.path, self.rows)
+
+
+def build_features(src: str, dst: str, chunk_size: int = 500_000, workers: int = 1) -> int:
+    """Run the pipeline src → dst. Returns the number of rows written."""
+    writer = _FeatureWriter(dst, max_rows(src) if dst.endswith(".npy") else None)
+    try:
+        for df in transformed_chunks(src, chunk_size, workers):
+            writer.write(df)
+            print(f"  {writer.rows:>12,} rows")
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the lead feature set")
+    parser.add_argument("--in", dest="src", default="leads.csv", help=".csv or .parquet")
+    parser.add_argument("--out", dest="dst", default="leads_features.csv", help=".csv, .parquet or .npy")
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rows = build_features(args.src, args.dst, args.chunk_size, args.workers)
+    print(f"Saved {args.dst} with {rows:,} rows × {len(FEATURE_COLUMNS)} features")
 
-# Save engineered dataset
-features.to_csv("leads_features.csv", index=False)
 
-print("Saved leads_features.csv with shape:", features.shape)
-print(features.head())
+if __name__ == "__main__":
+    main()
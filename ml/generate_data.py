@@ -1,30 +1,50 @@
-import pandas as pd
-import random
+# ml/generate_data.py
+# ─────────────────────────────────────────────────────────────────────
+# Synthetic lead generator for training and load testing.
+#
+# Rows are generated a chunk at a time with NumPy (no per-row Python),
+# so tens of millions of rows stream to disk in bounded memory:
+#
+#   python -m ml.generate_data                          # 50k rows → leads.csv
+#   python -m ml.generate_data --rows 20000000 --out leads.parquet
+#   python -m ml.generate_data --rows 100000 --messages real_estate \
+#       --out messages.csv                              # scoring benchmark set
+#
+# --messages adds a free-text `message` column per lead plus the
+# `expected_bucket` it was written to look like, assembled from the
+# industry's intents, hot signals and few-shot examples in
+# backend/services/prompts.py (INDUSTRY_CONTEXT). Same --seed, same data.
+# Parquet output needs pyarrow.
+# ─────────────────────────────────────────────────────────────────────
+
+import argparse
 
-N = 50000
+import numpy as np
+import pandas as pd
 
-rows = []
+BUDGETS = np.array([100000, 200000, 300000, 500000, 750000, 1000000, 2000000, 5000000], dtype=np.int32)
 
-for i in range(N):
-    budget = random.choice([100000, 200000, 300000, 500000, 750000, 1000000, 2000000, 5000000])
-    urgency = random.randint(0, 90)
-    views = random.randint(0, 50)
-    saves = random.randint(0, 20)
-    bedrooms = random.randint(1, 6)
-    preapproved = random.choice([0, 1])
-    open_house = random.choice([0, 1])
-    agent_response_hours = random.randint(0, 72)
 
-    score = 0
-    if budget >= 500000: score += 1
-    if urgency <= 30: score += 1
-    if preapproved == 1: score += 1
-    if views >= 10: score += 1
-    if saves >= 3: score += 1
+def generate_chunk(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    budget               = rng.choice(BUDGETS, n)
+    urgency              = rng.integers(0, 91, n, dtype=np.int16)
+    views                = rng.integers(0, 51, n, dtype=np.int16)
+    saves                = rng.integers(0, 21, n, dtype=np.int16)
+    bedrooms             = rng.integers(1, 7, n, dtype=np.int8)
+    preapproved          = rng.integers(0, 2, n, dtype=np.int8)
+    open_house           = rng.integers(0, 2, n, dtype=np.int8)
+    agent_response_hours = rng.integers(0, 73, n, dtype=np.int16)
 
-    converted = 1 if score >= 3 and random.random() > 0.3 else 0
+    score = (
+        (budget >= 500000).astype(np.int8) +
+        (urgency <= 30) +
+        (preapproved == 1) +
+        (views >= 10) +
+        (saves >= 3)
+    )
+    converted = ((score >= 3) & (rng.random(n) > 0.3)).astype(np.int8)
 
-    rows.append({
+    return pd.DataFrame({
         "budget": budget,
         "urgency": urgency,
         "views": views,
@@ -33,10 +53,119 @@ for i in range(N):
         "preapproved": preapproved,
         "open_house": open_house,
         "agent_response_hours": agent_response_hours,
-        "converted": converted
+        "converted": converted,
     })
 
-df = pd.DataFrame(rows)
-df.to_csv("leads.csv", index=False)
 
-print("Generated leads.csv with", len(df), "rows")
+# ─────────────────────────────────────────────
+# MESSAGES
+# ─────────────────────────────────────────────
+def message_pools(industry: str) -> dict[str, np.ndarray]:
+    """Every message variant per bucket for an industry, built once."""
+    from backend.services.prompts import INDUSTRY_CONTEXT
+
+    if industry not in INDUSTRY_CONTEXT:
+        raise SystemExit(f"Unknown industry {industry!r}. Choose from: {', '.join(INDUSTRY_CONTEXT)}")
+
+    info    = INDUSTRY_CONTEXT[industry]
+    intents = [i.replace("_", " ") for i in info["intents"]]
+    signals = info["hot_signals"]
+    shots   = {label: [s["message"] for s in info["few_shot"] if s["label"] == label]
+               for label in ("HOT", "WARM", "COLD")}
+
+    hot = shots["HOT"] + [
+        f"Hi, I need help with {intent}. It's {signal}, please call me back today."
+        for intent in intents for signal in signals
+    ]
+    warm = shots["WARM"] + [
+        f"Hello, I'm interested in {intent}. Can you share details and pricing?"
+        for intent in intents
+    ]
+    cold = shots["COLD"] + [
+        f"Just checking, do you handle {intent}? No rush."
+        for intent in intents
+    ]
+    spam = [
+        "Congratulations! You have won a free prize, click here to claim.",
+        "We offer SEO services to rank your website #1 on Google.",
+        "Buy followers cheap, limited offer!",
+    ]
+    return {b: np.array(p, dtype=object) for b, p in
+            (("HOT", hot), ("WARM", warm), ("COLD", cold), ("IGNORE", spam))}
+
+
+def add_messages(rng: np.random.Generator, df: pd.DataFrame, pools: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Message per row; bucket skews HOT for converting leads, like real traffic."""
+    n     = len(df)
+    r     = rng.random(n)
+    hot_p = np.where(df["converted"].to_numpy() == 1, 0.6, 0.1)
+
+    buckets  = np.where(r < hot_p, "HOT",
+               np.where(r < hot_p + 0.35, "WARM",
+               np.where(r < 0.97, "COLD", "IGNORE")))
+    messages = np.empty(n, dtype=object)
+    for bucket, pool in pools.items():
+        mask = buckets == bucket
+        messages[mask] = pool[rng.integers(0, len(pool), mask.sum())]
+
+    df["message"]         = messages
+    df["expected_bucket"] = pd.Categorical(buckets, categories=list(pools))
+    return df
+
+
+# ─────────────────────────────────────────────
+# OUTPUT
+# ─────────────────────────────────────────────
+class _ChunkWriter:
+    def __init__(self, path: str):
+        self.path    = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self._first  = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic leads")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--out", default="leads.csv", help=".csv or .parquet")
+    parser.add_argument("--messages", metavar="INDUSTRY", help="add a synthetic message per lead")
+    args = parser.parse_args()
+
+    rng    = np.random.default_rng(args.seed)
+    pools  = message_pools(args.messages) if args.messages else None
+    writer = _ChunkWriter(args.out)
+
+    try:
+        for start in range(0, args.rows, args.chunk_size):
+            df = generate_chunk(rng, min(args.chunk_size, args.rows - start))
+            if pools:
+                df = add_messages(rng, df, pools)
+            writer.write(df)
+            print(f"  {start + len(df):>12,} / {args.rows:,} rows")
+    finally:
+        writer.close()
+
+    print(f"Generated {args.out} with {args.rows:,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# ml/retrain.py
+# ─────────────────────────────────────────────────────────────────────
+# Incremental retraining of the lead model on real conversion feedback.
+#
+# POST /leads/{id}/conversion stores `converted` in
+# lead_scores.input_payload. This job streams every labelled lead out
+# of Postgres through a server-side cursor, builds features with
+# ml/features.py — structured fields (budget, urgency, views, ...) when
+# the lead has them, otherwise whatever record_from_lead() can read
+# from its message and rule signals — and adds boosting rounds on top of
+# the current model instead of training from scratch:
+#
+#   lead_scores ──► server-side cursor, BATCH_SIZE rows at a time
+#              ──► xgb.DataIter ──► external-memory DMatrix (disk cache)
+#              ──► xgb.train(xgb_model=current booster)
+#
+# Memory is bounded by the batch size and xgboost's page cache, not the
+# table size. Every 10th lead (by id hash, stable between runs) is held
+# out; the new and current models are both scored on it, and the new
+# one is only published if its AUC is at least as good:
+#
+#   models/lead_scorer_v<N>.ubj     booster
+#   models/lead_scorer_v<N>.json    manifest: version, AUCs, rows, base
+#   models/lead_scorer_latest.json  copy of the newest manifest — what
+#                                   backend/services/model_tier.py loads
+#
+#   python -m ml.retrain --rounds 50
+# ─────────────────────────────────────────────────────────────────────
+
+import os
+import re
+import json
+import zlib
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from dotenv import load_dotenv
+from sklearn.metrics import roc_auc_score
+from sqlalchemy import create_engine, text
+
+from ml.features import FEATURE_COLUMNS, RAW_COLUMNS, feature_matrix, raw_from_records, record_from_lead
+
+load_dotenv()
+
+MODELS_DIR  = Path(__file__).resolve().parents[1] / "models"
+LATEST_PATH = MODELS_DIR / "lead_scorer_latest.json"
+BATCH_SIZE  = 50_000
+VAL_BUCKETS = 10            # 1 in VAL_BUCKETS leads is held out
+
+PARAMS = {
+    "objective":        "binary:logistic",
+    "eval_metric":      "auc",
+    "tree_method":      "hist",
+    "max_depth":        5,
+    "learning_rate":    0.05,
+    "subsample":        0.8,
+    "colsample_bytree": 0.8,
+    "seed":             42,
+}
+
+_HAS_STRUCTURED = " OR ".join(f"input_payload->>'{c}' IS NOT NULL" for c in RAW_COLUMNS)
+LABELLED_SQL = f"""
+    SELECT id, input_payload FROM lead_scores
+    WHERE input_payload->>'converted' IS NOT NULL
+      AND (({_HAS_STRUCTURED}) OR COALESCE(input_payload->>'message', '') <> '')
+"""
+
+
+# ─────────────────────────────────────────────
+# STREAMING
+# ─────────────────────────────────────────────
+def _is_validation(lead_id: str) -> bool:
+    return zlib.crc32(lead_id.encode()) % VAL_BUCKETS == 0
+
+
+def iter_batches(engine, validation: bool, batch_size: int = BATCH_SIZE):
+    """(X, y) float32 batches of the train or validation split, streamed."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(text(LABELLED_SQL))
+        for rows in result.partitions(batch_size):
+            payloads = [r.input_payload for r in rows if _is_validation(r.id) == validation]
+            if not payloads:
+                continue
+            y = np.fromiter((str(p["converted"]).lower() in ("true", "1") for p in payloads),
+                            dtype=np.float32, count=len(payloads))
+            yield feature_matrix(raw_from_records([record_from_lead(p) for p in payloads])), y
+
+
+class LeadIter(xgb.DataIter):
+    """Training split for an external-memory DMatrix; re-runs the query on reset()."""
+
+    def __init__(self, engine, cache_prefix: str):
+        self._engine  = engine
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> int:
+        if self._batches is None:
+            self._batches = iter_batches(self._engine, validation=False)
+        batch = next(self._batches, None)
+        if batch is None:
+            return 0
+        X, y = batch
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self) -> None:
+        if self._batches is not None:
+            self._batches.close()
+        self._batches = None
+
+
+def validation_auc(engine, boosters: list) -> tuple[list[float], int]:
+    """AUC of each booster on the held-out split, predicting batch by batch."""
+    ys, preds = [], [[] for _ in boosters]
+    for X, y in iter_batches(engine, validation=True):
+        ys.append(y)
+        for i, booster in enumerate(boosters):
+            preds[i].append(booster.inplace_predict(X, validate_features=False))
+    if not ys:
+        return [float("nan")] * len(boosters), 0
+    y = np.concatenate(ys)
+    if len(np.unique(y)) < 2:
+        return [float("nan")] * len(boosters), len(y)
+    return [float(roc_auc_score(y, np.concatenate(p))) for p in preds], len(y)
+
+
+# ─────────────────────────────────────────────
+# ARTIFACTS
+# ─────────────────────────────────────────────
+def current_model() -> tuple[xgb.Booster, str]:
+    if LATEST_PATH.exists():
+        artifact = json.loads(LATEST_PATH.read_text())["artifact"]
+        return xgb.Booster(model_file=str(MODELS_DIR / artifact)), artifact
+    return joblib.load(MODELS_DIR / "lead_scorer_v1.pkl").get_booster(), "lead_scorer_v1.pkl"
+
+
+def next_version() -> int:
+    versions = [int(m.group(1)) for p in MODELS_DIR.iterdir()
+                if (m := re.fullmatch(r"lead_scorer_v(\d+)\.(pkl|ubj)", p.name))]
+    return max(versions, default=0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the lead model on conversion feedback")
+    parser.add_argument("--rounds", type=int, default=50, help="boosting rounds to add")
+    parser.add_argument("--force", action="store_true", help="publish even if validation AUC drops")
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("Set DATABASE_URL")
+    engine = create_engine(url)
+
+    base, base_name = current_model()
+    print(f"Base model: {base_name}")
+
+    cache_dir = tempfile.mkdtemp(prefix="lead_retrain_")
+    try:
+        it     = LeadIter(engine, cache_prefix=os.path.join(cache_dir, "cache"))
+        dtrain = xgb.DMatrix(it, missing=np.nan)
+        rows   = dtrain.num_row()
+        if not rows:
+            raise SystemExit("No labelled leads yet")
+        # The v1 booster was trained on named DataFrame columns
+        dtrain.feature_names = FEATURE_COLUMNS
+
+        print(f"Training {args.rounds} more rounds on {rows:,} leads…")
+        booster = xgb.train(PARAMS, dtrain, num_boost_round=args.rounds, xgb_model=base)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    (new_auc, base_auc), val_rows = validation_auc(engine, [booster, base])
+    print(f"Validation AUC on {val_rows:,} leads: {base_auc:.4f} (current) → {new_auc:.4f} (retrained)")
+
+    if not args.force and not new_auc >= base_auc:
+        raise SystemExit("Retrained model is not better — not published")
+
+    version  = next_version()
+    artifact = f"lead_scorer_v{version}.ubj"
+    manifest = {
+        "version":         version,
+        "artifact":        artifact,
+        "base_model":      base_name,
+        "rounds_added":    args.rounds,
+        "train_rows":      rows,
+        "validation_rows": val_rows,
+        "validation_auc":  new_auc,
+        "base_auc":        base_auc,
+        "trained_at":      datetime.now(timezone.utc).isoformat(),
+    }
+    booster.save_model(str(MODELS_DIR / artifact))
+    (MODELS_DIR / f"lead_scorer_v{version}.json").write_text(json.dumps(manifest, indent=2))
+    LATEST_PATH.write_text(json.dumps(manifest, indent=2))
+    print(f"Published models/{artifact} — restart API workers to load it")
+
+
+if __name__ == "__main__":
+    main()